@@ -34,8 +34,10 @@ def netcdf_post_create_resource(sender, **kwargs):
         nc_file_name = res_file.file_name
 
         if isinstance(nc_dataset, netCDF4.Dataset):
-            # Extract the metadata from netcdf file
-            res_dublin_core_meta, res_type_specific_meta = nc_meta.get_nc_meta_dict(temp_file)
+            # Extract the metadata and the header info from netcdf file
+            nc_file_meta = nc_meta.get_nc_meta(temp_file, nc_dataset)
+            res_dublin_core_meta = nc_file_meta.dublin_core_meta
+            res_type_specific_meta = nc_file_meta.type_specific_meta
             # populate metadata list with extracted metadata
             metadata = []
             add_metadata_to_list(metadata, res_dublin_core_meta, res_type_specific_meta)
@@ -57,7 +59,8 @@ def netcdf_post_create_resource(sender, **kwargs):
                     resource.metadata.create_element(k, **v)
 
             # create the ncdump text file
-            dump_file = create_header_info_txt_file(temp_file, nc_file_name)
+            dump_file = create_header_info_txt_file(temp_file, nc_file_name,
+                                                    nc_file_meta.header_string)
             dump_file_name = nc_file_name + '_header_info.txt'
             uploaded_file = UploadedFile(file=open(dump_file), name=dump_file_name)
             utils.add_file_to_resource(resource, uploaded_file)
@@ -164,8 +167,10 @@ def netcdf_pre_add_files_to_resource(sender, **kwargs):
             user = kwargs['user']
             utils.resource_modified(nc_res, user, overwrite_bag=False)
 
-            # extract metadata
-            res_dublin_core_meta, res_type_specific_meta = nc_meta.get_nc_meta_dict(in_file_name)
+            # extract metadata and the header info
+            nc_file_meta = nc_meta.get_nc_meta(in_file_name, nc_dataset)
+            res_dublin_core_meta = nc_file_meta.dublin_core_meta
+            res_type_specific_meta = nc_file_meta.type_specific_meta
 
             # update title info
             if res_dublin_core_meta.get('title'):
@@ -274,7 +279,8 @@ def netcdf_pre_add_files_to_resource(sender, **kwargs):
                                                    value=res_dublin_core_meta['original-box'])
 
             # create the ncdump text file
-            dump_file = create_header_info_txt_file(in_file_name, nc_file_name)
+            dump_file = create_header_info_txt_file(in_file_name, nc_file_name,
+                                                    nc_file_meta.header_string)
             dump_file_name = nc_file_name + '_header_info.txt'
             uploaded_file = UploadedFile(file=open(dump_file), name=dump_file_name)
             files.append(uploaded_file)
@@ -0,0 +1,178 @@
+"""
+Helpers for reading the timeseries CSV files (first column date/time values, the remaining
+columns numeric data values of each time series) in a single streaming pass.
+"""
+
+import csv
+import itertools
+from collections import namedtuple
+from datetime import datetime
+
+import numpy
+from dateutil import parser
+
+# date/time formats tried (in this order) on the date/time values of a CSV file before falling
+# back to the (much slower) dateutil parser
+DATETIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%y %H:%M:%S',
+    '%m/%d/%y %H:%M',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%m/%d/%Y',
+)
+
+# number of data rows validated at once
+CSV_VALIDATION_CHUNK_SIZE = 10000
+
+# information about a valid csv file collected while validating it: the column headings,
+# the number of data rows and the first and last date/time values (all as in the file)
+CSVFileInfo = namedtuple('CSVFileInfo', ['header', 'data_row_count', 'start_date', 'end_date'])
+
+
+class CSVFileError(ValueError):
+    """Raised for a csv file which is not a valid timeseries csv file"""
+    pass
+
+
+def detect_datetime_format(value):
+    """Return the first of DATETIME_FORMATS the date/time string *value* matches, or None."""
+    value = value.strip()
+    for datetime_format in DATETIME_FORMATS:
+        try:
+            datetime.strptime(value, datetime_format)
+            return datetime_format
+        except ValueError:
+            continue
+    return None
+
+
+class DateTimeParser(object):
+    """Parses the date/time values of a CSV file.
+
+    The format of the values is detected once, from the first value, among DATETIME_FORMATS
+    and then used to parse the following values with strptime. A value that doesn't match the
+    detected format is parsed with the dateutil parser, so the result is the same as parsing
+    every value with dateutil. If the first value matches none of DATETIME_FORMATS, all values
+    are parsed with dateutil.
+    """
+    def __init__(self):
+        # None until detection is tried on the first value, False if it found no format
+        self.datetime_format = None
+
+    def parse(self, value):
+        """Return *value* as a datetime. Raises ValueError if it is not a date/time value."""
+        value = value.strip()
+        if self.datetime_format is None:
+            self.datetime_format = detect_datetime_format(value) or False
+            if self.datetime_format:
+                return datetime.strptime(value, self.datetime_format)
+        elif self.datetime_format:
+            try:
+                return datetime.strptime(value, self.datetime_format)
+            except ValueError:
+                pass
+
+        try:
+            return parser.parse(value)
+        except (ValueError, OverflowError, TypeError) as ex:
+            raise ValueError(str(ex))
+
+
+def read_csv_file_info(csv_file_path):
+    """Validates the timeseries csv file *csv_file_path* and returns its CSVFileInfo.
+
+    The file is read once, CSV_VALIDATION_CHUNK_SIZE data rows at a time. The data values of a
+    chunk are converted to numbers with one numpy.array call (which still converts each value
+    with float); only a chunk that fails the conversion is checked again row by row to find the
+    offending row. Validation stops at the first invalid
+    row.
+    :param csv_file_path: path of the csv file
+    :raises CSVFileError: if the file is not valid - the error message tells why and for an
+    invalid data row also its line number
+    """
+    with open(csv_file_path, 'r') as fl_obj:
+        csv_reader = csv.reader(fl_obj, delimiter=',')
+        # read the first row
+        header = next(csv_reader, [])
+        _validate_csv_header([el.strip() for el in header])
+
+        datetime_parser = DateTimeParser()
+        data_row_count = 0
+        start_date = None
+        end_date = None
+        while True:
+            rows = list(itertools.islice(csv_reader, CSV_VALIDATION_CHUNK_SIZE))
+            if not rows:
+                break
+            # line number of the first row of the chunk (the header is line 1)
+            first_line = data_row_count + 2
+            error = _validate_csv_data_rows(rows, len(header), datetime_parser)
+            if error is not None:
+                message, row_index = error
+                raise CSVFileError("{} Invalid data at line {}.".format(message,
+                                                                        first_line + row_index))
+            if start_date is None:
+                start_date = rows[0][0]
+            end_date = rows[-1][0]
+            data_row_count += len(rows)
+
+    return CSVFileInfo(header, data_row_count, start_date, end_date)
+
+
+def _validate_csv_header(header):
+    if any(len(h) == 0 for h in header):
+        raise CSVFileError("Column heading is missing.")
+
+    # check that there are at least 2 headings
+    if len(header) < 2:
+        raise CSVFileError("There needs to be at least 2 columns of data.")
+
+    # check the header has only string values
+    for hdr in header:
+        try:
+            float(hdr)
+        except ValueError:
+            continue
+        raise CSVFileError("Column heading must be a string.")
+
+    # check that there are no duplicate column headings
+    if len(header) != len(set(header)):
+        raise CSVFileError("There are duplicate column headings.")
+
+
+def _validate_csv_data_rows(rows, column_count, datetime_parser):
+    """Returns (error message, index of the row) for the first invalid row in *rows*, or None"""
+    error = None
+    for index, row in enumerate(rows):
+        # check that data row has the same number of columns as the header
+        if len(row) != column_count:
+            error = ("Number of columns in the header is not same as the data columns.", index)
+            break
+        # check that the first column data is of type datetime
+        try:
+            datetime_parser.parse(row[0])
+        except ValueError:
+            error = ("Data for the first column must be a date value.", index)
+            break
+
+    # check that the data values (2nd column onwards) are numeric in the rows before any
+    # row with an error found above
+    checked_rows = rows if error is None else rows[:error[1]]
+    try:
+        numpy.array([row[1:] for row in checked_rows], dtype=numpy.float64)
+    except ValueError:
+        for index, row in enumerate(checked_rows):
+            try:
+                for data_value in row[1:]:
+                    float(data_value)
+            except ValueError:
+                return "Data values must be numeric.", index
+    return error
@@ -6,6 +6,7 @@ import logging
 from uuid import uuid4
 from dateutil import parser
 import json
+import itertools
 from collections import OrderedDict
 
 from django.contrib.postgres.fields import HStoreField
@@ -22,6 +23,12 @@ from mezzanine.pages.page_processors import processor_for
 from hs_core.models import BaseResource, ResourceManager, resource_processor, CoreMetaData, \
     AbstractMetaDataElement, Creator
 from hs_core.hydroshare import utils
+from hs_core.fragment_cache import bump_metadata_version
+
+from hs_app_timeseries.csv_utils import DateTimeParser
+
+# number of TimeSeriesResultValues records inserted at once when loading the csv data values
+RESULT_VALUES_INSERT_BATCH_SIZE = 10000
 
 
 class TimeSeriesAbstractMetaDataElement(AbstractMetaDataElement):
@@ -638,6 +645,44 @@ class TimeSeriesResult(TimeSeriesAbstractMetaDataElement):
         _create_timeseriesresult_related_cv_terms(element=element, data_dict=kwargs)
         return element
 
+    @classmethod
+    def create_in_bulk(cls, metadata, data_dicts):
+        """Creates an element of *metadata* for each dict in *data_dicts* with one insert.
+
+        The elements are validated and marked dirty the same way as by create(). Unlike create()
+        no CV terms are created, so the CV terms used must exist already, and no post_save
+        signal is sent for the elements.
+        """
+        elements = []
+        for data_dict in data_dicts:
+            if not data_dict.get('series_ids'):
+                raise ValidationError("Timeseries ID(s) is missing")
+            if len(data_dict['series_ids']) > 1:
+                raise ValidationError("Multiple series ids can't be assigned.")
+            if metadata.series_names:
+                # see create()
+                cls.validate_series_ids(metadata, data_dict)
+            elements.append(cls(content_object=metadata, **data_dict))
+        if not elements:
+            return elements
+
+        if isinstance(metadata, TimeSeriesMetaData):
+            tg_obj = metadata.resource
+        else:
+            # metadata is an instance of TimeSeriesFileMetaData
+            tg_obj = metadata.logical_file
+        if tg_obj.has_csv_file:
+            for element in elements:
+                element.is_dirty = True
+            metadata.is_dirty = True
+            metadata.save()
+        cls.objects.bulk_create(elements)
+
+        if isinstance(metadata, TimeSeriesMetaData):
+            # the post_save receiver would invalidate the cached landing page fragments
+            bump_metadata_version(tg_obj.id)
+        return elements
+
     @classmethod
     def update(cls, element_id, **kwargs):
         element = cls.objects.get(id=element_id)
@@ -1157,11 +1202,6 @@ class TimeSeriesMetaDataMixin(models.Model):
                 return element
         return None
 
-    def _read_csv_specified_column(self, csv_reader, data_column_index):
-        # generator function to read (one row) the datetime column and the specified data column
-        for row in csv_reader:
-            yield row[0], row[data_column_index]
-
     def _get_series_label(self, series_id, source):
         """Generate a label given a series id
         :param  series_id: id of the time series
@@ -1704,43 +1744,51 @@ class TimeSeriesMetaDataMixin(models.Model):
                      "QualityCodeCV, TimeAggregationInterval, " \
                      "TimeAggregationIntervalUnitsID) VALUES(?,?,?,?,?,?,?,?,?)"
 
-        # read the csv file to determine time interval (in minutes) between each reading
-        # we will use the first 2 rows of data to determine this value
+        # map each series label (csv data column heading) to the ResultID of the series
+        result_ids = {item['object_id']: item['result_id'] for item in results_data}
+        series_result_ids = {ts_item.series_label: result_ids[ts_item.id] for ts_item in
+                             self.time_series_results}
+
         utc_offset = self.utc_offset.value
+        datetime_parser = DateTimeParser()
+        # the sqlite file is a temporary copy which is discarded on failure - no need for
+        # the rollback journal and disk syncs while loading the data values
+        journal_mode = cur.execute("PRAGMA journal_mode").fetchone()[0]
+        synchronous = cur.execute("PRAGMA synchronous").fetchone()[0]
+        cur.execute("PRAGMA journal_mode=MEMORY")
+        cur.execute("PRAGMA synchronous=OFF")
         with open(temp_csv_file, 'r') as fl_obj:
             csv_reader = csv.reader(fl_obj, delimiter=',')
-            # read the first row (header)
             header = csv_reader.next()
-            first_row_data = csv_reader.next()
-            second_row_data = csv_reader.next()
-            time_interval = (parser.parse(second_row_data[0]) -
-                             parser.parse(first_row_data[0])).seconds / 60
+            column_result_ids = [series_result_ids[label] for label in header[1:]]
+
+            # read the csv file to determine time interval (in minutes) between each
+            # reading - we will use the first 2 rows of data to determine this value
+            first_rows = list(itertools.islice(csv_reader, 2))
+            if len(first_rows) == 2:
+                time_interval = (datetime_parser.parse(first_rows[1][0]) -
+                                 datetime_parser.parse(first_rows[0][0])).seconds / 60
+            else:
+                time_interval = 0
 
-        with open(temp_csv_file, 'r') as fl_obj:
-            csv_reader = csv.reader(fl_obj, delimiter=',')
-            # read the first row (header) and skip
-            csv_reader.next()
+            # read the csv file only once, inserting the values of all the series of
+            # each row in batches
             value_id = 1
-            data_header = header[1:]
-            for col, value in enumerate(data_header):
-                # get the ts_result object with matching series_label
-                ts_result = [ts_item for ts_item in self.time_series_results if
-                             ts_item.series_label == value][0]
-                # get the result id associated with ts_result object
-                result_data_item = [dict_item for dict_item in results_data if
-                                    dict_item['object_id'] == ts_result.id][0]
-                result_id = result_data_item['result_id']
-                data_col_index = col + 1
-                # start at the beginning of data row
-                fl_obj.seek(0)
-                csv_reader.next()
-                for date_time, data_value in self._read_csv_specified_column(
-                        csv_reader, data_col_index):
-                    date_time = parser.parse(date_time)
-                    cur.execute(insert_sql, (value_id, result_id, data_value,
-                                             date_time, utc_offset, 'Unknown', 'Unknown',
-                                             time_interval, 102), )
+            values = []
+            for row in itertools.chain(first_rows, csv_reader):
+                date_time = datetime_parser.parse(row[0])
+                for result_id, data_value in zip(column_result_ids, row[1:]):
+                    values.append((value_id, result_id, data_value, date_time, utc_offset,
+                                   'Unknown', 'Unknown', time_interval, 102))
                     value_id += 1
+                if len(values) >= RESULT_VALUES_INSERT_BATCH_SIZE:
+                    cur.executemany(insert_sql, values)
+                    values = []
+            if values:
+                cur.executemany(insert_sql, values)
+        con.commit()
+        cur.execute("PRAGMA synchronous={}".format(synchronous))
+        cur.execute("PRAGMA journal_mode={}".format(journal_mode))
 
     def populate_blank_sqlite_file(self, temp_sqlite_file, user):
         """
@@ -15,7 +15,7 @@ from forms import SiteValidationForm, VariableValidationForm, MethodValidationFo
     ProcessingLevelValidationForm, TimeSeriesResultValidationForm, UTCOffSetValidationForm
 
 from hs_file_types.models.timeseries import extract_metadata, validate_odm2_db_file, \
-    extract_cv_metadata_from_blank_sqlite_file, validate_csv_file, add_blank_sqlite_file
+    extract_cv_metadata_from_blank_sqlite_file, get_csv_file_info, add_blank_sqlite_file
 
 FILE_UPLOAD_ERROR_MESSAGE = "(Uploaded file was not added to the resource)"
 
@@ -147,7 +147,7 @@ def _process_uploaded_csv_file(resource, res_file, validate_files_dict, user,
                                delete_existing_metadata=True):
     # get the csv file from iRODS to a temp directory
     fl_obj_name = utils.get_file_from_irods(res_file)
-    validate_err_message = validate_csv_file(fl_obj_name)
+    validate_err_message, csv_file_info = get_csv_file_info(fl_obj_name)
     if not validate_err_message:
         # first delete relevant existing metadata elements
         if delete_existing_metadata:
@@ -162,7 +162,7 @@ def _process_uploaded_csv_file(resource, res_file, validate_files_dict, user,
         resource_modified(resource, user, overwrite_bag=False)
 
         # populate CV metadata django models from the blank sqlite file
-        extract_cv_metadata_from_blank_sqlite_file(resource)
+        extract_cv_metadata_from_blank_sqlite_file(resource, csv_file_info)
 
     else:  # file validation failed
         # delete the invalid file just uploaded
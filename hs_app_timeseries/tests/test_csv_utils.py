@@ -0,0 +1,61 @@
+from datetime import datetime
+from unittest import TestCase
+
+from mock import patch
+
+from hs_app_timeseries.csv_utils import DateTimeParser, detect_datetime_format, \
+    read_csv_file_info, CSVFileError
+
+
+class TestCSVUtils(TestCase):
+
+    def test_detect_datetime_format(self):
+        self.assertEqual(detect_datetime_format('2015-01-01 10:30:00'), '%Y-%m-%d %H:%M:%S')
+        self.assertEqual(detect_datetime_format(' 1/2/2015 10:30 '), '%m/%d/%Y %H:%M')
+        self.assertEqual(detect_datetime_format('Jan 2, 2015'), None)
+
+    def test_datetime_parser(self):
+        datetime_parser = DateTimeParser()
+        self.assertEqual(datetime_parser.parse('2015-01-01 10:30'), datetime(2015, 1, 1, 10, 30))
+        self.assertEqual(datetime_parser.datetime_format, '%Y-%m-%d %H:%M')
+        self.assertEqual(datetime_parser.parse('2015-01-01 10:45'), datetime(2015, 1, 1, 10, 45))
+        # a value not matching the detected format is parsed by the dateutil parser
+        self.assertEqual(datetime_parser.parse('Jan 2, 2015 10:30'),
+                         datetime(2015, 1, 2, 10, 30))
+        with self.assertRaises(ValueError):
+            datetime_parser.parse('not a date')
+
+    def test_datetime_parser_undetected_format(self):
+        # fractional seconds match none of the DATETIME_FORMATS: detection is only tried on the
+        # first value and all values are parsed by the dateutil parser
+        datetime_parser = DateTimeParser()
+        with patch('hs_app_timeseries.csv_utils.detect_datetime_format',
+                   wraps=detect_datetime_format) as detect_mock:
+            self.assertEqual(datetime_parser.parse('2015-01-01 10:30:00.5'),
+                             datetime(2015, 1, 1, 10, 30, 0, 500000))
+            self.assertEqual(datetime_parser.parse('2015-01-01 10:45:00.25'),
+                             datetime(2015, 1, 1, 10, 45, 0, 250000))
+            self.assertEqual(datetime_parser.parse('2015-01-01 11:00'),
+                             datetime(2015, 1, 1, 11, 0))
+        self.assertEqual(detect_mock.call_count, 1)
+        self.assertFalse(datetime_parser.datetime_format)
+
+    def test_read_csv_file_info(self):
+        csv_file_info = read_csv_file_info(
+            'hs_app_timeseries/tests/ODM2_Multi_Site_One_Variable_Test.csv')
+        self.assertEqual(csv_file_info.header,
+                         ['ValueDateTime', 'Temp_DegC_Mendon', 'Temp_DegC_Paradise'])
+        self.assertEqual(csv_file_info.data_row_count, 19)
+        self.assertEqual(csv_file_info.start_date, '2008-01-01 00:00:00')
+        self.assertEqual(csv_file_info.end_date, '2008-01-01 09:30:00')
+
+    def test_read_invalid_csv_file_info(self):
+        # the line number of the first invalid data row is reported
+        with self.assertRaises(CSVFileError) as cm:
+            read_csv_file_info('hs_app_timeseries/tests/Invalid_Data_Test_2.csv')
+        self.assertIn("Data values must be numeric.", str(cm.exception))
+        self.assertIn("line 2.", str(cm.exception))
+
+        with self.assertRaises(CSVFileError) as cm:
+            read_csv_file_info('hs_app_timeseries/tests/Invalid_Headings_Test_4.csv')
+        self.assertEqual(str(cm.exception), "There are duplicate column headings.")
@@ -9,5 +9,8 @@ class HSCoreAppConfig(AppConfig):
     name = "hs_core"
 
     def ready(self):
-        """On application ready, import receivers for Django signals."""
+        """On application ready, connect signal receivers and build resource type registry."""
         import receivers  # noqa
+        receivers.connect_landing_page_cache_receivers()
+        from hs_core.hydroshare.utils import build_resource_type_registry
+        build_resource_type_registry()
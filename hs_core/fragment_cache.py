@@ -0,0 +1,106 @@
+"""Cache read-only fragments of resource landing pages and other metadata derived values.
+
+A landing page fragment is keyed by (resource id, metadata version, access flags, viewer class).
+The metadata version is a per-resource counter kept in the Django cache and bumped by the
+receivers in hs_core.receivers whenever a metadata element, a resource file or the resource itself
+changes. Access flags (public, discoverable, published) are part of the key, so changing any of
+them makes the previously cached fragments unreachable.
+
+Per-user parts of a landing page (favorites, edit links, quota warnings, session messages)
+must never be stored through this module.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+LANDING_PAGE_CACHE_TIMEOUT = getattr(settings, 'LANDING_PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+VIEWER_ANONYMOUS = 'anonymous'
+VIEWER_AUTHENTICATED = 'authenticated'
+
+
+def _version_key(resource_id):
+    return 'hs_core:landing_page:version:{}'.format(resource_id)
+
+
+def get_metadata_version(resource_id):
+    """Return the current metadata version of the resource with pk *resource_id*.
+
+    A missing version (e.g., evicted from the cache) is re-initialized from the clock so that
+    fragments cached under an older version can never be picked up again.
+    """
+    key = _version_key(resource_id)
+    version = cache.get(key)
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_metadata_version(resource_id):
+    """Invalidate all cached landing page fragments of the resource with pk *resource_id*."""
+    key = _version_key(resource_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # no version stored yet - nothing has been cached for this resource
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def get_viewer_class(user):
+    """Return the viewer class used as part of the fragment cache key for *user*."""
+    if user is not None and user.is_authenticated():
+        return VIEWER_AUTHENTICATED
+    return VIEWER_ANONYMOUS
+
+
+def get_fragment_key(resource, fragment_name, viewer_class):
+    """Return the cache key of a landing page fragment of *resource*.
+
+    :param resource: an instance of BaseResource (or subclass)
+    :param fragment_name: name of the fragment (e.g., 'metadata')
+    :param viewer_class: one of VIEWER_ANONYMOUS or VIEWER_AUTHENTICATED
+    """
+    raccess = resource.raccess
+    access_flags = '{}{}{}'.format(int(raccess.public), int(raccess.discoverable),
+                                   int(raccess.published))
+    return 'hs_core:landing_page:{res_id}:{version}:{flags}:{viewer}:{name}'.format(
+        res_id=resource.id, version=get_metadata_version(resource.id), flags=access_flags,
+        viewer=viewer_class, name=fragment_name)
+
+
+def _get_or_build(key, builder):
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, LANDING_PAGE_CACHE_TIMEOUT)
+    return value
+
+
+def get_or_build_fragment(resource, fragment_name, viewer_class, builder):
+    """Return a cached landing page fragment, building and caching it on a miss.
+
+    :param resource: the resource the fragment belongs to
+    :param fragment_name: name of the fragment
+    :param viewer_class: viewer class as returned by get_viewer_class()
+    :param builder: a callable with no arguments that returns the (picklable) fragment
+    """
+    return _get_or_build(get_fragment_key(resource, fragment_name, viewer_class), builder)
+
+
+def get_or_build_resource_value(resource_id, value_name, builder):
+    """Return a cached value derived from the metadata of a resource, building it on a miss.
+
+    Unlike landing page fragments these values (e.g., the citation) don't depend on access flags
+    or on who is asking, so they are keyed by resource id and metadata version only.
+
+    :param resource_id: pk of the resource the value belongs to
+    :param value_name: name of the value (e.g., 'citation')
+    :param builder: a callable with no arguments that returns the (picklable) value
+    """
+    key = 'hs_core:resource:{res_id}:{version}:{name}'.format(
+        res_id=resource_id, version=get_metadata_version(resource_id), name=value_name)
+    return _get_or_build(key, builder)
@@ -138,18 +138,25 @@ def update_resource_file(pk, filename, f):
     resource = utils.get_resource_by_shortkey(pk)
     for rf in ResourceFile.objects.filter(object_id=resource.id):
         if rf.short_path == filename:
+            new_file = File(f) if not isinstance(f, UploadedFile) else f
+            old_size = rf.file_size
+            if old_size is None:
+                # a file created before its size was kept in the database
+                old_size = rf.size
+            rf.file_size = new_file.size
             if rf.resource_file:
                 # TODO: should use delete_resource_file
                 rf.resource_file.delete()
                 # TODO: should use add_file_to_resource
-                rf.resource_file = File(f) if not isinstance(f, UploadedFile) else f
+                rf.resource_file = new_file
                 rf.save()
             if rf.fed_resource_file:
                 # TODO: should use delete_resource_file
                 rf.fed_resource_file.delete()
                 # TODO: should use add_file_to_resource
-                rf.fed_resource_file = File(f) if not isinstance(f, UploadedFile) else f
+                rf.fed_resource_file = new_file
                 rf.save()
+            utils.update_quota_usage(resource, rf.file_size - old_size)
             return rf
     raise ObjectDoesNotExist(filename)
 
@@ -255,11 +262,8 @@ def check_resource_type(resource_type):
     Returns:  the resource type class matching the resource type string; if no match is found,
     returns None
     """
-    for tp in utils.get_resource_types():
-        if resource_type == tp.__name__:
-            res_cls = tp
-            break
-    else:
+    res_cls = utils.get_resource_type_class(resource_type)
+    if res_cls is None:
         raise NotImplementedError("Type {resource_type} does not exist".format(
             resource_type=resource_type))
     return res_cls
@@ -20,6 +20,7 @@ from django.core.files import File
 from django.core.files.uploadedfile import UploadedFile
 from django.core.files.storage import DefaultStorage
 from django.core.validators import validate_email
+from django.db.models import Sum
 
 from mezzanine.conf import settings
 
@@ -30,7 +31,7 @@ from hs_core.hydroshare.hs_bagit import create_bag_files
 
 from django_irods.icommands import SessionException
 from django_irods.storage import IrodsStorage
-from theme.models import QuotaMessage
+from theme.models import QuotaMessage, UserQuota
 
 
 logger = logging.getLogger(__name__)
@@ -48,13 +49,83 @@ class QuotaException(Exception):
     pass
 
 
-def get_resource_types():
+# process level registry of resource type classes - populated once by
+# build_resource_type_registry() when the hs_core app is ready
+_resource_types = []
+_resource_types_by_name = {}
+_resource_types_by_model_name = {}
+
+
+def build_resource_type_registry():
+    """
+    Build the process level registry of resource type classes from the installed models.
+
+    This is called from HSCoreAppConfig.ready() at which time all models of all installed apps
+    have been loaded. Resource type lookups after that don't need to walk the app registry.
+    """
     resource_types = []
     for model in apps.get_models():
         if issubclass(model, AbstractResource) and model != BaseResource:
             if not getattr(model, 'archived_model', False):
                 resource_types.append(model)
-    return resource_types
+
+    _resource_types_by_name.clear()
+    _resource_types_by_model_name.clear()
+    for model in resource_types:
+        _resource_types_by_name[model._meta.object_name] = model
+        _resource_types_by_model_name[model._meta.model_name] = model
+    _resource_types[:] = resource_types
+
+
+def get_resource_types():
+    if not _resource_types:
+        build_resource_type_registry()
+    return list(_resource_types)
+
+
+def get_resource_type_class(resource_type):
+    """
+    Return the resource type class for a resource_type string (e.g., 'NetcdfResource')
+    :param resource_type: resource type class name as stored in BaseResource.resource_type
+    :return: the matching resource type class or None if there is no such resource type
+    """
+    if not _resource_types:
+        build_resource_type_registry()
+    return _resource_types_by_name.get(resource_type, None)
+
+
+def get_resource_type_class_by_model_name(model_name):
+    """
+    Return the resource type class for a lower case model name (e.g., 'netcdfresource')
+    :param model_name: model name as stored in Page.content_model
+    :return: the matching resource type class or None if there is no such resource type
+    """
+    if not _resource_types:
+        build_resource_type_registry()
+    return _resource_types_by_model_name.get(model_name, None)
+
+
+def get_typed_resource(res):
+    """
+    Return an instance of the concrete resource type class for a BaseResource instance
+
+    All resource type classes are proxy models of BaseResource. So the typed instance is
+    built from the already loaded field values without any additional database query.
+    :param res: an instance of BaseResource
+    :return: an instance of the resource type class matching res.resource_type or None if
+    res.resource_type is not a registered resource type
+    """
+    res_cls = get_resource_type_class(res.resource_type)
+    if res_cls is None:
+        return None
+    if type(res) is res_cls:
+        return res
+    if res_cls._meta.concrete_model is not res._meta.concrete_model:
+        return res_cls.objects.get(id=res.id)
+
+    fields = res._meta.concrete_fields
+    return res_cls.from_db(res._state.db, [f.attname for f in fields],
+                           [getattr(res, f.attname) for f in fields])
 
 
 def get_resource_instance(app, model_name, pk, or_404=True):
@@ -73,7 +144,9 @@ def get_resource_by_shortkey(shortkey, or_404=True):
             raise Http404(shortkey)
         else:
             raise
-    content = res.get_content_model()
+    content = get_typed_resource(res)
+    if content is None:
+        content = res.get_content_model()
     assert content, (res, res.content_model)
     return content
 
@@ -86,7 +159,9 @@ def get_resource_by_doi(doi, or_404=True):
             raise Http404(doi)
         else:
             raise
-    content = res.get_content_model()
+    content = get_typed_resource(res)
+    if content is None:
+        content = res.get_content_model()
     assert content, (res, res.content_model)
     return content
 
@@ -300,10 +375,19 @@ def replace_resource_file_on_irods(new_file, original_resource_file, user):
     ori_res = original_resource_file.resource
     istorage = ori_res.get_irods_storage()
     ori_storage_path = original_resource_file.storage_path
+    old_size = original_resource_file.file_size
+    if old_size is None:
+        # a file created before its size was kept in the database
+        old_size = original_resource_file.size
 
     # Note: this doesn't update metadata at all.
     istorage.saveFile(new_file, ori_storage_path, True)
 
+    new_size = os.path.getsize(new_file)
+    original_resource_file.file_size = new_size
+    original_resource_file.save(update_fields=['file_size'])
+    update_quota_usage(ori_res, new_size - old_size)
+
     # do this so that the bag will be regenerated prior to download of the bag
     resource_modified(ori_res, by_user=user, overwrite_bag=False)
 
@@ -696,11 +780,9 @@ def validate_user_quota(user, size):
     """
     if user:
         # validate it is within quota hard limit
-        uq = user.quotas.filter(zone='hydroshare_internal').first()
+        uq = UserQuota.get_internal_quota(user)
         if uq:
-            if not QuotaMessage.objects.exists():
-                QuotaMessage.objects.create()
-            qmsg = QuotaMessage.objects.first()
+            qmsg = QuotaMessage.get_instance()
             hard_limit = qmsg.hard_limit_percent
             used_size = uq.add_to_used_value(size)
             used_percent = uq.used_percent
@@ -717,6 +799,65 @@ def validate_user_quota(user, size):
                 raise QuotaException(msg_str)
 
 
+def update_quota_usage(resource, size, holder_name=None):
+    """
+    apply a change of the storage used by a resource to the used value of the hydroshare_internal
+    quota of the resource's quota holder
+    :param resource: the resource whose files were added, removed or replaced
+    :param size: the change of the storage used by the resource in byte unit, negative when
+                 storage is freed
+    :param holder_name: user name of the quota holder, which defaults to the current quota
+                        holder of the resource
+    :return:
+    """
+    if not size:
+        return
+    if holder_name is None:
+        holder_name = resource.get_quota_holder_name()
+        if holder_name is None:
+            # the quota holder is set once the files of a new resource are added, which
+            # accounts for the storage used by the resource at that point
+            return
+    uq = UserQuota.objects.filter(user__username=holder_name, zone='hydroshare_internal').first()
+    if uq:
+        uq.add_used_size(size)
+
+
+def reconcile_quota_usage():
+    """
+    recompute the used value of the hydroshare_internal quota of all users from the file sizes
+    kept in the database (ResourceFile.file_size), which are looked up in iRODS only for the
+    files that don't have a size yet, and the quota holders of the resources, which are read
+    from iRODS rather than from the cache
+    :return: the number of UserQuota rows whose used value changed
+    """
+    for res_file in ResourceFile.objects.filter(file_size__isnull=True).iterator():
+        try:
+            res_file.file_size = res_file.size
+        except SessionException as ex:
+            logger.error("Failed to get the size of resource file {}. Error:{}".format(
+                res_file.id, ex.stderr))
+            continue
+        res_file.save(update_fields=['file_size'])
+
+    resource_sizes = dict(ResourceFile.objects.values_list('object_id').annotate(
+        Sum('file_size')).order_by())
+    usage = {}
+    for resource in BaseResource.objects.filter(id__in=resource_sizes.keys()).iterator():
+        holder_name = resource.get_quota_holder_name(cached=False)
+        if holder_name is not None:
+            usage[holder_name] = usage.get(holder_name, 0) + (resource_sizes[resource.id] or 0)
+
+    changed = 0
+    for uq in UserQuota.objects.filter(zone='hydroshare_internal').select_related('user'):
+        used_value = convert_file_size_to_unit(usage.get(uq.user.username, 0), uq.unit)
+        if used_value != uq.used_value:
+            uq.used_value = used_value
+            uq.save(update_fields=['used_value'])
+            changed += 1
+    return changed
+
+
 def resource_pre_create_actions(resource_type, resource_title, page_redirect_url_key,
                                 files=(), source_names=[], metadata=None,
                                 requesting_user=None, **kwargs):
@@ -881,7 +1022,14 @@ def resource_file_add_pre_process(resource, files, user, extract_metadata=False,
     resource_cls = resource.__class__
     if len(files) > 0:
         size = validate_resource_file_size(files)
-        validate_user_quota(resource.get_quota_holder(), size)
+        # the quota of the holder is validated once for all the files
+        holder_name = resource.get_quota_holder_name()
+        if user is not None and user.username == holder_name:
+            quota_holder = user
+        else:
+            quota_holder = User.objects.filter(username=holder_name).first() \
+                if holder_name else None
+        validate_user_quota(quota_holder, size)
         validate_resource_file_type(resource_cls, files)
         validate_resource_file_count(resource_cls, files, resource)
 
@@ -8,6 +8,7 @@ from uuid import uuid4
 from languages_iso import languages as iso_languages
 from dateutil import parser
 from lxml import etree
+from nameparser import HumanName
 
 from django_irods.icommands import SessionException
 
@@ -24,6 +25,7 @@ from django.dispatch import receiver
 from django.utils.timezone import now
 from django_irods.storage import IrodsStorage
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files import File
 from django.core.exceptions import ObjectDoesNotExist, ValidationError, \
     SuspiciousFileOperation, PermissionDenied
@@ -39,6 +41,11 @@ from mezzanine.pages.managers import PageManager
 from dominate.tags import div, legend, table, tbody, tr, th, td, h4
 
 from hs_core.irods import ResourceIRODSMixin, ResourceFileIRODSMixin
+from hs_core.fragment_cache import get_or_build_resource_value
+
+# seconds a resource quota holder name read from iRODS is cached (the cache is shared by the web
+# and celery processes, and set_quota_holder updates it)
+QUOTA_HOLDER_CACHE_TIMEOUT = 60 * 60
 
 
 class GroupOwnership(models.Model):
@@ -1796,17 +1803,26 @@ class AbstractResource(ResourcePermissionsMixin, ResourceIRODSMixin):
 
         setter is the requesting user to transfer quota holder and setter must also be an owner
         """
-        from hs_core.hydroshare.utils import validate_user_quota
+        from hs_core.hydroshare.utils import validate_user_quota, update_quota_usage
         if __debug__:
             assert(isinstance(setter, User))
             assert(isinstance(new_holder, User))
         if not setter.uaccess.owns_resource(self) or \
                 not new_holder.uaccess.owns_resource(self):
             raise PermissionDenied("Only owners can set or be set as quota holder for the resource")
+        old_holder_name = self.get_quota_holder_name()
+        size = self.catalog_size
         # QuotaException will be raised if new_holder does not have enough quota to hold this
         # new resource, in which case, set_quota_holder to the new user fails
-        validate_user_quota(new_holder, self.size)
+        validate_user_quota(new_holder, size)
         self.setAVU("quotaUserName", new_holder.username)
+        cache.set(self._quota_holder_cache_key, new_holder.username, QUOTA_HOLDER_CACHE_TIMEOUT)
+        if old_holder_name != new_holder.username:
+            # move the storage used by the resource to the quota of the new holder (files are
+            # added to a new resource before its first quota holder is set)
+            if old_holder_name is not None:
+                update_quota_usage(self, -size, old_holder_name)
+            update_quota_usage(self, size, new_holder.username)
 
     def get_quota_holder(self):
         """Get quota holder of the resource.
@@ -1825,6 +1841,30 @@ class AbstractResource(ResourcePermissionsMixin, ResourceIRODSMixin):
             # quotaUserName AVU does not exist, return None
             return None
 
+    @property
+    def _quota_holder_cache_key(self):
+        return 'hs_core:resource:{}:quota_holder'.format(self.id)
+
+    def get_quota_holder_name(self, cached=True):
+        """Get the user name of the quota holder of the resource or None if it does not exist.
+
+        The name is cached for QUOTA_HOLDER_CACHE_TIMEOUT seconds (and updated by
+        set_quota_holder), so that the quota accounting of file changes doesn't read the
+        quotaUserName AVU from iRODS for every file. With cached=False the name is read from
+        iRODS, and cached again.
+        """
+        uname = cache.get(self._quota_holder_cache_key) if cached else None
+        if uname is None:
+            try:
+                uname = self.getAVU("quotaUserName")
+            except SessionException:
+                # quotaUserName AVU does not exist, return None
+                return None
+            if not uname:
+                return None
+            cache.set(self._quota_holder_cache_key, uname, QUOTA_HOLDER_CACHE_TIMEOUT)
+        return uname
+
     def setAVU(self, attribute, value):
         """Set an AVU at the resource level.
 
@@ -1924,9 +1964,46 @@ class AbstractResource(ResourcePermissionsMixin, ResourceIRODSMixin):
 
     @property
     def first_creator(self):
-        """Get first creator of resource from metadata."""
-        first_creator = self.metadata.creators.filter(order=1).first()
-        return first_creator
+        """Get first creator of resource from metadata.
+
+        Only the name and the description of the creator are loaded (None if the resource has
+        no creator). They are cached as plain values until the metadata of the resource changes,
+        and read from the cache once per resource instance.
+        """
+        if not hasattr(self, '_first_creator'):
+            values = get_or_build_resource_value(
+                self.id, 'first_creator',
+                lambda: self.metadata.creators.filter(order=1).values(
+                    'name', 'description').first() or {})
+            self._first_creator = Creator(order=1, **values) if values else None
+        return self._first_creator
+
+    @property
+    def first_creator_normalized_name(self):
+        """Get the name of the first creator in 'last suffix, title first middle' form.
+
+        Returns None if the first creator has no name. The value is cached until the metadata of
+        the resource changes.
+        """
+        def build_normalized_name():
+            first_creator = self.first_creator
+            if first_creator is None or first_creator.name is None:
+                return ''
+            nameparts = HumanName(first_creator.name.lstrip())
+            normalized = nameparts.last
+            if nameparts.suffix:
+                normalized = normalized + ' ' + nameparts.suffix
+            normalized = normalized + ','
+            if nameparts.title:
+                normalized = normalized + ' ' + nameparts.title
+            if nameparts.first:
+                normalized = normalized + ' ' + nameparts.first
+            if nameparts.middle:
+                normalized = ' ' + normalized + ' ' + nameparts.middle
+            return normalized
+
+        return get_or_build_resource_value(self.id, 'first_creator_normalized_name',
+                                           build_normalized_name) or None
 
     def get_metadata_xml(self, pretty_print=True, include_format_elements=True):
         """Get metadata xml for Resource.
@@ -2003,7 +2080,15 @@ class AbstractResource(ResourcePermissionsMixin, ResourceIRODSMixin):
         return author_name + ", "
 
     def get_citation(self):
-        """Get citation or citations from resource metadata."""
+        """Get citation or citations from resource metadata.
+
+        The citation is cached until any metadata element of the resource (e.g., creator, date,
+        identifier or publisher) or the resource itself changes.
+        """
+        return get_or_build_resource_value(self.id, 'citation', self._build_citation)
+
+    def _build_citation(self):
+        """Generate citation string from resource metadata."""
         citation_str_lst = []
 
         CITATION_ERROR = "Failed to generate citation."
@@ -2623,6 +2708,10 @@ class ResourceFile(ResourceFileIRODSMixin):
     # DEPRECATED: use native size routine
     # fed_resource_file_size = models.CharField(max_length=15, null=True, blank=True)
 
+    # size of the file in bytes, kept when the file is stored so that the storage used by
+    # resources can be accounted for without iRODS calls (see update_quota_usage)
+    file_size = models.BigIntegerField(null=True, blank=True)
+
     # we are using GenericForeignKey to allow resource file to be associated with any
     # HydroShare defined LogicalFile types (e.g., GeoRasterFile, NetCdfFile etc)
     logical_file_object_id = models.PositiveIntegerField(null=True, blank=True)
@@ -2686,6 +2775,7 @@ class ResourceFile(ResourceFileIRODSMixin):
 
         # if file is an open file, use native copy by setting appropriate variables
         if isinstance(file, File):
+            kwargs['file_size'] = file.size
             if resource.is_federated:
                 kwargs['resource_file'] = None
                 kwargs['fed_resource_file'] = file
@@ -2724,6 +2814,8 @@ class ResourceFile(ResourceFileIRODSMixin):
                 raise ValidationError(
                     "ResourceFile.create: exactly one of source or file must be specified")
 
+            kwargs['file_size'] = resource.get_irods_storage().size(target)
+
             # we've copied or moved if necessary; now set the paths
             if resource.is_federated:
                 kwargs['resource_file'] = None
@@ -3405,6 +3497,23 @@ class BaseResource(Page, AbstractResource):
         f_sizes = [f.size for f in self.files.all()]
         return sum(f_sizes)
 
+    @property
+    def cached_size(self):
+        """Return the total size of all data files in iRODS (see size).
+
+        The size is cached until a file of the resource is added or deleted or the resource
+        changes, so it costs one iRODS call per file only on a cache miss.
+
+        Raises SessionException if iRODS fails.
+        """
+        return get_or_build_resource_value(self.id, 'size', lambda: self.size)
+
+    @property
+    def catalog_size(self):
+        """Return the total size of all data files as kept in the database (see
+        ResourceFile.file_size), without any iRODS calls."""
+        return self.files.aggregate(total=models.Sum('file_size'))['total'] or 0
+
     @property
     def verbose_name(self):
         """Return verbose name of content_model."""
@@ -3492,10 +3601,16 @@ old_get_content_model = Page.get_content_model
 
 def new_get_content_model(self):
     """Override mezzanine get_content_model function for pages for resources."""
-    from hs_core.hydroshare.utils import get_resource_types
+    from hs_core.hydroshare.utils import get_resource_type_class_by_model_name, \
+        get_typed_resource
     content_model = self.content_model
     if content_model.endswith('resource'):
-        rt = [rt for rt in get_resource_types() if rt._meta.model_name == content_model][0]
+        if isinstance(self, BaseResource):
+            # all resource types are proxies of BaseResource - no need to query again
+            typed_res = get_typed_resource(self)
+            if typed_res is not None:
+                return typed_res
+        rt = get_resource_type_class_by_model_name(content_model)
         return rt.objects.get(id=self.id)
     return old_get_content_model(self)
 
@@ -3871,7 +3986,7 @@ class CoreMetaData(models.Model):
     def get_xml(self, pretty_print=True, include_format_elements=True):
         """Get metadata XML rendering."""
         # importing here to avoid circular import problem
-        from hydroshare.utils import current_site_url, get_resource_types
+        from hydroshare.utils import current_site_url, get_typed_resource
 
         RDF_ROOT = etree.Element('{%s}RDF' % self.NAMESPACES['rdf'], nsmap=self.NAMESPACES)
         # create the Description element -this is not exactly a dc element
@@ -3883,9 +3998,7 @@ class CoreMetaData(models.Model):
         # get the resource object associated with this metadata container object - needed to
         # get the verbose_name
         resource = BaseResource.objects.filter(object_id=self.id).first()
-        rt = [rt for rt in get_resource_types()
-              if rt._meta.object_name == resource.resource_type][0]
-        resource = rt.objects.get(id=resource.id)
+        resource = get_typed_resource(resource)
 
         # create the title element
         if self.title:
@@ -1,8 +1,14 @@
 """Signal receivers for the hs_core app."""
 
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from hs_core.signals import pre_metadata_element_create, pre_metadata_element_update
-from hs_core.models import GenericResource
+from hs_core.models import GenericResource, BaseResource, AbstractResource, \
+    AbstractMetaDataElement, CoreMetaData, ResourceFile
+from hs_core.fragment_cache import bump_metadata_version
+from hs_core.hydroshare.utils import update_quota_usage
 from forms import SubjectsForm, AbstractValidationForm, CreatorValidationForm, \
     ContributorValidationForm, RelationValidationForm, SourceValidationForm, RightsValidationForm, \
     LanguageValidationForm, ValidDateValidationForm, FundingAgencyValidationForm, \
@@ -120,3 +126,55 @@ def metadata_element_pre_update_handler(sender, **kwargs):
     else:
         # TODO: need to return form errors
         return {'is_valid': False, 'element_data_dict': None}
+
+
+def landing_page_cache_invalidation_handler(sender, instance, **kwargs):
+    """Invalidate cached landing page fragments when a resource, its metadata or its files
+    change."""
+    if isinstance(instance, AbstractResource):
+        bump_metadata_version(instance.id)
+    elif isinstance(instance, ResourceFile):
+        # the cached resource size (see BaseResource.cached_size) depends on the files
+        bump_metadata_version(instance.object_id)
+    elif isinstance(instance, AbstractMetaDataElement):
+        # elements of file type (logical file) metadata are not part of the cached fragments
+        md_class = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+        if md_class is not None and issubclass(md_class, CoreMetaData):
+            res_ids = BaseResource.objects.filter(
+                object_id=instance.object_id).values_list('id', flat=True)
+            for res_id in res_ids:
+                bump_metadata_version(res_id)
+
+
+def connect_landing_page_cache_receivers():
+    """Connect landing_page_cache_invalidation_handler to the models it handles.
+
+    The handler is connected with explicit senders so that saving any other model doesn't run
+    it. Called from HSCoreAppConfig.ready() once the models of all installed apps are loaded.
+    """
+    for model in apps.get_models():
+        if issubclass(model, (AbstractResource, ResourceFile, AbstractMetaDataElement)):
+            uid = 'landing_page_cache_{}_{}'.format(model._meta.app_label, model._meta.model_name)
+            post_save.connect(landing_page_cache_invalidation_handler, sender=model,
+                              dispatch_uid=uid)
+            post_delete.connect(landing_page_cache_invalidation_handler, sender=model,
+                                dispatch_uid=uid)
+
+
+@receiver(post_save, sender=ResourceFile)
+def resource_file_quota_usage_handler(sender, instance, created, **kwargs):
+    """Account for the storage used by a new resource file in the quota of its quota holder."""
+    if created and instance.file_size:
+        resource = instance.resource
+        if resource is not None:
+            update_quota_usage(resource, instance.file_size)
+
+
+@receiver(post_delete, sender=ResourceFile)
+def resource_file_quota_usage_delete_handler(sender, instance, **kwargs):
+    """Release the storage used by a deleted resource file from the quota of its quota holder."""
+    if instance.file_size:
+        # the resource itself is gone when the files are deleted along with it
+        resource = instance.resource
+        if resource is not None:
+            update_quota_usage(resource, -instance.file_size)
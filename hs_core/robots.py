@@ -4,8 +4,95 @@ Note: robot_detection needs to be updated periodically (possible inside the Dock
 (wget http://www.robotstxt.org/db/all.txt, python robot_detection.py all.txt)
 """
 
+import re
+import threading
+from collections import OrderedDict
+
 import robot_detection
 
+# number of recently seen user agents whose classification is kept
+ROBOT_CACHE_SIZE = 10000
+
+# a robot_detection pattern without regex syntax other than escaped characters
+_LITERAL_PATTERN = re.compile(r'^(?:[^\\.^$*+?{}\[\]|()]|\\[^a-zA-Z0-9])+$')
+
+
+def _build_trie_regex(words):
+    """Return a regex matching any of *words*, with the words merged into a prefix tree so the
+    regex engine checks the characters shared by several words once"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        alternatives = [re.escape(char) + build(child)
+                        for char, child in sorted(node.items()) if char != '']
+        if not alternatives:
+            return ''
+        regex = alternatives[0] if len(alternatives) == 1 \
+            else '(?:{})'.format('|'.join(alternatives))
+        return '(?:{})?'.format(regex) if '' in node else regex
+
+    return build(trie)
+
+
+class RobotDetector(object):
+    """Classify user agents with the robot_detection patterns.
+
+    The patterns are compiled into one regex at startup: the (many) literal patterns into a
+    prefix tree regex, the remaining ones into an alternation. The classifications of the
+    ROBOT_CACHE_SIZE most recently seen user agents are kept in an LRU cache.
+    """
+
+    def __init__(self, patterns=None, cache_size=ROBOT_CACHE_SIZE):
+        if patterns is None:
+            patterns = [p.pattern for p in robot_detection.robot_useragents]
+        literals = [re.sub(r'\\(.)', r'\1', p) for p in patterns if _LITERAL_PATTERN.match(p)]
+        others = ['(?:{})'.format(p) for p in patterns if not _LITERAL_PATTERN.match(p)]
+        self.matcher = re.compile('|'.join([_build_trie_regex(literals)] + others))
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_robot(self, user_agent):
+        """Return True if *user_agent* is missing or the user agent of a robot."""
+        if not user_agent:
+            return True
+
+        with self._lock:
+            if user_agent in self._cache:
+                # move the user agent to the end (most recently used)
+                result = self._cache.pop(user_agent)
+                self._cache[user_agent] = result
+                return result
+
+        try:
+            result = self.matcher.search(user_agent.lower()) is not None
+        except UnicodeDecodeError:
+            # user_agent might have malformed bytes, so try looking at boring ascii
+            result = self.matcher.search(
+                user_agent.lower().decode('ascii', 'ignore')) is not None
+
+        with self._lock:
+            self._cache[user_agent] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+robot_detector = RobotDetector()
+
+
+def is_human(request):
+    """Return whether the request was made by a human, classifying it once per request."""
+    if not hasattr(request, 'is_human'):
+        user_agent = request.META.get('HTTP_USER_AGENT', None)
+        request.is_human = not robot_detector.is_robot(user_agent)
+    return request.is_human
+
 
 class RobotFilter:
     """Process request and apply is_human field if a robot is detected."""
@@ -16,7 +103,4 @@ class RobotFilter:
         This is used to filter non-human activity from the usage logs
         """
         user_agent = request.META.get('HTTP_USER_AGENT', None)
-        request.is_human = True
-
-        if user_agent is None or robot_detection.is_robot(user_agent):
-            request.is_human = False
+        request.is_human = not robot_detector.is_robot(user_agent)
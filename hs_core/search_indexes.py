@@ -8,7 +8,6 @@ from ref_ts.models import RefTSMetadata
 from hs_app_timeseries.models import TimeSeriesMetaData
 from django.db.models import Q
 from datetime import datetime
-from nameparser import HumanName
 
 
 class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
@@ -38,6 +37,7 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     rating = indexes.IntegerField(model_attr='rating_sum')
     coverages = indexes.MultiValueField()
     coverage_types = indexes.MultiValueField()
+    coverage_geometry_type = indexes.CharField(null=True)
     coverage_east = indexes.FloatField()
     coverage_north = indexes.FloatField()
     coverage_northlimit = indexes.FloatField()
@@ -110,7 +110,7 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     def prepare_author(self, obj):
         """Return metadata author if exists, otherwise return none."""
         if hasattr(obj, 'metadata'):
-            first_creator = obj.metadata.creators.filter(order=1).first()
+            first_creator = obj.first_creator
             if first_creator.name is not None:
                 return first_creator.name.lstrip()
             else:
@@ -121,19 +121,8 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     def prepare_author_normalized(self, obj):
         """Return metadata author if exists, otherwise return none."""
         if hasattr(obj, 'metadata'):
-            first_creator = obj.metadata.creators.filter(order=1).first()
-            if first_creator.name is not None:
-                nameparts = HumanName(first_creator.name.lstrip())
-                normalized = nameparts.last
-                if nameparts.suffix:
-                    normalized = normalized + ' ' + nameparts.suffix
-                normalized = normalized + ','
-                if nameparts.title:
-                    normalized = normalized + ' ' + nameparts.title
-                if nameparts.first:
-                    normalized = normalized + ' ' + nameparts.first
-                if nameparts.middle:
-                    normalized = ' ' + normalized + ' ' + nameparts.middle
+            normalized = obj.first_creator_normalized_name
+            if normalized is not None:
                 return normalized
             else:
                 return 'none'
@@ -144,7 +133,7 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     def prepare_author_description(self, obj):
         """Return metadata author description if exists, otherwise return none."""
         if hasattr(obj, 'metadata'):
-            first_creator = obj.metadata.creators.filter(order=1).first()
+            first_creator = obj.first_creator
             if first_creator.description is not None:
                 return first_creator.description
             else:
@@ -261,6 +250,18 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         else:
             return []
 
+    def prepare_coverage_geometry_type(self, obj):
+        """Return type ('point' or 'box') of the spatial coverage used for the map view.
+
+        The coordinates of that coverage are in the coverage_east/coverage_north fields for a
+        point and in the coverage_*limit fields for a box.
+        """
+        if hasattr(obj, 'metadata'):
+            for coverage in obj.metadata.coverages.all():
+                if coverage.type in ('point', 'box'):
+                    return coverage.type
+        return None
+
     def prepare_coverage_east(self, obj):
         """Return resource coverage east bound if exists, otherwise return none."""
         if hasattr(obj, 'metadata'):
@@ -37,6 +37,13 @@ from django_irods.icommands import SessionException
 logger = logging.getLogger('django')
 
 
+@periodic_task(ignore_result=True, run_every=crontab(minute=30, hour=2))
+def reconcile_quota_usage():
+    """Correct any drift of the incrementally updated used quota values of all users."""
+    changed = utils.reconcile_quota_usage()
+    logger.info("Reconciled the used quota values: {} changed".format(changed))
+
+
 @periodic_task(ignore_result=True, run_every=crontab(minute=0, hour=0))
 def check_doi_activation():
     """Check DOI activation on failed and pending resources and send email."""
@@ -5,9 +5,10 @@ from django.contrib.auth.models import User, Group
 
 from hs_core.hydroshare.resource import add_resource_files, create_resource
 from hs_core.hydroshare.users import create_account
-from hs_core.models import GenericResource
+from hs_core.models import GenericResource, ResourceFile
 from hs_core.testing import MockIRODSTestCaseMixin
-from hs_core.hydroshare.utils import QuotaException
+from hs_core.hydroshare.utils import QuotaException, convert_file_size_to_unit, \
+    reconcile_quota_usage, replace_resource_file_on_irods
 
 
 class TestAddResourceFiles(MockIRODSTestCaseMixin, unittest.TestCase):
@@ -84,6 +85,67 @@ class TestAddResourceFiles(MockIRODSTestCaseMixin, unittest.TestCase):
         self.assertTrue(self.n3 in file_list, "file 3 has not been added")
         res.delete()
 
+    def test_add_files_quota_usage(self):
+        # create a resource
+        res = create_resource(resource_type='GenericResource',
+                              owner=self.user,
+                              title='Test Resource',
+                              metadata=[],)
+
+        # the used quota of the quota holder is updated as files are added and deleted
+        add_resource_files(res.short_id, self.myfile1, self.myfile2, self.myfile3)
+        size = sum(os.path.getsize(n) for n in (self.n1, self.n2, self.n3))
+        uquota = self.user.quotas.first()
+        self.assertAlmostEqual(uquota.used_value, convert_file_size_to_unit(size, uquota.unit))
+
+        res.files.get(resource_file__endswith=self.n1).delete()
+        size -= os.path.getsize(self.n1)
+        uquota = self.user.quotas.first()
+        self.assertAlmostEqual(uquota.used_value, convert_file_size_to_unit(size, uquota.unit))
+
+        # reconciliation computes the same used value from the file sizes in the database
+        uquota.used_value = 0
+        uquota.save()
+        reconcile_quota_usage()
+        uquota = self.user.quotas.first()
+        self.assertAlmostEqual(uquota.used_value, convert_file_size_to_unit(size, uquota.unit))
+
+        res.delete()
+
+    def test_replace_file_quota_usage(self):
+        # create a resource
+        res = create_resource(resource_type='GenericResource',
+                              owner=self.user,
+                              title='Test Resource',
+                              metadata=[],)
+        add_resource_files(res.short_id, self.myfile1)
+        res_file = res.files.first()
+
+        new_file_name = 'test1_replacement.txt'
+        with open(new_file_name, 'w') as new_file:
+            new_file.write("A much longer replacement of the text file in test1.txt")
+        try:
+            # replacing the content of a file updates its size and the used quota
+            replace_resource_file_on_irods(new_file_name, res_file, self.user)
+            new_size = os.path.getsize(new_file_name)
+            self.assertEqual(res.files.get(id=res_file.id).file_size, new_size)
+            uquota = self.user.quotas.first()
+            self.assertAlmostEqual(uquota.used_value,
+                                   convert_file_size_to_unit(new_size, uquota.unit))
+
+            # the size of a file created before the sizes were kept in the database is
+            # read from iRODS before the file is replaced
+            ResourceFile.objects.filter(id=res_file.id).update(file_size=None)
+            res_file = res.files.get(id=res_file.id)
+            replace_resource_file_on_irods(self.n1, res_file, self.user)
+            uquota = self.user.quotas.first()
+            self.assertAlmostEqual(uquota.used_value,
+                                   convert_file_size_to_unit(os.path.getsize(self.n1),
+                                                             uquota.unit))
+        finally:
+            os.remove(new_file_name)
+        res.delete()
+
     def test_add_files_over_quota(self):
         # create a resource
         res = create_resource(resource_type='GenericResource',
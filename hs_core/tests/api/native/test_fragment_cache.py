@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from django.contrib.auth.models import Group, User
+
+from hs_core import hydroshare
+from hs_core.hydroshare import resource
+from hs_core.models import GenericResource
+from hs_core.testing import MockIRODSTestCaseMixin
+from hs_core.fragment_cache import get_fragment_key, get_or_build_fragment, \
+    VIEWER_ANONYMOUS, VIEWER_AUTHENTICATED
+
+
+class TestFragmentCache(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestFragmentCache, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = hydroshare.create_account(
+            'user1@nowhere.com',
+            username='user1',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+
+        self.res = hydroshare.create_resource(
+            resource_type='GenericResource',
+            owner=self.user,
+            title='Generic resource',
+            keywords=['kw1', 'kw2']
+        )
+
+    def tearDown(self):
+        super(TestFragmentCache, self).tearDown()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        GenericResource.objects.all().delete()
+
+    def test_fragment_built_once(self):
+        calls = []
+
+        def builder():
+            calls.append(1)
+            return {'title': self.res.metadata.title.value}
+
+        fragment = get_or_build_fragment(self.res, 'test', VIEWER_ANONYMOUS, builder)
+        self.assertEqual(fragment['title'], 'Generic resource')
+        fragment = get_or_build_fragment(self.res, 'test', VIEWER_ANONYMOUS, builder)
+        self.assertEqual(fragment['title'], 'Generic resource')
+        self.assertEqual(len(calls), 1)
+
+        # a different viewer class gets its own fragment
+        get_or_build_fragment(self.res, 'test', VIEWER_AUTHENTICATED, builder)
+        self.assertEqual(len(calls), 2)
+
+    def test_metadata_change_invalidates(self):
+        key_before = get_fragment_key(self.res, 'test', VIEWER_ANONYMOUS)
+        self.assertEqual(key_before, get_fragment_key(self.res, 'test', VIEWER_ANONYMOUS))
+
+        resource.create_metadata_element(self.res.short_id, 'creator', name='John Smith')
+        key_after = get_fragment_key(self.res, 'test', VIEWER_ANONYMOUS)
+        self.assertNotEqual(key_before, key_after)
+
+    def test_access_flag_change_invalidates(self):
+        key_before = get_fragment_key(self.res, 'test', VIEWER_ANONYMOUS)
+        self.res.raccess.discoverable = True
+        self.res.raccess.save()
+        key_after = get_fragment_key(self.res, 'test', VIEWER_ANONYMOUS)
+        self.assertNotEqual(key_before, key_after)
@@ -3,6 +3,8 @@ from datetime import date
 
 from hs_core.hydroshare import resource
 from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from hs_core.models import GenericResource, Creator
 from hs_core import hydroshare
 from hs_core.testing import MockIRODSTestCaseMixin
@@ -129,3 +131,29 @@ class TestGetCitation(MockIRODSTestCaseMixin, TestCase):
         name = "Smith Tanner, John Morley"
         parsed_name = self.res.parse_citation_name(name)
         self.assertEqual(parsed_name, 'J. M. Smith Tanner, ')
+
+    def test_citation_refreshed_on_creator_update(self):
+        # populate the cached citation
+        self.res.get_citation()
+        first_creator = self.res.metadata.creators.filter(order=1).first()
+        resource.update_metadata_element(self.res.short_id, 'creator', first_creator.id,
+                                         name='Jane Doe')
+
+        citation = self.res.get_citation()
+        hs_identifier = self.res.metadata.identifiers.all().filter(name="hydroShareIdentifier")[0]
+        hs_url = hs_identifier.url
+        hs_date = str(date.today().year)
+        correct_citation = 'Doe, J. ({}). Generic resource, HydroShare, {}'.format(hs_date, hs_url)
+        self.assertEqual(citation, correct_citation)
+        self.assertEqual(self.res.first_creator.name, 'Jane Doe')
+        self.assertEqual(self.res.first_creator_normalized_name, 'Doe, Jane')
+
+    def test_first_creator_cached(self):
+        self.assertEqual(self.res.first_creator.name, 'Creator_FirstName Creator_LastName')
+
+        # another instance of the resource reads the cached name and description without a query
+        res = GenericResource.objects.get(id=self.res.id)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(res.first_creator.name, 'Creator_FirstName Creator_LastName')
+            self.assertEqual(res.first_creator.description, '/user/{}/'.format(self.user.pk))
+        self.assertEqual(len(queries), 0)
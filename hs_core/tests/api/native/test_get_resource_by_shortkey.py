@@ -33,3 +33,24 @@ class TestGetResourceByShortkeyAPI(MockIRODSTestCaseMixin, TestCase):
             resource,
             hydroshare.get_resource_by_shortkey(resource.short_id)
         )
+
+    def test_get_resource_by_shortkey_single_query(self):
+        user = hydroshare.create_account(
+            'creator@usu.edu',
+            username='creator',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+        resource = hydroshare.create_resource(
+            'GenericResource',
+            user,
+            'My Test Resource'
+        )
+
+        # the typed resource is built from the BaseResource row without a second query
+        with self.assertNumQueries(1):
+            res = hydroshare.get_resource_by_shortkey(resource.short_id)
+        self.assertEqual(res.__class__.__name__, 'GenericResource')
+        self.assertEqual(res.short_id, resource.short_id)
@@ -1,6 +1,6 @@
 
 from unittest import TestCase
-from hs_core.robots import RobotFilter
+from hs_core.robots import RobotFilter, RobotDetector, is_human as request_is_human
 
 
 class MockRequest(object):
@@ -44,3 +44,20 @@ class TestRobots(TestCase):
             request.META['HTTP_USER_AGENT'] = agent
             self.robot.process_request(request)
             self.assertTrue(request.is_human == is_human)
+
+    def test_robot_detector_cache(self):
+        detector = RobotDetector(cache_size=2)
+        for agent, is_human in self.agents:
+            self.assertEqual(detector.is_robot(agent), not is_human)
+        # only the most recently seen user agents are kept
+        self.assertEqual(list(detector._cache.keys()), [self.agents[-2][0], self.agents[-1][0]])
+        self.assertTrue(detector.is_robot(None))
+        self.assertTrue(detector.is_robot(''))
+
+    def test_is_human_once_per_request(self):
+        request = MockRequest()
+        request.META['HTTP_USER_AGENT'] = self.agents[0][0]
+        self.assertFalse(request_is_human(request))
+        # the classification stored on the request is reused
+        request.META['HTTP_USER_AGENT'] = self.agents[-1][0]
+        self.assertFalse(request_is_human(request))
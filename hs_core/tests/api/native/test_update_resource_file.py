@@ -5,7 +5,8 @@ from django.contrib.auth.models import User, Group
 from django.core.exceptions import ObjectDoesNotExist
 
 from hs_core import hydroshare
-from hs_core.models import GenericResource
+from hs_core.hydroshare.utils import convert_file_size_to_unit
+from hs_core.models import GenericResource, ResourceFile
 from hs_core.testing import MockIRODSTestCaseMixin
 
 
@@ -109,3 +110,40 @@ class TestUpdateResourceFileAPI(MockIRODSTestCaseMixin, unittest.TestCase):
         with self.assertRaises(ObjectDoesNotExist):
             hydroshare.update_resource_file(new_res.short_id, 'file_not_in_resource.txt', new_file)
 
+
+    def test_update_resource_file_quota_usage(self):
+        self.user_creator = hydroshare.create_account(
+            'creator@usu.edu',
+            username='creator',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+        new_res = hydroshare.create_resource(
+            'GenericResource',
+            self.user_creator,
+            'My Test Resource'
+            )
+
+        original_file_name = 'original.txt'
+        self.original_file = open(original_file_name, 'w')
+        self.original_file.write("original text")
+        self.original_file.close()
+        hydroshare.add_resource_files(new_res.short_id, open(original_file_name, 'r'))
+
+        # a file created before the file sizes were kept in the database
+        ResourceFile.objects.filter(object_id=new_res.id).update(file_size=None)
+
+        new_file_name = 'update.txt'
+        self.new_file = open(new_file_name, 'w')
+        self.new_file.write('data in new file')
+        self.new_file.close()
+        rf = hydroshare.update_resource_file(new_res.short_id, original_file_name,
+                                             open(new_file_name, 'r'))
+
+        # the size of the replaced file is read from iRODS, so only the new file is counted
+        new_size = os.path.getsize(new_file_name)
+        self.assertEqual(rf.file_size, new_size)
+        uquota = self.user_creator.quotas.first()
+        self.assertAlmostEqual(uquota.used_value, convert_file_size_to_unit(new_size, uquota.unit))
@@ -0,0 +1,108 @@
+import json
+
+from django.contrib.auth.models import Group
+from mock import patch, MagicMock
+
+from hs_core import hydroshare
+from hs_core.hydroshare import resource
+from hs_core.search_indexes import BaseResourceIndex
+from hs_core.testing import MockIRODSTestCaseMixin, ViewTestCase
+from hs_core.views.discovery_json_view import DiscoveryJsonView
+
+
+def _search_result(short_id, geometry_type=None, **coverage):
+    result = {'short_id': short_id, 'title': 'Resource ' + short_id,
+              'resource_type': 'GenericResource', 'absolute_url': '/resource/' + short_id + '/',
+              'author': 'John Smith', 'author_description': '/user/1/',
+              'coverage_geometry_type': geometry_type, 'coverage_east': None,
+              'coverage_north': None, 'coverage_northlimit': None, 'coverage_eastlimit': None,
+              'coverage_southlimit': None, 'coverage_westlimit': None}
+    result.update(('coverage_' + name, value) for name, value in coverage.items())
+    return result
+
+
+SEARCH_RESULTS = [
+    _search_result('point', 'point', east=-111.5, north=41.5),
+    _search_result('box', 'box', northlimit=42.0, eastlimit=-110.0, southlimit=40.0,
+                   westlimit=-112.0),
+    _search_result('nocoverage'),
+]
+
+
+@patch('hs_core.views.discovery_json_view.DiscoveryForm.search', MagicMock())
+@patch('hs_core.views.discovery_json_view._iter_search_results',
+       lambda sqs, fields: iter(SEARCH_RESULTS))
+class TestDiscoveryJsonView(ViewTestCase):
+
+    def get_response(self, **params):
+        request = self.factory.get('/searchjson/', params)
+        return DiscoveryJsonView.as_view()(request)
+
+    def test_no_query(self):
+        response = self.get_response()
+        self.assertEqual(response.status_code, 200)
+        # a plain (not double encoded) empty JSON array
+        self.assertEqual(json.loads(response.content), [])
+
+    def test_map_objects(self):
+        response = self.get_response(q='water')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        map_objects = json.loads(''.join(response.streaming_content))
+
+        self.assertEqual([obj['short_id'] for obj in map_objects],
+                         ['point', 'box', 'nocoverage'])
+        point, box, no_coverage = map_objects
+        self.assertEqual((point['coverage_type'], point['east'], point['north']),
+                         ('point', -111.5, 41.5))
+        self.assertEqual(point['get_absolute_url'], '/resource/point/')
+        self.assertEqual(point['first_author'], 'John Smith')
+        self.assertEqual(point['first_author_description'], '/user/1/')
+        self.assertEqual((box['coverage_type'], box['northlimit'], box['eastlimit'],
+                          box['southlimit'], box['westlimit']), ('box', 42.0, -110.0, 40.0, -112.0))
+        self.assertNotIn('coverage_type', no_coverage)
+
+    def test_clusters(self):
+        # at zoom level 0 the point and the center of the box fall into the same grid cell
+        map_objects = json.loads(self.get_response(q='water', zoom='0').content)
+        self.assertEqual(map_objects, [{'coverage_type': 'cluster', 'count': 2,
+                                        'east': -111.25, 'north': 41.25}])
+
+        # at zoom level 10 they are apart; the resource without coverage is left out
+        map_objects = json.loads(self.get_response(q='water', zoom='10').content)
+        self.assertEqual(sorted(obj['short_id'] for obj in map_objects), ['box', 'point'])
+
+    def test_invalid_zoom(self):
+        response = self.get_response(q='water', zoom='far')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestCoverageGeometryType(MockIRODSTestCaseMixin, ViewTestCase):
+
+    def setUp(self):
+        super(TestCoverageGeometryType, self).setUp()
+        Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = hydroshare.create_account(
+            'user1@nowhere.com',
+            username='user1',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+        self.res = hydroshare.create_resource(
+            resource_type='GenericResource',
+            owner=self.user,
+            title='Generic resource'
+        )
+
+    def test_coverage_geometry_type(self):
+        index = BaseResourceIndex()
+        self.assertIsNone(index.prepare_coverage_geometry_type(self.res))
+
+        resource.create_metadata_element(self.res.short_id, 'coverage', type='point',
+                                         value={'name': 'Logan', 'east': -111.5, 'north': 41.5,
+                                                'units': 'Decimal degrees'})
+        self.assertEqual(index.prepare_coverage_geometry_type(self.res), 'point')
+        self.assertEqual(index.prepare_coverage_east(self.res), -111.5)
+        self.assertEqual(index.prepare_coverage_north(self.res), 41.5)
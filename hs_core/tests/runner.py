@@ -3,8 +3,21 @@ from django_nose.runner import NoseTestSuiteRunner
 
 from celery import current_app
 
+from django.test.utils import override_settings
+
 from hydroshare import settings
 
+# settings overridden for the whole test run: a private in-memory cache, so that nothing cached
+# leaks from another process or between test databases, and tracking variables saved right away
+TEST_SETTINGS = {
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    },
+    'TRACKING_BUFFER_SIZE': 1,
+}
+
 
 def _set_eager():
     """
@@ -37,6 +50,12 @@ class CustomTestSuiteRunner(NoseTestSuiteRunner):
         """
         _set_eager()
         super(CustomTestSuiteRunner, self).setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**TEST_SETTINGS)
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super(CustomTestSuiteRunner, self).teardown_test_environment(**kwargs)
 
     def run_tests(self, test_labels, extra_tests=None, **kwargs):
         if not test_labels:
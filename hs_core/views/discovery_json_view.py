@@ -1,8 +1,21 @@
 import json
-from django.http import HttpResponse
+import math
+from django.http import HttpResponse, StreamingHttpResponse
 from haystack.generic_views import FacetedSearchView
 from hs_core.discovery_form import DiscoveryForm
 
+# stored index fields needed to place a search result on the map
+MAP_FIELDS = ('short_id', 'title', 'resource_type', 'absolute_url', 'author',
+              'author_description', 'coverage_geometry_type', 'coverage_east', 'coverage_north',
+              'coverage_northlimit', 'coverage_eastlimit', 'coverage_southlimit',
+              'coverage_westlimit')
+
+# number of search results fetched from the search index in one request
+MAP_PAGE_SIZE = 1000
+
+# number of clustering grid cells along the width of a 256 pixel map tile
+CLUSTER_CELLS_PER_TILE = 4
+
 
 # View class for generating JSON data format from Haystack
 # returned JSON objects array is used for building the map view
@@ -17,60 +30,108 @@ class DiscoveryJsonView(FacetedSearchView):
     # overwrite Haystack generic_view.py form_valid() function to generate JSON response
     def form_valid(self, form):
 
-        # initialize an empty array for holding the result objects with coordinate values
-        coor_values = []
         # get query set
         self.queryset = form.search()
 
         # When we have a GET request with search query, build our JSON objects array
         if len(self.request.GET):
+            map_objects = (_get_map_object(result) for result in
+                           _iter_search_results(self.get_queryset(), MAP_FIELDS))
+
+            zoom = self.request.GET.get('zoom', None)
+            if zoom is not None:
+                try:
+                    zoom = int(zoom)
+                except ValueError:
+                    return HttpResponse(json.dumps({'error': 'zoom must be an integer'}),
+                                        content_type='application/json', status=400)
+                return HttpResponse(json.dumps(_cluster_map_objects(map_objects, zoom)),
+                                    content_type='application/json')
+
+            # stream the encoded JSON array as the results are fetched from the index
+            return StreamingHttpResponse(_json_array_chunks(map_objects),
+                                         content_type='application/json')
+        else:
+            return HttpResponse('[]', content_type='application/json')
+
+
+def _iter_search_results(sqs, fields):
+    """Yield the stored *fields* of every search result as a dict.
+
+    Results are fetched MAP_PAGE_SIZE at a time and only the requested fields are retrieved.
+    Each page is fetched with a fresh clone of the queryset so that the results already
+    yielded are not kept in memory by the queryset's result cache.
+    """
+    total = sqs.count()
+    for start in range(0, total, MAP_PAGE_SIZE):
+        for result in sqs.values(*fields)[start:start + MAP_PAGE_SIZE]:
+            yield result
+
+
+def _get_map_object(result):
+    """Return the map view representation of a search result (a dict of stored fields)"""
+    map_obj = {'short_id': result['short_id'],
+               'title': result['title'],
+               'resource_type': result['resource_type'],
+               'get_absolute_url': result['absolute_url'],
+               'first_author': result['author']}
+    # TODO: this is redundant. The value always exists but oft has value 'none'.
+    if result.get('author_description'):
+        map_obj['first_author_description'] = result['author_description']
+
+    geometry_type = result.get('coverage_geometry_type')
+    if geometry_type == 'point':
+        map_obj['coverage_type'] = 'point'
+        map_obj['east'] = result['coverage_east']
+        map_obj['north'] = result['coverage_north']
+    elif geometry_type == 'box':
+        map_obj['coverage_type'] = 'box'
+        map_obj['northlimit'] = result['coverage_northlimit']
+        map_obj['eastlimit'] = result['coverage_eastlimit']
+        map_obj['southlimit'] = result['coverage_southlimit']
+        map_obj['westlimit'] = result['coverage_westlimit']
+    return map_obj
+
+
+def _json_array_chunks(objects):
+    yield '['
+    for index, obj in enumerate(objects):
+        yield (',' if index else '') + json.dumps(obj)
+    yield ']'
+
+
+def _cluster_map_objects(map_objects, zoom):
+    """Group map objects whose location fall into the same grid cell at the given zoom level.
+
+    A box is located at its center. A cell holding a single object returns the object itself;
+    a cell holding more objects returns an object of coverage_type 'cluster' located at the
+    mean location of its members, with the number of members in 'count'. Objects without a
+    spatial coverage are left out since they can't be shown on the map.
+    """
+    cell_size = 360.0 / (2 ** max(zoom, 0)) / CLUSTER_CELLS_PER_TILE
+    cells = {}
+    for map_obj in map_objects:
+        if map_obj.get('coverage_type') == 'point':
+            east, north = map_obj['east'], map_obj['north']
+        elif map_obj.get('coverage_type') == 'box':
+            east = (map_obj['eastlimit'] + map_obj['westlimit']) / 2
+            north = (map_obj['northlimit'] + map_obj['southlimit']) / 2
+        else:
+            continue
+        cell_key = (int(math.floor(east / cell_size)), int(math.floor(north / cell_size)))
+        cell = cells.setdefault(cell_key, {'count': 0, 'east': 0.0, 'north': 0.0, 'obj': None})
+        cell['count'] += 1
+        cell['east'] += east
+        cell['north'] += north
+        cell['obj'] = map_obj
 
-            # iterate all the search results
-            for result in self.get_queryset():
-                # initialize a null JSON object
-                json_obj = {}
-
-                # fetch as much information as possible from stored fields
-                solr = result.get_stored_fields()
-
-                # assign title and url values to the object
-                json_obj['short_id'] = solr['short_id']
-                json_obj['title'] = solr['title']
-                json_obj['resource_type'] = solr['resource_type']
-
-                json_obj['get_absolute_url'] = solr['absolute_url']
-                json_obj['first_author'] = solr['author']
-                # TODO: this is redundant. The value always exists but oft has value 'none'.
-                if solr['author_description']:
-                    json_obj['first_author_description'] = solr['author_description']
-
-                # iterate over all the coverage values
-                if solr['coverages'] is not None:
-                    for coverage in solr['coverages']:
-                        json_coverage = json.loads(coverage)
-                        if 'east' in json_coverage:
-                            json_obj['coverage_type'] = 'point'
-                            json_obj['east'] = json_coverage['east']
-                            json_obj['north'] = json_coverage['north']
-                        elif 'northlimit' in json_coverage:
-                            json_obj['coverage_type'] = 'box'
-                            json_obj['northlimit'] = json_coverage['northlimit']
-                            json_obj['eastlimit'] = json_coverage['eastlimit']
-                            json_obj['southlimit'] = json_coverage['southlimit']
-                            json_obj['westlimit'] = json_coverage['westlimit']
-                        # else, skip
-                        else:
-                            continue
-
-                # encode object to JSON string format
-                coor_obj = json.dumps(json_obj)
-                # add JSON object the results array
-                coor_values.append(coor_obj)
-
-            # encode the results results array to JSON array
-            the_data = json.dumps(coor_values)
-            # return JSON response
-
-            return HttpResponse(the_data, content_type='application/json')
+    clustered = []
+    for cell in cells.values():
+        if cell['count'] == 1:
+            clustered.append(cell['obj'])
         else:
-            return HttpResponse(json.dumps('[]'), content_type='application/json')
+            clustered.append({'coverage_type': 'cluster',
+                              'count': cell['count'],
+                              'east': cell['east'] / cell['count'],
+                              'north': cell['north'] / cell['count']})
+    return clustered
@@ -1,6 +1,7 @@
 import os
 import logging
 import shutil
+import threading
 import zipfile
 import xmltodict
 
@@ -28,6 +29,10 @@ from base import AbstractFileMetaData, AbstractLogicalFile
 
 UNKNOWN_STR = "unknown"
 
+# max number of cached transformations (per thread) of a source spatial reference to WGS84
+WGS84_TRANSFORMATION_CACHE_SIZE = 100
+_wgs84_transformations = threading.local()
+
 
 class GeoFeatureFileMetaData(GeographicFeatureMetaDataMixin, AbstractFileMetaData):
     # the metadata element models are from the geographic feature resource type app
@@ -330,8 +335,17 @@ def extract_metadata_and_files(resource, res_file, file_type=True):
     :return: a dict of extracted metadata, a list file paths of shape related files on the
     temp directory, a list of resource files retrieved from iRODS for this processing
     """
-    shape_files, shp_res_files = get_all_related_shp_files(resource, res_file, file_type=file_type)
-    temp_dir = os.path.dirname(shape_files[0])
+    if res_file.extension.lower() == '.zip':
+        # the shape files are read from the zip file (through GDAL /vsizip/) and extracted only
+        # after they have been validated and the metadata has been extracted
+        zip_file, shape_files = get_zipped_shp_files(res_file)
+        shp_res_files = [res_file]
+        temp_dir = os.path.dirname(zip_file)
+    else:
+        zip_file = None
+        shape_files, shp_res_files = get_all_related_shp_files(resource, res_file,
+                                                               file_type=file_type)
+        temp_dir = os.path.dirname(shape_files[0])
     if not _check_if_shape_files(shape_files):
         if res_file.extension.lower() == '.shp':
             err_msg = "One or more dependent shape files are missing at location: " \
@@ -351,6 +365,8 @@ def extract_metadata_and_files(resource, res_file, file_type=True):
             break
     try:
         meta_dict = extract_metadata(shp_file_full_path=shp_file)
+        if zip_file is not None:
+            shape_files = _extract_zipped_shp_files(zip_file, shape_files)
         return meta_dict, shape_files, shp_res_files
     except Exception as ex:
         # remove temp dir
@@ -433,10 +449,10 @@ def get_all_related_shp_files(resource, selected_resource_file, file_type):
     """
     This helper function copies all the related shape files to a temp directory
     and return a list of those temp file paths as well as a list of existing related
-    resource file objects
+    resource file objects (see get_zipped_shp_files() for a zip file)
     :param resource: an instance of BaseResource to which the *selecetd_resource_file* belongs
     :param selected_resource_file: an instance of ResourceFile selected by the user to set
-    GeoFeaureFile type (the file must be a .shp or a .zip file)
+    GeoFeaureFile type (the file must be a .shp file)
     :param file_type: a flag (True/False) to control resource VS file type actions
     :return: a list of temp file paths for all related shape files, and a list of corresponding
      resource file objects
@@ -466,38 +482,66 @@ def get_all_related_shp_files(resource, selected_resource_file, file_type):
                         collect_shape_resource_files(f)
 
         for f in shape_res_files:
-            temp_file = utils.get_file_from_irods(f)
             if not temp_dir:
+                temp_file = utils.get_file_from_irods(f)
                 temp_dir = os.path.dirname(temp_file)
             else:
-                file_temp_dir = os.path.dirname(temp_file)
-                dst_dir = os.path.join(temp_dir, os.path.basename(temp_file))
-                shutil.copy(temp_file, dst_dir)
-                shutil.rmtree(file_temp_dir)
-                temp_file = dst_dir
+                # copy the other files straight into the temp dir of the first file
+                temp_file = os.path.join(temp_dir, os.path.basename(f.storage_path))
+                resource.get_irods_storage().getFile(f.storage_path, temp_file)
             shape_temp_files.append(temp_file)
 
-    elif selected_resource_file.extension.lower() == '.zip':
-        temp_file = utils.get_file_from_irods(selected_resource_file)
-        temp_dir = os.path.dirname(temp_file)
-        if not zipfile.is_zipfile(temp_file):
-            if os.path.isdir(temp_dir):
-                shutil.rmtree(temp_dir)
-            raise ValidationError('Selected file is not a zip file')
-        zf = zipfile.ZipFile(temp_file, 'r')
-        zf.extractall(temp_dir)
-        zf.close()
-        for dirpath, _, filenames in os.walk(temp_dir):
-            for name in filenames:
-                if name == selected_resource_file.file_name:
-                    # skip the user selected zip file
-                    continue
-                file_path = os.path.abspath(os.path.join(dirpath, name))
-                shape_temp_files.append(file_path)
+    return shape_temp_files, shape_res_files
 
-        shape_res_files.append(selected_resource_file)
 
-    return shape_temp_files, shape_res_files
+def get_zipped_shp_files(selected_resource_file):
+    """
+    This helper function copies the zip file selected by the user to a temp directory and
+    returns the GDAL /vsizip/ paths of the files in the zip file, so that the shape files
+    can be validated and read without extracting them
+    :param selected_resource_file: an instance of ResourceFile selected by the user to set
+    GeoFeaureFile type (the file must be a .zip file)
+    :return: the temp file path of the zip file and a list of /vsizip/ paths of the files in
+    the zip file
+    """
+    temp_file = utils.get_file_from_irods(selected_resource_file)
+    temp_dir = os.path.dirname(temp_file)
+    if not zipfile.is_zipfile(temp_file):
+        if os.path.isdir(temp_dir):
+            shutil.rmtree(temp_dir)
+        raise ValidationError('Selected file is not a zip file')
+
+    with zipfile.ZipFile(temp_file, 'r') as zf:
+        shape_files = [_get_vsizip_path(temp_file, member_name) for member_name in zf.namelist()
+                       if not member_name.endswith('/')]
+    return temp_file, shape_files
+
+
+def _get_vsizip_path(zip_file, member_name):
+    return '/vsizip/{}/{}'.format(os.path.abspath(zip_file), member_name)
+
+
+def _extract_zipped_shp_files(zip_file, shape_files):
+    """
+    Extracts the files in the zip file listed in *shape_files* (/vsizip/ paths) to the folder
+    of the zip file. The files are saved in one folder by their base names, so a file must not
+    have the name of the zip file or of another file in the list.
+    :return: list of the extracted file paths
+    """
+    temp_dir = os.path.dirname(zip_file)
+    vsizip_prefix = _get_vsizip_path(zip_file, '')
+    extracted_files = []
+    with zipfile.ZipFile(zip_file, 'r') as zf:
+        for shape_file in shape_files:
+            member_name = shape_file[len(vsizip_prefix):]
+            file_path = os.path.join(temp_dir, os.path.basename(member_name))
+            if file_path == zip_file or file_path in extracted_files:
+                raise ValidationError("The zip file has more than one file named {}."
+                                      .format(os.path.basename(member_name)))
+            with zf.open(member_name) as source, open(file_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            extracted_files.append(file_path)
+    return extracted_files
 
 
 def _check_if_shape_files(files):
@@ -702,11 +746,14 @@ def parse_shp(shp_file_path):
         fieldPrecision = layerDefinition.GetFieldDefn(i).GetPrecision()
         attr_dict["fieldPrecision"] = fieldPrecision
 
-    # get layer extent
-    layer_extent = layer.GetExtent()
+    # get layer extent - the shapefile driver reads it from the .shp file header
+    layer_extent = layer.GetExtent(force=0)
 
-    # get feature count
-    featureCount = layer.GetFeatureCount()
+    # get feature count - from the file header, unless it can only be had by counting the
+    # features
+    featureCount = layer.GetFeatureCount(force=0)
+    if featureCount < 0:
+        featureCount = layer.GetFeatureCount()
     shp_metadata_dict["feature_count"] = featureCount
 
     # get a feature from layer
@@ -721,9 +768,6 @@ def parse_shp(shp_file_path):
     # reproject layer extent
     # source SpatialReference
     source = spatialRef_from_layer
-    # target SpatialReference
-    target = osr.SpatialReference()
-    target.ImportFromEPSG(4326)
 
     # create two key points from layer extent
     left_upper_point = ogr.Geometry(ogr.wkbPoint)
@@ -742,8 +786,8 @@ def parse_shp(shp_file_path):
     shp_metadata_dict["wgs84_extent_dict"] = {}
 
     if source is not None:
-        # define CoordinateTransformation obj
-        transform = osr.CoordinateTransformation(source, target)
+        # get CoordinateTransformation obj
+        transform = _get_wgs84_transformation(source)
         # project two key points
         left_upper_point.Transform(transform)
         right_lower_point.Transform(transform)
@@ -764,6 +808,27 @@ def parse_shp(shp_file_path):
     return shp_metadata_dict
 
 
+def _get_wgs84_transformation(source):
+    """
+    Returns the osr.CoordinateTransformation object from the spatial reference *source* to
+    WGS84. The objects are cached per source spatial reference (and per thread as they are
+    not thread safe), since setting up a transformation is far more expensive than using it.
+    """
+    transformations = getattr(_wgs84_transformations, 'cache', None)
+    if transformations is None:
+        transformations = _wgs84_transformations.cache = {}
+    source_wkt = source.ExportToWkt()
+    transform = transformations.get(source_wkt)
+    if transform is None:
+        target = osr.SpatialReference()
+        target.ImportFromEPSG(4326)
+        transform = osr.CoordinateTransformation(source, target)
+        if len(transformations) >= WGS84_TRANSFORMATION_CACHE_SIZE:
+            transformations.clear()
+        transformations[source_wkt] = transform
+    return transform
+
+
 def parse_shp_xml(shp_xml_full_path):
     """
     Parse ArcGIS 10.X ESRI Shapefile Metadata XML. file to extract metadata for the following
@@ -1,15 +1,16 @@
 import os
 import logging
 import shutil
-import subprocess
 import zipfile
 
 import xml.etree.ElementTree as ET
 import gdal
 from gdalconst import GA_ReadOnly
 
+from collections import OrderedDict
 from functools import partial, wraps
 
+from django.conf import settings
 from django.db import models, transaction
 from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError
@@ -280,9 +281,12 @@ class GeoRasterLogicalFile(AbstractLogicalFile):
                 log.info("Geo raster file type file validation successful.")
                 # extract metadata
                 temp_dir = os.path.dirname(temp_file)
-                temp_vrt_file_path = [os.path.join(temp_dir, f) for f in os.listdir(temp_dir) if
+                temp_vrt_file_path = [f for f in files_to_add_to_resource if
                                       '.vrt' == os.path.splitext(f)[1]].pop()
-                metadata = extract_metadata(temp_vrt_file_path)
+                sample_size = getattr(settings, 'RASTER_BAND_STATS_SAMPLE_SIZE', None)
+                metadata = extract_metadata(temp_vrt_file_path, sample_size=sample_size)
+                band_stats_sampled = raster_meta_extract.is_sampled_band_statistics(
+                    temp_vrt_file_path, sample_size)
                 log.info("Geo raster file type metadata extraction was successful.")
                 with transaction.atomic():
                     # create a geo raster logical file object to be associated with resource files
@@ -353,6 +357,14 @@ class GeoRasterLogicalFile(AbstractLogicalFile):
                         # remove temp dir
                         if os.path.isdir(temp_dir):
                             shutil.rmtree(temp_dir)
+
+                if band_stats_sampled:
+                    # the band min/max values saved above were computed from a sample of the
+                    # raster cells - compute the exact values in the background
+                    # had to import it here to avoid import loop
+                    from hs_file_types.tasks import update_raster_band_statistics
+                    update_raster_band_statistics.apply_async((logical_file.id,), countdown=30)
+                    log.info("Geo raster file type - exact band statistics update scheduled.")
             else:
                 err_msg = "Geo raster file type file validation failed.{}".format(
                     ' '.join(error_info))
@@ -388,79 +400,122 @@ def raster_file_validation(raster_file):
             if os.path.isfile(temp_vrt_file_path):
                 new_resource_files_to_add.append(temp_vrt_file_path)
                 new_resource_files_to_add.append(raster_file)
+
+        if not error_info:
+            error_info = _validate_raster_files(
+                [os.path.basename(path) for path in new_resource_files_to_add],
+                partial(_get_local_vrt_file, os.path.dirname(raster_file)))
     elif ext == '.zip':
         try:
-            extract_file_paths = _explode_raster_zip_file(raster_file)
+            with zipfile.ZipFile(raster_file, 'r') as zf:
+                zip_members = _get_raster_zip_members(zf)
+                # validate the raster files in the zip file (GDAL reads them from the zip file)
+                # so that only a valid zip file gets extracted
+                error_info = _validate_raster_files(
+                    zip_members.keys(), partial(_get_zipped_vrt_file, raster_file, zf,
+                                                zip_members))
+                if not error_info:
+                    new_resource_files_to_add = _extract_raster_zip_members(
+                        zf, zip_members, os.path.dirname(raster_file))
         except Exception as ex:
+            log = logging.getLogger()
+            log.exception("Failed to unzip. Error:{}".format(ex.message))
             error_info.append(ex.message)
-        else:
-            if extract_file_paths:
-                for file_path in extract_file_paths:
-                    new_resource_files_to_add.append(file_path)
     else:
         error_info.append("Invalid file mime type found.")
 
-    if not error_info:
-        files_ext = [os.path.splitext(path)[1] for path in new_resource_files_to_add]
-
-        if set(files_ext) == {'.vrt', '.tif'} and files_ext.count('.vrt') == 1:
-            vrt_file_path = new_resource_files_to_add[files_ext.index('.vrt')]
-            raster_dataset = gdal.Open(vrt_file_path, GA_ReadOnly)
-
-            # check if the vrt file is valid
-            try:
-                raster_dataset.RasterXSize
-                raster_dataset.RasterYSize
-                raster_dataset.RasterCount
-            except AttributeError:
-                error_info.append('Please define the raster with raster size and band information.')
-
-            # check if the raster file numbers and names are valid in vrt file
-            with open(vrt_file_path, 'r') as vrt_file:
-                vrt_string = vrt_file.read()
-                root = ET.fromstring(vrt_string)
-                raster_file_names = [file_name.text for file_name in root.iter('SourceFilename')]
-
-            file_names = [os.path.basename(path) for path in new_resource_files_to_add]
-            file_names.pop(files_ext.index('.vrt'))
-
-            if len(file_names) > len(raster_file_names):
-                error_info.append('Please remove the extra raster files which are not specified in '
-                                  'the .vrt file.')
-            else:
-                for vrt_ref_raster_name in raster_file_names:
-                    if vrt_ref_raster_name in file_names \
-                            or (os.path.split(vrt_ref_raster_name)[0] == '.' and
-                                os.path.split(vrt_ref_raster_name)[1] in file_names):
-                        continue
-                    elif os.path.basename(vrt_ref_raster_name) in file_names:
-                        msg = "Please specify {} as {} in the .vrt file, because it will " \
-                              "be saved in the same folder with .vrt file in HydroShare."
-                        msg = msg.format(vrt_ref_raster_name, os.path.basename(vrt_ref_raster_name))
-                        error_info.append(msg)
-                        break
-                    else:
-                        msg = "Pleas provide the missing raster file {} which is specified " \
-                              "in the .vrt file"
-                        msg = msg.format(os.path.basename(vrt_ref_raster_name))
-                        error_info.append(msg)
-                        break
-
-        elif files_ext.count('.tif') == 1 and files_ext.count('.vrt') == 0:
-            msg = "Please define the .tif file with raster size, band, and " \
-                  "georeference information."
-            error_info.append(msg)
+    return error_info, new_resource_files_to_add
+
+
+def _validate_raster_files(file_names, get_vrt_file):
+    """
+    Validates a set of raster files: there has to be one .vrt file and all the .tif files have
+    to be referenced by the .vrt file
+    :param file_names: base names of the raster files
+    :param get_vrt_file: function that for the name of the .vrt file returns the path GDAL
+    opens the .vrt file with and the content of the .vrt file
+    :return: list of error messages
+    """
+    error_info = []
+    files_ext = [os.path.splitext(name)[1] for name in file_names]
+
+    if set(files_ext) == {'.vrt', '.tif'} and files_ext.count('.vrt') == 1:
+        vrt_file_name = file_names[files_ext.index('.vrt')]
+        vrt_file_path, vrt_string = get_vrt_file(vrt_file_name)
+        raster_dataset = gdal.Open(vrt_file_path, GA_ReadOnly)
+
+        # check if the vrt file is valid
+        try:
+            raster_dataset.RasterXSize
+            raster_dataset.RasterYSize
+            raster_dataset.RasterCount
+        except AttributeError:
+            error_info.append('Please define the raster with raster size and band information.')
+
+        # check if the raster file numbers and names are valid in vrt file
+        root = ET.fromstring(vrt_string)
+        raster_file_names = [file_name.text for file_name in root.iter('SourceFilename')]
+
+        file_names = [name for name in file_names if name != vrt_file_name]
+
+        if len(file_names) > len(raster_file_names):
+            error_info.append('Please remove the extra raster files which are not specified in '
+                              'the .vrt file.')
         else:
-            msg = "The uploaded files should contain only one .vrt file and .tif files " \
-                  "referenced by the .vrt file."
-            error_info.append(msg)
+            for vrt_ref_raster_name in raster_file_names:
+                if vrt_ref_raster_name in file_names \
+                        or (os.path.split(vrt_ref_raster_name)[0] == '.' and
+                            os.path.split(vrt_ref_raster_name)[1] in file_names):
+                    continue
+                elif os.path.basename(vrt_ref_raster_name) in file_names:
+                    msg = "Please specify {} as {} in the .vrt file, because it will " \
+                          "be saved in the same folder with .vrt file in HydroShare."
+                    msg = msg.format(vrt_ref_raster_name, os.path.basename(vrt_ref_raster_name))
+                    error_info.append(msg)
+                    break
+                else:
+                    msg = "Pleas provide the missing raster file {} which is specified " \
+                          "in the .vrt file"
+                    msg = msg.format(os.path.basename(vrt_ref_raster_name))
+                    error_info.append(msg)
+                    break
+
+    elif files_ext.count('.tif') == 1 and files_ext.count('.vrt') == 0:
+        msg = "Please define the .tif file with raster size, band, and " \
+              "georeference information."
+        error_info.append(msg)
+    else:
+        msg = "The uploaded files should contain only one .vrt file and .tif files " \
+              "referenced by the .vrt file."
+        error_info.append(msg)
 
-    return error_info, new_resource_files_to_add
+    return error_info
+
+
+def _get_local_vrt_file(file_dir, vrt_file_name):
+    vrt_file_path = os.path.join(file_dir, vrt_file_name)
+    with open(vrt_file_path, 'r') as vrt_file:
+        return vrt_file_path, vrt_file.read()
 
 
-def extract_metadata(temp_vrt_file_path):
+def _get_zipped_vrt_file(zip_file, zf, zip_members, vrt_file_name):
+    member_name = zip_members[vrt_file_name]
+    vrt_file_path = '/vsizip/{}/{}'.format(os.path.abspath(zip_file), member_name)
+    return vrt_file_path, zf.read(member_name)
+
+
+def extract_metadata(temp_vrt_file_path, sample_size=None):
+    """
+    Return the list of metadata elements extracted from the vrt file as {element name: dict
+    of element field values}
+    :param temp_vrt_file_path: path of the vrt file (the tif files it references are expected
+    to be in the same folder)
+    :param sample_size: if given, the band min/max values of a raster with more cells than
+    this are computed from a sample of its cells (see raster_meta_extract.get_band_info())
+    """
     metadata = []
-    res_md_dict = raster_meta_extract.get_raster_meta_dict(temp_vrt_file_path)
+    res_md_dict = raster_meta_extract.get_raster_meta_dict(temp_vrt_file_path,
+                                                           sample_size=sample_size)
     wgs_cov_info = res_md_dict['spatial_coverage_info']['wgs84_coverage_info']
     # add core metadata coverage - box
     if wgs_cov_info:
@@ -496,20 +551,19 @@ def create_vrt_file(tif_file):
     tif_file_name = os.path.basename(tif_file)
     vrt_file_path = os.path.join(temp_dir, os.path.splitext(tif_file_name)[0] + '.vrt')
 
-    with open(os.devnull, 'w') as fp:
-        subprocess.Popen(['gdal_translate', '-of', 'VRT', tif_file, vrt_file_path],
-                         stdout=fp,
-                         stderr=fp).wait()  # need to wait
-
-    # edit VRT contents
     try:
-        tree = ET.parse(vrt_file_path)
-        root = tree.getroot()
+        # build the VRT dataset in memory from the tif file and write out its XML once the
+        # source file name is made relative to the vrt file
+        tif_dataset = gdal.Open(tif_file, GA_ReadOnly)
+        vrt_dataset = gdal.GetDriverByName('VRT').CreateCopy('', tif_dataset)
+        root = ET.fromstring(vrt_dataset.GetMetadata('xml:VRT')[0])
+        vrt_dataset = None
+        tif_dataset = None
         for element in root.iter('SourceFilename'):
             element.text = tif_file_name
             element.attrib['relativeToVRT'] = '1'
 
-        tree.write(vrt_file_path)
+        ET.ElementTree(root).write(vrt_file_path)
 
     except Exception as ex:
         log.exception("Failed to create/write to vrt file. Error:{}".format(ex.message))
@@ -518,28 +572,29 @@ def create_vrt_file(tif_file):
     return vrt_file_path
 
 
-def _explode_raster_zip_file(zip_file):
-    """ zip_file exists in temp directory - retrieved from irods """
-
-    log = logging.getLogger()
-    temp_dir = os.path.dirname(zip_file)
-    try:
-        zf = zipfile.ZipFile(zip_file, 'r')
-        zf.extractall(temp_dir)
-        zf.close()
-
-        # get all the file abs names in temp_dir
-        extract_file_paths = []
-        for dirpath, _, filenames in os.walk(temp_dir):
-            for name in filenames:
-                file_path = os.path.abspath(os.path.join(dirpath, name))
-                if os.path.splitext(os.path.basename(file_path))[1] in \
-                        GeoRasterLogicalFile.get_allowed_storage_file_types():
-                    shutil.move(file_path, os.path.join(temp_dir, name))
-                    extract_file_paths.append(os.path.join(temp_dir, os.path.basename(file_path)))
-
-    except Exception as ex:
-        log.exception("Failed to unzip. Error:{}".format(ex.message))
-        raise ex
-
+def _get_raster_zip_members(zf):
+    """
+    Return a dict mapping the base name of each raster file (.tif or .vrt) in the zip file to
+    its name in the zip file. The raster files are saved in one folder, so a raster file in a
+    sub folder of the zip file replaces a raster file with the same name listed before it.
+    """
+    zip_members = OrderedDict()
+    for member_name in zf.namelist():
+        file_name = os.path.basename(member_name)
+        if os.path.splitext(file_name)[1] in \
+                GeoRasterLogicalFile.get_allowed_storage_file_types():
+            zip_members.pop(file_name, None)
+            zip_members[file_name] = member_name
+    return zip_members
+
+
+def _extract_raster_zip_members(zf, zip_members, target_dir):
+    """ extract the raster files in the zip file (zip_members) to target_dir """
+
+    extract_file_paths = []
+    for file_name, member_name in zip_members.items():
+        file_path = os.path.join(target_dir, file_name)
+        with zf.open(member_name) as source, open(file_path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        extract_file_paths.append(file_path)
     return extract_file_paths
@@ -2,6 +2,7 @@ import os
 import shutil
 import json
 import logging
+from functools import partial, wraps
 from dateutil import parser
 from urllib2 import Request, urlopen, URLError
 import jsonschema
@@ -25,6 +26,11 @@ from base import AbstractFileMetaData, AbstractLogicalFile
 
 class TimeSeries(object):
     """represents a one timeseries metadata"""
+    __slots__ = ('network_name', 'site_name', 'site_code', 'latitude', 'longitude',
+                 'variable_name', 'variable_code', 'method_description', 'method_link',
+                 'sample_medium', 'url', 'service_type', 'reference_type', 'return_type',
+                 'start_date', 'end_date', 'value_count')
+
     def __init__(self, network_name, site_name, site_code, latitude, longitude, variable_name,
                  variable_code, method_description, method_link, sample_medium, url, service_type,
                  reference_type, return_type, start_date, end_date, value_count):
@@ -199,6 +205,8 @@ class TimeSeries(object):
 
 class Site(object):
     """represents a site for timeseries data"""
+    __slots__ = ('name', 'code', 'latitude', 'longitude')
+
     def __init__(self, name, code, latitude, longitude):
         self.name = name
         self.code = code
@@ -236,6 +244,8 @@ class Site(object):
 
 class Variable(object):
     """represents a variable for timeseries data"""
+    __slots__ = ('name', 'code')
+
     def __init__(self, name, code):
         self.name = name
         self.code = code
@@ -265,6 +275,8 @@ class Variable(object):
 
 class Method(object):
     """represents a method for timeseries data"""
+    __slots__ = ('description', 'link')
+
     def __init__(self, description, link):
         self.description = description
         self.link = link
@@ -272,6 +284,8 @@ class Method(object):
 
 class RefWebService(object):
     """represents a web service for timeseries data"""
+    __slots__ = ('url', 'service_type', 'reference_type', 'return_type')
+
     def __init__(self, url, service_type, reference_type, return_type):
         self.url = url
         self.service_type = service_type
@@ -307,6 +321,15 @@ class RefWebService(object):
         return root_div.render(pretty=True)
 
 
+def parsed_json_property(func):
+    """a property of RefTimeseriesFileMetaData derived from the json file content that is
+    computed once per json file content"""
+    @wraps(func)
+    def get_parsed_json(self):
+        return self._get_parsed_json(func.__name__, partial(func, self))
+    return property(get_parsed_json)
+
+
 class RefTimeseriesFileMetaData(AbstractFileMetaData):
     # the metadata element models are from the hs_core app
     model_app_label = 'hs_core'
@@ -372,7 +395,7 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
             return json_data_dict['timeSeriesReferenceFile']['keyWords']
         return []
 
-    @property
+    @parsed_json_property
     def sample_mediums(self):
         """get a list of all sample mediums associated with this ref time series"""
         sample_mediums = []
@@ -382,7 +405,7 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
                     sample_mediums.append(series['sampleMedium'])
         return sample_mediums
 
-    @property
+    @parsed_json_property
     def value_counts(self):
         """get a list of all value counts associated with this ref time series"""
         value_counts = []
@@ -392,12 +415,12 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
                     value_counts.append(series['valueCount'])
         return value_counts
 
-    @property
+    @parsed_json_property
     def series_list(self):
         json_data_dict = self._json_to_dict()
         return json_data_dict['timeSeriesReferenceFile']['referencedTimeSeries']
 
-    @property
+    @parsed_json_property
     def time_series_list(self):
         """get a list of all time series associated with this ref time series"""
         ts_serieses = []
@@ -434,7 +457,7 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
             ts_serieses.append(ts_series)
         return ts_serieses
 
-    @property
+    @parsed_json_property
     def sites(self):
         """get a list of all sites associated with this ref time series"""
         sites = []
@@ -450,7 +473,7 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
                 site_codes.append(site.code)
         return sites
 
-    @property
+    @parsed_json_property
     def variables(self):
         """get a list of all variables associated with this ref time series"""
         variables = []
@@ -464,7 +487,7 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
                 variable_codes.append(variable.code)
         return variables
 
-    @property
+    @parsed_json_property
     def methods(self):
         """get a list of all methods associated with this ref time series"""
         methods = []
@@ -476,7 +499,7 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
                 methods.append(method)
         return methods
 
-    @property
+    @parsed_json_property
     def web_services(self):
         """get a list of all web services associated with this ref time series"""
         services = []
@@ -696,8 +719,26 @@ class RefTimeseriesFileMetaData(AbstractFileMetaData):
         for series in self.time_series_list:
             series.add_to_xml_container(container_to_add_to)
 
+    def save(self, *args, **kwargs):
+        # drop the data parsed from the json file content
+        self._parsed_json = None
+        super(RefTimeseriesFileMetaData, self).save(*args, **kwargs)
+
+    def _get_parsed_json(self, name, build):
+        """returns the data named *name* derived from the json file content, built by calling
+        *build* only the first time it is needed for the current json file content"""
+        parsed_json = getattr(self, '_parsed_json', None)
+        if parsed_json is None or \
+                parsed_json['json_file_content'] is not self.json_file_content:
+            parsed_json = {'json_file_content': self.json_file_content}
+            self._parsed_json = parsed_json
+        if name not in parsed_json:
+            parsed_json[name] = build()
+        return parsed_json[name]
+
     def _json_to_dict(self):
-        return json.loads(self.json_file_content)
+        return self._get_parsed_json('json_data_dict',
+                                     lambda: json.loads(self.json_file_content))
 
 
 class RefTimeseriesLogicalFile(AbstractLogicalFile):
@@ -3,10 +3,11 @@ import shutil
 import logging
 import sqlite3
 from lxml import etree
-import csv
-from dateutil import parser
 import tempfile
+import hashlib
+from collections import OrderedDict
 
+from django.core.cache import cache
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import UploadedFile
@@ -19,7 +20,9 @@ from hs_core.hydroshare import utils
 from hs_core.hydroshare.resource import delete_resource_file
 from hs_core.models import CoreMetaData
 
-from hs_app_timeseries.models import TimeSeriesMetaDataMixin, AbstractCVLookupTable
+from hs_app_timeseries.models import TimeSeriesMetaDataMixin, AbstractCVLookupTable, \
+    TimeSeriesResult
+from hs_app_timeseries.csv_utils import read_csv_file_info, CSVFileError
 from hs_app_timeseries.forms import SiteValidationForm, VariableValidationForm, \
     MethodValidationForm, ProcessingLevelValidationForm, TimeSeriesResultValidationForm, \
     UTCOffSetValidationForm
@@ -516,11 +519,12 @@ class TimeSeriesLogicalFile(AbstractLogicalFile):
         temp_res_file = utils.get_file_from_irods(res_file)
         # hold on to temp dir for final clean up
         temp_dir = os.path.dirname(temp_res_file)
+        csv_file_info = None
         if res_file.extension == '.sqlite':
             validate_err_message = validate_odm2_db_file(temp_res_file)
         else:
             # file must be a csv file
-            validate_err_message = validate_csv_file(temp_res_file)
+            validate_err_message, csv_file_info = get_csv_file_info(temp_res_file)
 
         if validate_err_message is not None:
             log.error(validate_err_message)
@@ -590,7 +594,7 @@ class TimeSeriesLogicalFile(AbstractLogicalFile):
                         raise ValidationError(extract_err_message)
                 else:
                     # populate CV metadata django models from the blank sqlite file
-                    extract_cv_metadata_from_blank_sqlite_file(logical_file)
+                    extract_cv_metadata_from_blank_sqlite_file(logical_file, csv_file_info)
 
                 log.info("TimeSeries file type and resource level metadata updated.")
                 # delete the original sqlite/csv file used as part of setting file type
@@ -703,48 +707,106 @@ def copy_cv_terms(src_metadata, tgt_metadata):
         cv_term.save()
 
 
+# tables an ODM2 sqlite file must have
+ODM2_CORE_TABLE_NAMES = ['People', 'Affiliations', 'SamplingFeatures', 'ActionBy',
+                         'Organizations', 'Methods', 'FeatureActions', 'Actions',
+                         'RelatedActions', 'Results', 'Variables', 'Units', 'Datasets',
+                         'DatasetsResults', 'ProcessingLevels', 'TaxonomicClassifiers',
+                         'CV_VariableType', 'CV_VariableName', 'CV_Speciation',
+                         'CV_SiteType', 'CV_ElevationDatum', 'CV_MethodType',
+                         'CV_UnitsType', 'CV_Status', 'CV_Medium',
+                         'CV_AggregationStatistic']
+
+# ODM2 core tables that may have no records
+ODM2_OPTIONAL_DATA_TABLE_NAMES = ('RelatedActions', 'TaxonomicClassifiers')
+
+# other tables an ODM2 sqlite file must have since they are read when extracting metadata
+ODM2_EXTRACTED_TABLE_NAMES = ['Sites', 'TimeSeriesResults']
+
+# time (in seconds) a table definitions fingerprint of a valid ODM2 sqlite file is remembered
+ODM2_SCHEMA_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# columns of the ODM2 core tables read when extracting metadata from an ODM2 sqlite file
+ODM2_CORE_TABLE_COLUMNS = {
+    'People': ('PersonID', 'PersonFirstName', 'PersonMiddleName', 'PersonLastName'),
+    'Affiliations': ('AffiliationID', 'PersonID', 'OrganizationID', 'PrimaryPhone',
+                     'PrimaryEmail', 'PrimaryAddress'),
+    'SamplingFeatures': ('SamplingFeatureID', 'SamplingFeatureCode', 'SamplingFeatureName',
+                         'Elevation_m', 'ElevationDatumCV'),
+    'ActionBy': ('ActionID', 'AffiliationID'),
+    'Organizations': ('OrganizationID', 'OrganizationName'),
+    'Methods': ('MethodID', 'MethodCode', 'MethodName', 'MethodTypeCV', 'MethodDescription',
+                'MethodLink'),
+    'FeatureActions': ('FeatureActionID', 'SamplingFeatureID', 'ActionID'),
+    'Actions': ('ActionID', 'MethodID', 'BeginDateTime', 'EndDateTime'),
+    'Results': ('ResultID', 'ResultUUID', 'FeatureActionID', 'VariableID', 'UnitsID',
+                'ProcessingLevelID', 'StatusCV', 'SampledMediumCV', 'ValueCount'),
+    'Variables': ('VariableID', 'VariableCode', 'VariableNameCV', 'VariableTypeCV',
+                  'NoDataValue', 'VariableDefinition', 'SpeciationCV'),
+    'Units': ('UnitsID', 'UnitsTypeCV', 'UnitsName', 'UnitsAbbreviation'),
+    'Datasets': ('DataSetTitle', 'DataSetAbstract'),
+    'ProcessingLevels': ('ProcessingLevelID', 'ProcessingLevelCode', 'Definition',
+                         'Explanation'),
+    'Sites': ('SamplingFeatureID', 'SiteTypeCV', 'Latitude', 'Longitude', 'SpatialReferenceID'),
+    'TimeSeriesResults': ('ResultID', 'AggregationStatisticCV'),
+}
+# the CV tables are read when creating the CV lookup models
+ODM2_CORE_TABLE_COLUMNS.update({table_name: ('Term', 'Name') for table_name in
+                                ODM2_CORE_TABLE_NAMES if table_name.startswith('CV_')})
+
+
 def validate_odm2_db_file(sqlite_file_path):
     """
     Validates if the sqlite file *sqlite_file_path* is a valid ODM2 sqlite file
     :param sqlite_file_path: path of the sqlite file to be validated
     :return: If validation fails then an error message string is returned otherwise None is
     returned
+
+    The schema (the table definitions) of a file that passed the table and column checks is
+    remembered in the cache by its fingerprint for ODM2_SCHEMA_CACHE_TIMEOUT seconds, so that
+    these checks are skipped for the files created from the same ODM2 template. Only the check
+    for table records is done for every file.
     """
     err_message = "Uploaded file is not a valid ODM2 SQLite file."
     log = logging.getLogger()
     try:
         con = sqlite3.connect(sqlite_file_path)
         with con:
-
-            # TODO: check that each of the core tables has the necessary columns
-
-            # check that the uploaded file has all the tables from ODM2Core and the CV tables
             cur = con.cursor()
-            odm2_core_table_names = ['People', 'Affiliations', 'SamplingFeatures', 'ActionBy',
-                                     'Organizations', 'Methods', 'FeatureActions', 'Actions',
-                                     'RelatedActions', 'Results', 'Variables', 'Units', 'Datasets',
-                                     'DatasetsResults', 'ProcessingLevels', 'TaxonomicClassifiers',
-                                     'CV_VariableType', 'CV_VariableName', 'CV_Speciation',
-                                     'CV_SiteType', 'CV_ElevationDatum', 'CV_MethodType',
-                                     'CV_UnitsType', 'CV_Status', 'CV_Medium',
-                                     'CV_AggregationStatistic']
-            # check the tables exist
-            for table_name in odm2_core_table_names:
-                cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type=? AND name=?",
-                            ("table", table_name))
-                result = cur.fetchone()
-                if result[0] <= 0:
-                    err_message += " Table '{}' is missing.".format(table_name)
-                    log.info(err_message)
-                    return err_message
-
-            # check that the tables have at least one record
-            for table_name in odm2_core_table_names:
-                if table_name == 'RelatedActions' or table_name == 'TaxonomicClassifiers':
-                    continue
-                cur.execute("SELECT COUNT(*) FROM " + table_name)
-                result = cur.fetchone()
-                if result[0] <= 0:
+            cur.execute("SELECT name, sql FROM sqlite_master WHERE type=?", ("table",))
+            table_sqls = dict(cur.fetchall())
+            schema_cache_key = _get_odm2_schema_cache_key(table_sqls)
+            if not cache.get(schema_cache_key):
+                # check that the uploaded file has all the tables from ODM2Core and the CV tables
+                # and the other tables read when extracting metadata
+                for table_name in ODM2_CORE_TABLE_NAMES + ODM2_EXTRACTED_TABLE_NAMES:
+                    if table_name not in table_sqls:
+                        err_message += " Table '{}' is missing.".format(table_name)
+                        log.info(err_message)
+                        return err_message
+
+                # check that each of these tables has the necessary columns
+                for table_name in ODM2_CORE_TABLE_NAMES + ODM2_EXTRACTED_TABLE_NAMES:
+                    if table_name not in ODM2_CORE_TABLE_COLUMNS:
+                        continue
+                    cur.execute("PRAGMA table_info({})".format(table_name))
+                    column_names = set(row[1].lower() for row in cur.fetchall())
+                    missing_columns = [col for col in ODM2_CORE_TABLE_COLUMNS[table_name]
+                                       if col.lower() not in column_names]
+                    if missing_columns:
+                        err_message += " Table '{}' is missing column(s): {}.".format(
+                            table_name, ", ".join(missing_columns))
+                        log.info(err_message)
+                        return err_message
+                cache.set(schema_cache_key, True, ODM2_SCHEMA_CACHE_TIMEOUT)
+
+            # check that the tables have at least one record - probing all tables in one query
+            data_table_names = [table_name for table_name in ODM2_CORE_TABLE_NAMES
+                                if table_name not in ODM2_OPTIONAL_DATA_TABLE_NAMES]
+            cur.execute("SELECT " + ", ".join("EXISTS (SELECT 1 FROM {} LIMIT 1)".format(
+                table_name) for table_name in data_table_names))
+            for table_name, has_records in zip(data_table_names, cur.fetchone()):
+                if not has_records:
                     err_message += " Table '{}' has no records.".format(table_name)
                     log.info(err_message)
                     return err_message
@@ -758,66 +820,33 @@ def validate_odm2_db_file(sqlite_file_path):
         return e.message
 
 
-def validate_csv_file(csv_file_path):
+def _get_odm2_schema_cache_key(table_sqls):
+    """Returns the cache key for the fingerprint of the definitions of the validated tables.
+    The columns checked are part of the fingerprint, so that a change of the checks doesn't
+    pick up a fingerprint remembered before.
+    :param table_sqls: a dict of the table names and their create table statements
+    """
+    schema = u"\n".join(u"{}:{}:{}".format(table_name, table_sqls.get(table_name),
+                                           ODM2_CORE_TABLE_COLUMNS.get(table_name))
+                        for table_name in ODM2_CORE_TABLE_NAMES + ODM2_EXTRACTED_TABLE_NAMES)
+    fingerprint = hashlib.sha1(schema.encode('utf-8')).hexdigest()
+    return 'hs_file_types:odm2_schema:{}'.format(fingerprint)
+
+
+def get_csv_file_info(csv_file_path):
+    """Validates the timeseries csv file *csv_file_path*
+    :return: a tuple of an error message (None if the file is valid) and the CSVFileInfo of the
+    file (None if the file is not valid). The CSVFileInfo can be passed on to
+    extract_cv_metadata_from_blank_sqlite_file() so that the file need not be read again.
+    """
     err_message = "Uploaded file is not a valid timeseries csv file."
     log = logging.getLogger()
-    with open(csv_file_path, 'r') as fl_obj:
-        csv_reader = csv.reader(fl_obj, delimiter=',')
-        # read the first row
-        header = csv_reader.next()
-        header = [el.strip() for el in header]
-        if any(len(h) == 0 for h in header):
-            err_message += " Column heading is missing."
-            log.error(err_message)
-            return err_message
-
-        # check that there are at least 2 headings
-        if len(header) < 2:
-            err_message += " There needs to be at least 2 columns of data."
-            log.error(err_message)
-            return err_message
-
-        # check the header has only string values
-        for hdr in header:
-            try:
-                float(hdr)
-                err_message += " Column heading must be a string."
-                log.error(err_message)
-                return err_message
-            except ValueError:
-                pass
-
-        # check that there are no duplicate column headings
-        if len(header) != len(set(header)):
-            err_message += " There are duplicate column headings."
-            log.error(err_message)
-            return err_message
-
-        # process data rows
-        for row in csv_reader:
-            # check that data row has the same number of columns as the header
-            if len(row) != len(header):
-                err_message += " Number of columns in the header is not same as the data columns."
-                log.error(err_message)
-                return err_message
-            # check that the first column data is of type datetime
-            try:
-                parser.parse(row[0])
-            except Exception:
-                err_message += " Data for the first column must be a date value."
-                log.error(err_message)
-                return err_message
-
-            # check that the data values (2nd column onwards) are of numeric
-            for data_value in row[1:]:
-                try:
-                    float(data_value)
-                except ValueError:
-                    err_message += " Data values must be numeric."
-                    log.error(err_message)
-                    return err_message
-
-    return None
+    try:
+        return None, read_csv_file_info(csv_file_path)
+    except CSVFileError as ex:
+        err_message += " " + str(ex)
+        log.error(err_message)
+        return err_message, None
 
 
 def add_blank_sqlite_file(resource, upload_folder):
@@ -927,192 +956,7 @@ def extract_metadata(resource, sqlite_file_name, logical_file=None):
             _extract_coverage_metadata(resource, cur, logical_file)
 
             # extract extended metadata
-            cur.execute("SELECT * FROM Sites")
-            sites = cur.fetchall()
-            is_create_multiple_site_elements = len(sites) > 1
-
-            cur.execute("SELECT * FROM Variables")
-            variables = cur.fetchall()
-            is_create_multiple_variable_elements = len(variables) > 1
-
-            cur.execute("SELECT * FROM Methods")
-            methods = cur.fetchall()
-            is_create_multiple_method_elements = len(methods) > 1
-
-            cur.execute("SELECT * FROM ProcessingLevels")
-            processing_levels = cur.fetchall()
-            is_create_multiple_processinglevel_elements = len(processing_levels) > 1
-
-            cur.execute("SELECT * FROM TimeSeriesResults")
-            timeseries_results = cur.fetchall()
-            is_create_multiple_timeseriesresult_elements = len(timeseries_results) > 1
-
-            cur.execute("SELECT * FROM Results")
-            results = cur.fetchall()
-            for result in results:
-                # extract site element data
-                # Start with Results table to -> FeatureActions table -> SamplingFeatures table
-                # check if we need to create multiple site elements
-                cur.execute("SELECT * FROM FeatureActions WHERE FeatureActionID=?",
-                            (result["FeatureActionID"],))
-                feature_action = cur.fetchone()
-                if is_create_multiple_site_elements or len(target_obj.metadata.sites) == 0:
-                    cur.execute("SELECT * FROM SamplingFeatures WHERE SamplingFeatureID=?",
-                                (feature_action["SamplingFeatureID"],))
-                    sampling_feature = cur.fetchone()
-
-                    cur.execute("SELECT * FROM Sites WHERE SamplingFeatureID=?",
-                                (feature_action["SamplingFeatureID"],))
-                    site = cur.fetchone()
-                    if not any(sampling_feature["SamplingFeatureCode"] == s.site_code for s
-                               in target_obj.metadata.sites):
-
-                        data_dict = {}
-                        data_dict['series_ids'] = [result["ResultUUID"]]
-                        data_dict['site_code'] = sampling_feature["SamplingFeatureCode"]
-                        data_dict['site_name'] = sampling_feature["SamplingFeatureName"]
-                        if sampling_feature["Elevation_m"]:
-                            data_dict["elevation_m"] = sampling_feature["Elevation_m"]
-
-                        if sampling_feature["ElevationDatumCV"]:
-                            data_dict["elevation_datum"] = sampling_feature["ElevationDatumCV"]
-
-                        if site["SiteTypeCV"]:
-                            data_dict["site_type"] = site["SiteTypeCV"]
-
-                        data_dict["latitude"] = site["Latitude"]
-                        data_dict["longitude"] = site["Longitude"]
-
-                        # create site element
-                        target_obj.metadata.create_element('site', **data_dict)
-                    else:
-                        matching_site = [s for s in target_obj.metadata.sites if
-                                         s.site_code == sampling_feature["SamplingFeatureCode"]][0]
-                        _update_element_series_ids(matching_site, result["ResultUUID"])
-                else:
-                    _update_element_series_ids(target_obj.metadata.sites[0], result["ResultUUID"])
-
-                # extract variable element data
-                # Start with Results table to -> Variables table
-                if is_create_multiple_variable_elements or len(target_obj.metadata.variables) == 0:
-                    cur.execute("SELECT * FROM Variables WHERE VariableID=?",
-                                (result["VariableID"],))
-                    variable = cur.fetchone()
-                    if not any(variable["VariableCode"] == v.variable_code for v
-                               in target_obj.metadata.variables):
-
-                        data_dict = {}
-                        data_dict['series_ids'] = [result["ResultUUID"]]
-                        data_dict['variable_code'] = variable["VariableCode"]
-                        data_dict["variable_name"] = variable["VariableNameCV"]
-                        data_dict['variable_type'] = variable["VariableTypeCV"]
-                        data_dict["no_data_value"] = variable["NoDataValue"]
-                        if variable["VariableDefinition"]:
-                            data_dict["variable_definition"] = variable["VariableDefinition"]
-
-                        if variable["SpeciationCV"]:
-                            data_dict["speciation"] = variable["SpeciationCV"]
-
-                        # create variable element
-                        target_obj.metadata.create_element('variable', **data_dict)
-                    else:
-                        matching_variable = [v for v in target_obj.metadata.variables if
-                                             v.variable_code == variable["VariableCode"]][0]
-                        _update_element_series_ids(matching_variable, result["ResultUUID"])
-
-                else:
-                    _update_element_series_ids(target_obj.metadata.variables[0],
-                                               result["ResultUUID"])
-
-                # extract method element data
-                # Start with Results table -> FeatureActions table to -> Actions table to ->
-                # Method table
-                if is_create_multiple_method_elements or len(target_obj.metadata.methods) == 0:
-                    cur.execute("SELECT MethodID from Actions WHERE ActionID=?",
-                                (feature_action["ActionID"],))
-                    action = cur.fetchone()
-                    cur.execute("SELECT * FROM Methods WHERE MethodID=?", (action["MethodID"],))
-                    method = cur.fetchone()
-                    if not any(method["MethodCode"] == m.method_code for m
-                               in target_obj.metadata.methods):
-
-                        data_dict = {}
-                        data_dict['series_ids'] = [result["ResultUUID"]]
-                        data_dict['method_code'] = method["MethodCode"]
-                        data_dict["method_name"] = method["MethodName"]
-                        data_dict['method_type'] = method["MethodTypeCV"]
-
-                        if method["MethodDescription"]:
-                            data_dict["method_description"] = method["MethodDescription"]
-
-                        if method["MethodLink"]:
-                            data_dict["method_link"] = method["MethodLink"]
-
-                        # create method element
-                        target_obj.metadata.create_element('method', **data_dict)
-                    else:
-                        matching_method = [m for m in target_obj.metadata.methods if
-                                           m.method_code == method["MethodCode"]][0]
-                        _update_element_series_ids(matching_method, result["ResultUUID"])
-                else:
-                    _update_element_series_ids(target_obj.metadata.methods[0], result["ResultUUID"])
-
-                # extract processinglevel element data
-                # Start with Results table to -> ProcessingLevels table
-                if is_create_multiple_processinglevel_elements \
-                        or len(target_obj.metadata.processing_levels) == 0:
-                    cur.execute("SELECT * FROM ProcessingLevels WHERE ProcessingLevelID=?",
-                                (result["ProcessingLevelID"],))
-                    pro_level = cur.fetchone()
-                    if not any(pro_level["ProcessingLevelCode"] == p.processing_level_code for p
-                               in target_obj.metadata.processing_levels):
-
-                        data_dict = {}
-                        data_dict['series_ids'] = [result["ResultUUID"]]
-                        data_dict['processing_level_code'] = pro_level["ProcessingLevelCode"]
-                        if pro_level["Definition"]:
-                            data_dict["definition"] = pro_level["Definition"]
-
-                        if pro_level["Explanation"]:
-                            data_dict["explanation"] = pro_level["Explanation"]
-
-                        # create processinglevel element
-                        target_obj.metadata.create_element('processinglevel', **data_dict)
-                    else:
-                        matching_pro_level = [p for p in target_obj.metadata.processing_levels if
-                                              p.processing_level_code == pro_level[
-                                                  "ProcessingLevelCode"]][0]
-                        _update_element_series_ids(matching_pro_level, result["ResultUUID"])
-                else:
-                    _update_element_series_ids(target_obj.metadata.processing_levels[0],
-                                               result["ResultUUID"])
-
-                # extract data for TimeSeriesResult element
-                # Start with Results table
-                if is_create_multiple_timeseriesresult_elements \
-                        or len(target_obj.metadata.time_series_results) == 0:
-                    data_dict = {}
-                    data_dict['series_ids'] = [result["ResultUUID"]]
-                    data_dict["status"] = result["StatusCV"]
-                    data_dict["sample_medium"] = result["SampledMediumCV"]
-                    data_dict["value_count"] = result["ValueCount"]
-
-                    cur.execute("SELECT * FROM Units WHERE UnitsID=?", (result["UnitsID"],))
-                    unit = cur.fetchone()
-                    data_dict['units_type'] = unit["UnitsTypeCV"]
-                    data_dict['units_name'] = unit["UnitsName"]
-                    data_dict['units_abbreviation'] = unit["UnitsAbbreviation"]
-
-                    cur.execute("SELECT AggregationStatisticCV FROM TimeSeriesResults WHERE "
-                                "ResultID=?", (result["ResultID"],))
-                    ts_result = cur.fetchone()
-                    data_dict["aggregation_statistics"] = ts_result["AggregationStatisticCV"]
-
-                    # create the TimeSeriesResult element
-                    target_obj.metadata.create_element('timeseriesresult', **data_dict)
-                else:
-                    _update_element_series_ids(target_obj.metadata.time_series_results[0],
-                                               result["ResultUUID"])
+            _extract_series_metadata(target_obj.metadata, cur)
 
             return None
 
@@ -1125,21 +969,33 @@ def extract_metadata(resource, sqlite_file_name, logical_file=None):
         return err_message
 
 
-def extract_cv_metadata_from_blank_sqlite_file(target):
+def extract_cv_metadata_from_blank_sqlite_file(target, csv_file_info=None):
     """extracts CV metadata from the blank sqlite file and populates the django metadata
     models - this function is applicable only in the case of a CSV file being used as the
     source of time series data
     :param  target: an instance of TimeSeriesResource or TimeSeriesLogicalFile
+    :param  csv_file_info: CSVFileInfo of the csv file of the target as returned by
+    get_csv_file_info() - if not provided the csv file is retrieved from iRODS and read again
     """
 
-    # find the csv file
-    csv_res_file = None
-    for f in target.files.all():
-        if f.extension == ".csv":
-            csv_res_file = f
-            break
-    if csv_res_file is None:
-        raise Exception("No CSV file was found")
+    if csv_file_info is None:
+        # find the csv file
+        csv_res_file = None
+        for f in target.files.all():
+            if f.extension == ".csv":
+                csv_res_file = f
+                break
+        if csv_res_file is None:
+            raise Exception("No CSV file was found")
+
+        # get the csv file from iRODS to a temp directory
+        temp_csv_file = utils.get_file_from_irods(csv_res_file)
+        try:
+            csv_file_info = read_csv_file_info(temp_csv_file)
+        finally:
+            # cleanup the temp csv file
+            if os.path.exists(temp_csv_file):
+                shutil.rmtree(os.path.dirname(temp_csv_file))
 
     # copy the blank sqlite file to a temp directory
     temp_dir = tempfile.mkdtemp()
@@ -1158,43 +1014,25 @@ def extract_cv_metadata_from_blank_sqlite_file(target):
         target.metadata.create_cv_lookup_models(cur)
 
     # save some data from the csv file
-    # get the csv file from iRODS to a temp directory
-    temp_csv_file = utils.get_file_from_irods(csv_res_file)
-    with open(temp_csv_file, 'r') as fl_obj:
-        csv_reader = csv.reader(fl_obj, delimiter=',')
-        # read the first row - header
-        header = csv_reader.next()
-        # read the 1st data row
-        start_date_str = csv_reader.next()[0]
-        last_row = None
-        data_row_count = 1
-        for row in csv_reader:
-            last_row = row
-            data_row_count += 1
-        end_date_str = last_row[0]
-
-        # save the series names along with number of data points for each series
-        # columns starting with the 2nd column are data series names
-        value_counts = {}
-        for data_col_name in header[1:]:
-            value_counts[data_col_name] = str(data_row_count)
-
-        metadata_obj = target.metadata
-        metadata_obj.value_counts = value_counts
-        metadata_obj.save()
-
-        # create the temporal coverage element
-        target.metadata.create_element('coverage', type='period',
-                                       value={'start': start_date_str, 'end': end_date_str})
+    # save the series names along with number of data points for each series
+    # columns starting with the 2nd column are data series names
+    value_counts = {}
+    for data_col_name in csv_file_info.header[1:]:
+        value_counts[data_col_name] = str(csv_file_info.data_row_count)
+
+    metadata_obj = target.metadata
+    metadata_obj.value_counts = value_counts
+    metadata_obj.save()
+
+    # create the temporal coverage element
+    target.metadata.create_element('coverage', type='period',
+                                   value={'start': csv_file_info.start_date,
+                                          'end': csv_file_info.end_date})
 
     # cleanup the temp sqlite file directory
     if os.path.exists(temp_dir):
         shutil.rmtree(temp_dir)
 
-    # cleanup the temp csv file
-    if os.path.exists(temp_csv_file):
-        shutil.rmtree(os.path.dirname(temp_csv_file))
-
 
 def _extract_creators_contributors(resource, cur, file_type=False):
     # check if the AuthorList table exists
@@ -1353,34 +1191,199 @@ def _extract_coverage_metadata(resource, cur, logical_file=None):
 
         target_obj.metadata.create_element('coverage', type='box', value=bbox)
 
-    cur.execute("SELECT * FROM Results")
-    results = cur.fetchall()
-    min_begin_date = None
-    max_end_date = None
-    for result in results:
-        cur.execute("SELECT ActionID FROM FeatureActions WHERE FeatureActionID=?",
-                    (result["FeatureActionID"],))
-        feature_action = cur.fetchone()
-        cur.execute("SELECT BeginDateTime, EndDateTime FROM Actions WHERE ActionID=?",
-                    (feature_action["ActionID"],))
-        action = cur.fetchone()
-        if min_begin_date is None:
-            min_begin_date = action["BeginDateTime"]
-        elif min_begin_date > action["BeginDateTime"]:
-            min_begin_date = action["BeginDateTime"]
-
-        if max_end_date is None:
-            max_end_date = action["EndDateTime"]
-        elif max_end_date < action["EndDateTime"]:
-            max_end_date = action["EndDateTime"]
+    # the period spans from the earliest begin date to the latest end date of the actions
+    # that created the results
+    cur.execute("SELECT MIN(a.BeginDateTime) AS BeginDateTime, MAX(a.EndDateTime) AS EndDateTime "
+                "FROM Results r "
+                "JOIN FeatureActions fa ON fa.FeatureActionID = r.FeatureActionID "
+                "JOIN Actions a ON a.ActionID = fa.ActionID")
+    period = cur.fetchone()
 
     # create coverage element
-    value_dict = {"start": min_begin_date, "end": max_end_date}
+    value_dict = {"start": period["BeginDateTime"], "end": period["EndDateTime"]}
     target_obj.metadata.create_element('coverage', type='period', value=value_dict)
 
 
-def _update_element_series_ids(element, series_id):
-    element.series_ids = element.series_ids + [series_id]
+# selects the data for the site, variable, method, processing level and time series result
+# elements of every series (result) in an ODM2 sqlite file
+SERIES_METADATA_SQL = """
+    SELECT r.ResultID, r.ResultUUID, r.StatusCV, r.SampledMediumCV, r.ValueCount,
+        sf.SamplingFeatureCode, sf.SamplingFeatureName, sf.Elevation_m, sf.ElevationDatumCV,
+        s.SiteTypeCV, s.Latitude, s.Longitude,
+        v.VariableCode, v.VariableNameCV, v.VariableTypeCV, v.NoDataValue,
+        v.VariableDefinition, v.SpeciationCV,
+        m.MethodCode, m.MethodName, m.MethodTypeCV, m.MethodDescription, m.MethodLink,
+        pl.ProcessingLevelCode, pl.Definition, pl.Explanation,
+        u.UnitsTypeCV, u.UnitsName, u.UnitsAbbreviation,
+        tsr.AggregationStatisticCV
+    FROM Results r
+    LEFT JOIN FeatureActions fa ON fa.FeatureActionID = r.FeatureActionID
+    LEFT JOIN SamplingFeatures sf ON sf.SamplingFeatureID = fa.SamplingFeatureID
+    LEFT JOIN Sites s ON s.SamplingFeatureID = fa.SamplingFeatureID
+    LEFT JOIN Actions a ON a.ActionID = fa.ActionID
+    LEFT JOIN Methods m ON m.MethodID = a.MethodID
+    LEFT JOIN Variables v ON v.VariableID = r.VariableID
+    LEFT JOIN ProcessingLevels pl ON pl.ProcessingLevelID = r.ProcessingLevelID
+    LEFT JOIN Units u ON u.UnitsID = r.UnitsID
+    LEFT JOIN TimeSeriesResults tsr ON tsr.ResultID = r.ResultID
+    ORDER BY r.ResultID
+"""
+
+
+def _extract_series_metadata(metadata, cur):
+    """Creates the site, variable, method, processing level and time series result elements
+    of *metadata* from the ODM2 sqlite file opened by the cursor *cur*.
+
+    The data of all the series are read with one query. Series sharing the same site,
+    variable, method or processing level (by code) are associated with one element which is
+    created with all their series ids. If a table has only one record, all the series are
+    associated with one element of that type.
+    """
+    # for each table find out if it has more than one record
+    cur.execute("SELECT "
+                "(SELECT COUNT(*) FROM (SELECT 1 FROM Sites LIMIT 2)) > 1 AS sites, "
+                "(SELECT COUNT(*) FROM (SELECT 1 FROM Variables LIMIT 2)) > 1 AS variables, "
+                "(SELECT COUNT(*) FROM (SELECT 1 FROM Methods LIMIT 2)) > 1 AS methods, "
+                "(SELECT COUNT(*) FROM (SELECT 1 FROM ProcessingLevels LIMIT 2)) > 1 "
+                "AS processing_levels, "
+                "(SELECT COUNT(*) FROM (SELECT 1 FROM TimeSeriesResults LIMIT 2)) > 1 "
+                "AS time_series_results")
+    is_multiple = cur.fetchone()
+
+    cur.execute(SERIES_METADATA_SQL)
+    series_rows = cur.fetchall()
+
+    def site_data(row):
+        data_dict = {'site_code': row["SamplingFeatureCode"],
+                     'site_name': row["SamplingFeatureName"],
+                     'latitude': row["Latitude"],
+                     'longitude': row["Longitude"]}
+        if row["Elevation_m"]:
+            data_dict["elevation_m"] = row["Elevation_m"]
+        if row["ElevationDatumCV"]:
+            data_dict["elevation_datum"] = row["ElevationDatumCV"]
+        if row["SiteTypeCV"]:
+            data_dict["site_type"] = row["SiteTypeCV"]
+        return data_dict
+
+    def variable_data(row):
+        data_dict = {'variable_code': row["VariableCode"],
+                     'variable_name': row["VariableNameCV"],
+                     'variable_type': row["VariableTypeCV"],
+                     'no_data_value': row["NoDataValue"]}
+        if row["VariableDefinition"]:
+            data_dict["variable_definition"] = row["VariableDefinition"]
+        if row["SpeciationCV"]:
+            data_dict["speciation"] = row["SpeciationCV"]
+        return data_dict
+
+    def method_data(row):
+        data_dict = {'method_code': row["MethodCode"],
+                     'method_name': row["MethodName"],
+                     'method_type': row["MethodTypeCV"]}
+        if row["MethodDescription"]:
+            data_dict["method_description"] = row["MethodDescription"]
+        if row["MethodLink"]:
+            data_dict["method_link"] = row["MethodLink"]
+        return data_dict
+
+    def processing_level_data(row):
+        data_dict = {'processing_level_code': row["ProcessingLevelCode"]}
+        if row["Definition"]:
+            data_dict["definition"] = row["Definition"]
+        if row["Explanation"]:
+            data_dict["explanation"] = row["Explanation"]
+        return data_dict
+
+    _create_series_elements(metadata, 'site', metadata.sites, 'site_code',
+                            "SamplingFeatureCode", is_multiple["sites"], series_rows, site_data)
+    _create_series_elements(metadata, 'variable', metadata.variables, 'variable_code',
+                            "VariableCode", is_multiple["variables"], series_rows, variable_data)
+    _create_series_elements(metadata, 'method', metadata.methods, 'method_code',
+                            "MethodCode", is_multiple["methods"], series_rows, method_data)
+    _create_series_elements(metadata, 'processinglevel', metadata.processing_levels,
+                            'processing_level_code', "ProcessingLevelCode",
+                            is_multiple["processing_levels"], series_rows, processing_level_data)
+    _create_timeseriesresult_elements(metadata, is_multiple["time_series_results"],
+                                      series_rows)
+
+
+def _create_series_elements(metadata, element_name, existing_elements, code_field_name,
+                            code_column_name, is_multiple, series_rows, get_data_dict):
+    """Creates one *element_name* element for each distinct code (column *code_column_name*)
+    in *series_rows* - or only one element if *is_multiple* is False - with the series ids of
+    all the rows having that code. An existing element with the same code (any existing element
+    if *is_multiple* is False) is associated with those series ids instead.
+    """
+    existing_elements = list(existing_elements)
+    series_groups = OrderedDict()
+    for row in series_rows:
+        code = row[code_column_name] if is_multiple else None
+        if code not in series_groups:
+            series_groups[code] = (row, [])
+        series_groups[code][1].append(row["ResultUUID"])
+
+    for code, (row, series_ids) in series_groups.items():
+        if is_multiple:
+            matching_elements = [element for element in existing_elements if
+                                 getattr(element, code_field_name) == code]
+        else:
+            matching_elements = existing_elements
+        if matching_elements:
+            _update_element_series_ids(matching_elements[0], series_ids)
+        else:
+            data_dict = get_data_dict(row)
+            data_dict['series_ids'] = series_ids
+            metadata.create_element(element_name, **data_dict)
+
+
+def _create_timeseriesresult_elements(metadata, is_multiple, series_rows):
+    """Creates a time series result element for each series in *series_rows* - or only one
+    element associated with all the series if *is_multiple* is False.
+
+    The first element for each distinct combination of CV terms is created the regular way
+    (which creates any missing CV terms), the rest of the elements are created in bulk.
+    """
+    if not is_multiple:
+        series_ids = [row["ResultUUID"] for row in series_rows]
+        existing_elements = list(metadata.time_series_results)
+        if existing_elements:
+            _update_element_series_ids(existing_elements[0], series_ids)
+        elif series_rows:
+            # an element can be created with one series id only
+            element = metadata.create_element('timeseriesresult',
+                                              **_get_timeseriesresult_data(series_rows[0]))
+            if len(series_ids) > 1:
+                _update_element_series_ids(element, series_ids[1:])
+        return
+
+    cv_terms_used = set()
+    data_dicts_to_bulk_create = []
+    for row in series_rows:
+        data_dict = _get_timeseriesresult_data(row)
+        cv_terms = (data_dict['status'], data_dict['sample_medium'], data_dict['units_type'],
+                    data_dict['aggregation_statistics'])
+        if cv_terms not in cv_terms_used:
+            cv_terms_used.add(cv_terms)
+            metadata.create_element('timeseriesresult', **data_dict)
+        else:
+            data_dicts_to_bulk_create.append(data_dict)
+    TimeSeriesResult.create_in_bulk(metadata, data_dicts_to_bulk_create)
+
+
+def _get_timeseriesresult_data(row):
+    return {'series_ids': [row["ResultUUID"]],
+            'status': row["StatusCV"],
+            'sample_medium': row["SampledMediumCV"],
+            'value_count': row["ValueCount"],
+            'units_type': row["UnitsTypeCV"],
+            'units_name': row["UnitsName"],
+            'units_abbreviation': row["UnitsAbbreviation"],
+            'aggregation_statistics': row["AggregationStatisticCV"]}
+
+
+def _update_element_series_ids(element, series_ids):
+    element.series_ids = element.series_ids + series_ids
     element.save()
 
 
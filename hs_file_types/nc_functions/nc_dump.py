@@ -6,7 +6,8 @@ There are two ways to get the netcdf header string.
 1) method1 run ncdump -h by python subprocess module: get_nc_dump_string_by_ncdump()
 2) method2 use the netCDF4 python lib to look into the netcdf to extract the the header info:
    get_nc_dump_string()
-3) get_netcdf_header_file() will try the first method and if it fails it will call the second method
+3) get_nc_header_string() will try the first method and if it fails it will call the second method.
+   get_netcdf_header_file() writes that string to a text file
 
 NOTES:
 1) make sure the 'ncdump' is registered by the system path. otherwise suprocess won't recoganize
@@ -45,13 +46,25 @@ def get_netcdf_header_file(nc_file_name, dump_folder=''):
     nc_file_basename = '.'.join(basename(nc_file_name).split('.')[:-1])
     nc_dump_file_folder = dump_folder if dump_folder else os.getcwd()
     nc_dump_file_name = nc_dump_file_folder + '/' + nc_file_basename + '_header_info.txt'
-    nc_dump_file = open(nc_dump_file_name, 'w')
 
     # write the nc_dump string in text fle
-    dump_string = get_nc_dump_string_by_ncdump(nc_file_name) \
-        if get_nc_dump_string_by_ncdump(nc_file_name) else get_nc_dump_string(nc_file_name)
-    if dump_string:
-        nc_dump_file.write(dump_string)
+    dump_string = get_nc_header_string(nc_file_name)
+    with open(nc_dump_file_name, 'w') as nc_dump_file:
+        if dump_string:
+            nc_dump_file.write(dump_string)
+
+
+def get_nc_header_string(nc_file_name, nc_dataset=None):
+    """
+    (string, object) -> string
+
+    Return: string created by running "ncdump -h" for the netcdf file, or by the python netCDF4
+            lib if ncdump fails. An already opened dataset of the file can be passed in to be
+            used by the latter (it is not closed).
+    """
+
+    return get_nc_dump_string_by_ncdump(nc_file_name) or \
+        get_nc_dump_string(nc_file_name, nc_dataset)
 
 
 def get_nc_dump_string_by_ncdump(nc_file_name):
@@ -70,14 +83,17 @@ def get_nc_dump_string_by_ncdump(nc_file_name):
     return nc_dump_string
 
 
-def get_nc_dump_string(nc_file_name):
+def get_nc_dump_string(nc_file_name, nc_dataset=None):
     """
-    (string) -> string
+    (string, object) -> string
 
     Return: string created by python netCDF4 lib similar as the "ncdump -h" command for netcdf file.
+            The dataset is opened from the file unless an opened one is passed in.
     """
+    opened_dataset = None
     try:
-        nc_dataset = get_nc_dataset(nc_file_name)
+        if nc_dataset is None:
+            nc_dataset = opened_dataset = get_nc_dataset(nc_file_name)
         nc_file_basename = '.'.join(basename(nc_file_name).split('.')[:-1])
         nc_dump_dict = get_nc_dump_dict(nc_dataset)
         if nc_dump_dict:
@@ -87,6 +103,9 @@ def get_nc_dump_string(nc_file_name):
             nc_dump_string = ''
     except Exception:
         nc_dump_string = ''
+    finally:
+        if opened_dataset is not None:
+            opened_dataset.close()
 
     return nc_dump_string
 
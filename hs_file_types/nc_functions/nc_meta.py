@@ -16,6 +16,7 @@ coverage info by acdd:
 """
 
 import json
+from collections import namedtuple
 
 import re
 import osr
@@ -25,6 +26,11 @@ from pyproj import Proj, transform
 from nc_utils import get_nc_dataset, get_nc_grid_mapping_projection_import_string_dict,\
     get_nc_variables_coordinate_type_mapping, get_nc_grid_mapping_crs_name, \
     get_nc_variable_coordinate_meta
+from nc_dump import get_nc_header_string
+
+# result of get_nc_meta(): the dublin core metadata (including the coverages and the original
+# coverage), the type specific metadata (variables) and the header ("ncdump -h") string
+NetCDFMeta = namedtuple('NetCDFMeta', ['dublin_core_meta', 'type_specific_meta', 'header_string'])
 
 
 def get_nc_meta_json(nc_file_name):
@@ -65,6 +71,28 @@ def get_nc_meta_dict(nc_file_name):
     return res_dublin_core_meta, res_type_specific_meta
 
 
+def get_nc_meta(nc_file_name, nc_dataset=None):
+    """
+    (string, object)-> NetCDFMeta
+
+    Return: the netCDF Dublincore and Type specific Metadata together with the header string
+            of the file, all extracted from one opened dataset. If the dataset of the file is
+            already opened it can be passed in. The dataset is closed in either case.
+    """
+
+    if nc_dataset is None:
+        nc_dataset = get_nc_dataset(nc_file_name)
+
+    try:
+        dublin_core_meta = get_dublin_core_meta(nc_dataset)
+        type_specific_meta = get_type_specific_meta(nc_dataset)
+        header_string = get_nc_header_string(nc_file_name, nc_dataset)
+    finally:
+        nc_dataset.close()
+
+    return NetCDFMeta(dublin_core_meta, type_specific_meta, header_string)
+
+
 # Functions for dublin core meta
 def get_dublin_core_meta(nc_dataset):
     """
@@ -131,15 +159,19 @@ def extract_nc_coverage_meta(nc_dataset):
 
     projection_info = get_projection_info(nc_dataset)
 
-    period_info = get_period_info(nc_dataset)
+    # the coordinate variables are classified once and shared by all the coverage lookups
+    coor_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
+
+    period_info = get_period_info(nc_dataset, coor_type_mapping)
+
+    original_box_info = get_original_box_info(nc_dataset, coor_type_mapping)
+    box_info = get_box_info(nc_dataset, coor_type_mapping, dict(original_box_info))
 
-    original_box_info = get_original_box_info(nc_dataset)
     for name in original_box_info.keys():
         original_box_info[name] = str(original_box_info[name])
         if name == 'units' and original_box_info[name].lower() == 'm':
             original_box_info[name] = 'Meter'
 
-    box_info = get_box_info(nc_dataset)
     for name in box_info.keys():
         box_info[name] = str(box_info[name])
 
@@ -164,17 +196,16 @@ def get_projection_info(nc_dataset):
     return projection_info
 
 
-def get_period_info(nc_dataset):
+def get_period_info(nc_dataset, coor_type_mapping=None):
     """
-    (object)-> dict
+    (object, dict)-> dict
 
     Return: the netCDF original coverage period info
     """
 
-    if get_period_info_by_acdd_convention(nc_dataset):
-        period_info = get_period_info_by_acdd_convention(nc_dataset)
-    else:
-        period_info = get_period_info_by_data(nc_dataset)
+    period_info = get_period_info_by_acdd_convention(nc_dataset)
+    if not period_info:
+        period_info = get_period_info_by_data(nc_dataset, coor_type_mapping)
 
     return period_info
 
@@ -196,15 +227,16 @@ def get_period_info_by_acdd_convention(nc_dataset):
     return period_info
 
 
-def get_period_info_by_data(nc_dataset):
+def get_period_info_by_data(nc_dataset, coor_type_mapping=None):
     """
-    (object)-> dict
+    (object, dict)-> dict
 
     Return: the netCDF original coverage period info by looking into the data
     """
 
     period_info = {}
-    coor_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
+    if coor_type_mapping is None:
+        coor_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
     for coor_type in ['TA', 'TC']:
         limit_meta = get_limit_meta_by_coor_type(nc_dataset, coor_type, coor_type_mapping)
         try:
@@ -219,14 +251,16 @@ def get_period_info_by_data(nc_dataset):
     return period_info
 
 
-def get_box_info(nc_dataset):
+def get_box_info(nc_dataset, coor_type_mapping=None, original_box_info=None):
     """
-    (object)-> dict
+    (object, dict, dict)-> dict
 
-    Return: the netCDF coverage box info as wgs84 crs
+    Return: the netCDF coverage box info as wgs84 crs. The original box info is looked up
+            from the dataset unless it is given.
     """
     box_info = {}
-    original_box_info = get_original_box_info(nc_dataset)
+    if original_box_info is None:
+        original_box_info = get_original_box_info(nc_dataset, coor_type_mapping)
 
     if original_box_info:
         if original_box_info.get('units', '').lower() == 'degree':  # geographic coor x, y
@@ -309,18 +343,19 @@ def check_lon_limit(westlimit, eastlimit):
     return [westlimit, eastlimit]
 
 
-def get_original_box_info(nc_dataset):
+def get_original_box_info(nc_dataset, coor_type_mapping=None):
     """
-    (object)-> dict
+    (object, dict)-> dict
 
     Return: the netCDF original coverage box info
     """
 
-    original_box_info = get_original_box_info_by_data(nc_dataset)
+    original_box_info = get_original_box_info_by_data(nc_dataset, coor_type_mapping)
 
-    if original_box_info.get('units', '') == 'degree' and \
-            get_original_box_info_by_acdd_convention(nc_dataset):
-        original_box_info = get_original_box_info_by_acdd_convention(nc_dataset)
+    if original_box_info.get('units', '') == 'degree':
+        acdd_box_info = get_original_box_info_by_acdd_convention(nc_dataset)
+        if acdd_box_info:
+            original_box_info = acdd_box_info
 
     return original_box_info
 
@@ -348,17 +383,19 @@ def get_original_box_info_by_acdd_convention(nc_dataset):
     return original_box_info
 
 
-def get_original_box_info_by_data(nc_dataset):
+def get_original_box_info_by_data(nc_dataset, coor_type_mapping=None):
     """
-    (object)-> dict
+    (object, dict)-> dict
 
     Return: the netCDF original coverage box info by looking into the data
     """
 
     original_box_info = {}
+    if coor_type_mapping is None:
+        coor_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
 
     for info_source in ['A', 'C']:  # check auxiliary and coordinate variables
-        limits_info = get_limits_info(nc_dataset, info_source)
+        limits_info = get_limits_info(nc_dataset, info_source, coor_type_mapping)
         if limits_info:
             original_box_info = limits_info
             original_box_info['projection'] = get_nc_grid_mapping_crs_name(nc_dataset)
@@ -367,15 +404,16 @@ def get_original_box_info_by_data(nc_dataset):
     return original_box_info
 
 
-def get_limits_info(nc_dataset, info_source):
+def get_limits_info(nc_dataset, info_source, coor_type_mapping=None):
     """
-    (obj, str) -> dict
+    (obj, str, dict) -> dict
 
     Return: dictionary including the 4 box limits name and their values and the units
     """
 
     limits_info = {}
-    coor_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
+    if coor_type_mapping is None:
+        coor_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
 
     # get all limits values and units
     for coor_dir in ['X', 'Y']:
@@ -410,7 +448,8 @@ def get_limit_meta_by_coor_type(nc_dataset, coor_type, coor_type_mapping):
         if coor_type_name in coor_type_list:
             index = coor_type_list.index(coor_type_name)
             var_name = var_name_list[index]
-            var_coor_meta = get_nc_variable_coordinate_meta(nc_dataset, var_name)
+            var_coor_meta = get_nc_variable_coordinate_meta(nc_dataset, var_name,
+                                                            coor_type_mapping)
 
             if var_coor_meta.get('coordinate_start') is not None:
                 coor_start.append(var_coor_meta.get('coordinate_start'))
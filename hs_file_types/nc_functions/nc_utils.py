@@ -142,29 +142,32 @@ def get_nc_variable_coordinate_type(nc_variable):
     return 'Unknown'
 
 
-def get_nc_variable_coordinate_meta(nc_dataset, nc_variable_name):
+def get_nc_variable_coordinate_meta(nc_dataset, nc_variable_name,
+                                    nc_variables_coordinate_type_mapping=None):
     """
-    (object)-> dict
+    (object, string, dict)-> dict
 
     Return: coordinate meta data if the variable is related to a coordinate type:
             coordinate or auxiliary coordinate variable or bounds variable
+
+    The coordinate type mapping of the dataset can be passed in by callers looking up more than
+    one variable so that it is only computed once per dataset.
     """
-    nc_variables_coordinate_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
+    if nc_variables_coordinate_type_mapping is None:
+        nc_variables_coordinate_type_mapping = get_nc_variables_coordinate_type_mapping(nc_dataset)
     nc_variable_coordinate_meta = {}
-    if nc_variable_name in nc_variables_coordinate_type_mapping.keys():
+    if nc_variable_name in nc_variables_coordinate_type_mapping:
         nc_variable = nc_dataset.variables[nc_variable_name]
-        nc_variable_data = nc_variable[:]
         nc_variable_coordinate_type = nc_variables_coordinate_type_mapping[nc_variable_name]
         coordinate_max = None
         coordinate_min = None
-        if nc_variable_data.size:
-            coordinate_min = nc_variable_data[numpy.unravel_index(nc_variable_data.argmin(),
-                                                                  nc_variable_data.shape)]
-            coordinate_max = nc_variable_data[numpy.unravel_index(nc_variable_data.argmax(),
-                                                                  nc_variable_data.shape)]
+        if nc_variable.size:
+            coordinate_min, coordinate_max = get_nc_variable_min_max(
+                nc_variable, is_coordinate_variable=nc_variable_coordinate_type.endswith('C'))
             coordinate_units = nc_variable.units if hasattr(nc_variable, 'units') else ''
 
-            if nc_variable_coordinate_type in ['TC', 'TA', 'TC_bnd', 'TA_bnd']:
+            if coordinate_min is not None and \
+                    nc_variable_coordinate_type in ['TC', 'TA', 'TC_bnd', 'TA_bnd']:
                 index = nc_variables_coordinate_type_mapping.values().index(
                     nc_variable_coordinate_type[:2])
                 var_name = nc_variables_coordinate_type_mapping.keys()[index]
@@ -192,6 +195,66 @@ def get_nc_variable_coordinate_meta(nc_dataset, nc_variable_name):
     return nc_variable_coordinate_meta
 
 
+# max number of values read from a variable at once when computing its min and max values
+NC_VARIABLE_READ_CHUNK_SIZE = 1000000
+
+# number of evenly spaced values of a coordinate variable checked to be monotonic before its
+# first and last values are taken as its min and max values
+NC_COORDINATE_SAMPLE_SIZE = 1000
+
+
+def get_nc_variable_min_max(nc_variable, is_coordinate_variable=False):
+    """
+    (object, bool)-> tuple
+
+    Return: the (min, max) values of the variable ignoring masked (fill) values, or
+            (None, None) if the variable has no valid value.
+
+    A coordinate variable should be monotonic (COARDS/CF convention), but real-world files
+    don't always follow it. So its first and last values are only used as its min and max when
+    a sample of NC_COORDINATE_SAMPLE_SIZE evenly spaced values (all of them for a shorter
+    variable) is monotonic. Any other variable is reduced in chunks of at most
+    NC_VARIABLE_READ_CHUNK_SIZE values along its first dimension so that memory use doesn't
+    depend on the size of the variable.
+    """
+    shape = nc_variable.shape
+    if is_coordinate_variable and len(shape) == 1 and shape[0]:
+        stride = max(1, shape[0] // NC_COORDINATE_SAMPLE_SIZE)
+        sample = numpy.ma.asarray(nc_variable[::stride])
+        last = nc_variable[shape[0] - 1]
+        if not numpy.ma.is_masked(sample) and not numpy.ma.is_masked(last):
+            steps = numpy.diff(numpy.append(sample, last))
+            if (steps >= 0).all() or (steps <= 0).all():
+                first = sample[0]
+                return (first, last) if first <= last else (last, first)
+
+    if not shape:
+        values = numpy.ma.asarray(nc_variable[...])
+        if values.count():
+            return values.min(), values.max()
+        return None, None
+
+    row_size = 1
+    for dim_size in shape[1:]:
+        row_size *= dim_size
+    rows_per_chunk = max(1, NC_VARIABLE_READ_CHUNK_SIZE // max(row_size, 1))
+
+    coordinate_min = None
+    coordinate_max = None
+    for start in range(0, shape[0], rows_per_chunk):
+        chunk = numpy.ma.asarray(nc_variable[start:start + rows_per_chunk])
+        if not chunk.count():
+            continue
+        chunk_min = chunk.min()
+        chunk_max = chunk.max()
+        if coordinate_min is None or chunk_min < coordinate_min:
+            coordinate_min = chunk_min
+        if coordinate_max is None or chunk_max > coordinate_max:
+            coordinate_max = chunk_max
+
+    return coordinate_min, coordinate_max
+
+
 # Functions for Coordinate Variable
 # coordinate variable has the following attributes:
 # 1) it has 1 dimension
@@ -17,23 +17,30 @@ import gdal
 from gdalconst import GA_ReadOnly
 from osgeo import osr
 from collections import OrderedDict
+import math
+import os
 import re
 import logging
+import xml.etree.ElementTree as ET
 import pycrs
 import numpy
 
+# number of cells of a raster band read at once when computing the band statistics
+BAND_READ_CELL_COUNT = 1000000
 
-def get_raster_meta_dict(raster_file_name):
+
+def get_raster_meta_dict(raster_file_name, sample_size=None):
     """
     (string)-> dict
 
     Return: the raster science metadata extracted from the raster file
+    sample_size: see get_band_info()
     """
 
     # get the metadata info from raster files
     spatial_coverage_info = get_spatial_coverage_info(raster_file_name)
     cell_info = get_cell_info(raster_file_name)
-    band_info = get_band_info(raster_file_name)
+    band_info = get_band_info(raster_file_name, sample_size=sample_size)
 
     # write meta as dictionary
     raster_meta_dict = {
@@ -274,13 +281,18 @@ def get_cell_info(raster_file_name):
     return cell_info
 
 
-def get_band_info(raster_file_name):
+def get_band_info(raster_file_name, sample_size=None):
+    """
+    Return the band information (name, unit, no data value and min/max values) of each band
+    of the raster file.
 
-    raster_dataset = gdal.Open(raster_file_name, GA_ReadOnly)
+    :param raster_file_name: path of the raster file
+    :param sample_size: if given, the min/max values of a band with more cells than this are
+    computed from about sample_size cells read at a reduced resolution (GDAL uses the
+    overviews of the raster when it has any) instead of from all the cells of the band
+    """
 
-    import os
-    ori_dir = os.getcwd()
-    os.chdir(os.path.dirname(raster_file_name))
+    raster_dataset = _open_raster_dataset(raster_file_name)
 
     # get raster band count
     if raster_dataset:
@@ -289,24 +301,13 @@ def get_band_info(raster_file_name):
 
         for i in range(0, band_count):
             band = raster_dataset.GetRasterBand(i+1)
-            minimum, maximum, _, _ = band.ComputeStatistics(False)
-            no_data = band.GetNoDataValue()
-            new_no_data = None
-
-            if no_data and numpy.allclose(minimum, no_data):
-                new_no_data = minimum
-            elif no_data and numpy.allclose(maximum, no_data):
-                new_no_data = maximum
-
-            if new_no_data is not None:
-                band.SetNoDataValue(new_no_data)
-                minimum, maximum, _, _ = band.ComputeStatistics(False)
+            no_data, minimum, maximum = _get_band_statistics(band, sample_size)
 
             band_info[i+1] = {
                 'name': 'Band_'+str(i+1),
                 'variableName': '',
                 'variableUnit': band.GetUnitType(),
-                'noDataValue': band.GetNoDataValue(),
+                'noDataValue': no_data,
                 'maximumValue': maximum,
                 'minimumValue': minimum,
                 }
@@ -321,5 +322,123 @@ def get_band_info(raster_file_name):
         }
 
     raster_dataset = None
-    os.chdir(ori_dir)
     return band_info
+
+
+def is_sampled_band_statistics(raster_file_name, sample_size):
+    """
+    Return True if get_band_info() with this sample_size computes the min/max values of any
+    band of the raster file from a sample of its cells.
+    """
+    if not sample_size:
+        return False
+    raster_dataset = gdal.Open(raster_file_name, GA_ReadOnly)
+    if not raster_dataset:
+        return False
+    return raster_dataset.RasterXSize * raster_dataset.RasterYSize > sample_size
+
+
+def _open_raster_dataset(raster_file_name):
+    """
+    Open the raster file read only. The relative source file names of a .vrt file are
+    resolved against the folder of the .vrt file (where HydroShare keeps the source files)
+    even if the .vrt file doesn't say so, without changing the working directory of the
+    process.
+    """
+    if os.path.splitext(raster_file_name)[1] != '.vrt':
+        return gdal.Open(raster_file_name, GA_ReadOnly)
+
+    vrt_dir = os.path.dirname(os.path.abspath(raster_file_name))
+    try:
+        tree = ET.parse(raster_file_name)
+    except ET.ParseError:
+        return gdal.Open(raster_file_name, GA_ReadOnly)
+
+    source_elements = [element for element in tree.getroot().iter('SourceFilename')
+                       if element.text and not os.path.isabs(element.text)]
+    if not source_elements:
+        return gdal.Open(raster_file_name, GA_ReadOnly)
+
+    for element in source_elements:
+        element.text = os.path.join(vrt_dir, element.text)
+        element.attrib['relativeToVRT'] = '0'
+    # GDAL opens a VRT dataset from its XML content as well
+    return gdal.Open(ET.tostring(tree.getroot()), GA_ReadOnly)
+
+
+def _iter_band_data(band, sample_size=None):
+    """
+    Yield the cell values of the band as arrays: either one array of about sample_size cells
+    read at a reduced resolution, or all the cells of the band in windows of whole blocks
+    of about BAND_READ_CELL_COUNT cells.
+    """
+    x_size, y_size = band.XSize, band.YSize
+    if sample_size and x_size * y_size > sample_size:
+        scale = math.sqrt(float(sample_size) / (x_size * y_size))
+        yield band.ReadAsArray(0, 0, x_size, y_size,
+                               max(int(x_size * scale), 1), max(int(y_size * scale), 1))
+        return
+
+    block_rows = max(band.GetBlockSize()[1], 1)
+    window_rows = max(BAND_READ_CELL_COUNT // max(x_size, 1) // block_rows, 1) * block_rows
+    for y_offset in range(0, y_size, window_rows):
+        yield band.ReadAsArray(0, y_offset, x_size, min(window_rows, y_size - y_offset))
+
+
+def _get_band_statistics(band, sample_size=None):
+    """
+    Return (no data value, min value, max value) of the band computed in one read of the band.
+
+    As GDAL ComputeStatistics() the min/max values leave out the no data cells. If the no data
+    value is only about equal to the min (or max) cell value (e.g. after a float conversion) it
+    is replaced by that cell value, and the min (or max) value is computed again leaving out
+    the cells of that value. So the two smallest and the two largest distinct cell values are
+    kept while reading the band.
+    """
+    no_data = band.GetNoDataValue()
+    # the (up to) two smallest and two largest distinct values of the cells other than the
+    # no data cells
+    smallest = []
+    largest = []
+    for data in _iter_band_data(band, sample_size):
+        data = data.ravel()
+        if data.dtype.kind == 'f':
+            data = data[~numpy.isnan(data)]
+        if no_data is not None:
+            data = data[data != no_data]
+        if data.size == 0:
+            continue
+        smallest = _extreme_values(smallest, data, largest=False)
+        largest = _extreme_values(largest, data, largest=True)
+
+    if not smallest:
+        return no_data, None, None
+
+    minimum, maximum = smallest[0], largest[0]
+    if no_data and numpy.allclose(minimum, no_data):
+        no_data = float(minimum)
+        minimum = smallest[1] if len(smallest) > 1 else None
+        maximum = maximum if maximum != no_data else None
+    elif no_data and numpy.allclose(maximum, no_data):
+        no_data = float(maximum)
+        maximum = largest[1] if len(largest) > 1 else None
+        minimum = minimum if minimum != no_data else None
+    minimum = float(minimum) if minimum is not None else None
+    maximum = float(maximum) if maximum is not None else None
+    return no_data, minimum, maximum
+
+
+def _extreme_values(current, data, largest):
+    """
+    Return the (up to) two smallest (or largest) distinct values among the values in the list
+    *current* and the non-empty array *data*, in order from the most extreme.
+    """
+    if largest:
+        first = data.max()
+        rest = data[data < first]
+        candidates = [first, rest.max()] if rest.size else [first]
+    else:
+        first = data.min()
+        rest = data[data > first]
+        candidates = [first, rest.min()] if rest.size else [first]
+    return sorted(set(current) | set(candidates), reverse=largest)[:2]
@@ -0,0 +1,84 @@
+"""Define celery tasks for hs_file_types app."""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import logging
+from uuid import uuid4
+
+from django.conf import settings
+
+from celery import shared_task
+
+from hs_file_types import raster_meta_extract
+
+
+# Pass 'django' into getLogger instead of __name__
+# for celery tasks (as this seems to be the
+# only way to successfully log in code executed
+# by celery, despite our catch-all handler).
+logger = logging.getLogger('django')
+
+
+@shared_task
+def update_raster_band_statistics(logical_file_id):
+    """Update the band min/max values of a geo raster logical file with the exact values.
+
+    When a raster file type is set the band min/max values of a large raster are computed from
+    a sample of the raster cells (see settings.RASTER_BAND_STATS_SAMPLE_SIZE) so that setting
+    the file type returns quickly. This task copies the raster files from iRODS and computes
+    the min/max values from all the raster cells.
+    :param logical_file_id: id of the GeoRasterLogicalFile
+    :return: True if the band information was updated, otherwise False
+    """
+    # had to import it here to avoid import loop
+    from hs_file_types.models import GeoRasterLogicalFile
+
+    try:
+        logical_file = GeoRasterLogicalFile.objects.get(id=logical_file_id)
+    except GeoRasterLogicalFile.DoesNotExist:
+        logger.error("Geo raster logical file {} no longer exists.".format(logical_file_id))
+        return False
+
+    res_files = list(logical_file.files.all())
+    vrt_files = [f for f in res_files if f.extension == '.vrt']
+    if not vrt_files:
+        logger.error("Geo raster logical file {} has no vrt file.".format(logical_file_id))
+        return False
+
+    # the tif files have to be in the same folder as the vrt file that references them
+    temp_dir = os.path.join(settings.TEMP_FILE_DIR, uuid4().hex)
+    os.makedirs(temp_dir)
+    try:
+        istorage = res_files[0].resource.get_irods_storage()
+        for res_file in res_files:
+            istorage.getFile(res_file.storage_path,
+                             os.path.join(temp_dir, os.path.basename(res_file.storage_path)))
+        vrt_file_path = os.path.join(temp_dir, os.path.basename(vrt_files[0].storage_path))
+        band_info = raster_meta_extract.get_band_info(vrt_file_path)
+    except Exception as ex:
+        logger.error("Failed to compute band statistics of geo raster logical file {}. "
+                     "Error:{}".format(logical_file_id, ex.message))
+        return False
+    finally:
+        shutil.rmtree(temp_dir)
+
+    if 'name' in band_info:
+        # the raster couldn't be opened - get_band_info() returned the default band information
+        logger.error("Failed to open the raster of geo raster logical file {}.".format(
+            logical_file_id))
+        return False
+
+    # the band information elements were created in the band order - band names may have been
+    # edited since
+    metadata = logical_file.metadata
+    band_elements = metadata.bandInformations.order_by('id')
+    for band_element, band_number in zip(band_elements, sorted(band_info.keys())):
+        band_element.noDataValue = band_info[band_number]['noDataValue']
+        band_element.maximumValue = band_info[band_number]['maximumValue']
+        band_element.minimumValue = band_info[band_number]['minimumValue']
+        band_element.save()
+    metadata.is_dirty = True
+    metadata.save()
+    return True
@@ -0,0 +1,44 @@
+import numpy
+from django.test import SimpleTestCase
+from mock import patch
+
+from hs_file_types.nc_functions.nc_utils import get_nc_variable_min_max
+
+
+class TestNCVariableMinMax(SimpleTestCase):
+    """Masked numpy arrays stand in for netCDF variables: both are sliced the same way."""
+
+    def test_monotonic_coordinate(self):
+        increasing = numpy.ma.arange(10.0, 20.0)
+        self.assertEqual(get_nc_variable_min_max(increasing, is_coordinate_variable=True),
+                         (10.0, 19.0))
+        decreasing = increasing[::-1]
+        self.assertEqual(get_nc_variable_min_max(decreasing, is_coordinate_variable=True),
+                         (10.0, 19.0))
+
+    def test_non_monotonic_coordinate(self):
+        values = numpy.ma.array([0.0, 5.0, -3.0, 2.0])
+        self.assertEqual(get_nc_variable_min_max(values, is_coordinate_variable=True),
+                         (-3.0, 5.0))
+
+    @patch('hs_file_types.nc_functions.nc_utils.NC_COORDINATE_SAMPLE_SIZE', 4)
+    def test_non_monotonic_coordinate_sample(self):
+        # the sample (every 3rd value and the last one) shows that the values go back and forth
+        values = numpy.ma.array([0.0, 1.0, 2.0, 9.0, 10.0, 11.0, -5.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+        self.assertEqual(get_nc_variable_min_max(values, is_coordinate_variable=True),
+                         (-5.0, 11.0))
+
+    def test_masked_coordinate_values(self):
+        values = numpy.ma.array([-999.0, 1.0, 3.0, 2.0, -999.0], mask=[1, 0, 0, 0, 1])
+        self.assertEqual(get_nc_variable_min_max(values, is_coordinate_variable=True),
+                         (1.0, 3.0))
+
+    @patch('hs_file_types.nc_functions.nc_utils.NC_VARIABLE_READ_CHUNK_SIZE', 4)
+    def test_chunked_variable(self):
+        values = numpy.ma.arange(24.0).reshape(6, 4)
+        values[4, 2] = -1.0
+        values[0, 0] = numpy.ma.masked
+        self.assertEqual(get_nc_variable_min_max(values), (-1.0, 23.0))
+
+        all_masked = numpy.ma.masked_all((3, 2))
+        self.assertEqual(get_nc_variable_min_max(all_masked), (None, None))
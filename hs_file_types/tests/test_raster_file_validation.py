@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from unittest import TestCase
+
+from hs_file_types.models.raster import raster_file_validation
+
+
+class RasterFileValidationTest(TestCase):
+    """The test files are copied to a temp folder, as they would be copied from iRODS"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def copy_to_temp_dir(self, file_path):
+        temp_file = os.path.join(self.temp_dir, os.path.basename(file_path))
+        shutil.copy(file_path, temp_file)
+        return temp_file
+
+    def temp_dir_file_names(self):
+        return sorted(os.listdir(self.temp_dir))
+
+    def test_tif_file(self):
+        tif_file = self.copy_to_temp_dir('hs_file_types/tests/small_logan.tif')
+        error_info, files_to_add = raster_file_validation(tif_file)
+        self.assertEqual(error_info, [])
+        vrt_file = os.path.join(self.temp_dir, 'small_logan.vrt')
+        self.assertEqual(files_to_add, [vrt_file, tif_file])
+
+        # the vrt file references the tif file relative to the vrt file
+        source_file_names = ET.parse(vrt_file).getroot().findall('.//SourceFilename')
+        self.assertEqual(len(source_file_names), 1)
+        self.assertEqual(source_file_names[0].text, 'small_logan.tif')
+        self.assertEqual(source_file_names[0].get('relativeToVRT'), '1')
+
+    def test_valid_zip_file(self):
+        zip_file = self.copy_to_temp_dir('hs_file_types/tests/logan_vrt_small.zip')
+        error_info, files_to_add = raster_file_validation(zip_file)
+        self.assertEqual(error_info, [])
+        # the raster files are extracted from their sub folder in the zip file
+        self.assertEqual(sorted(os.path.basename(f) for f in files_to_add),
+                         ['logan.vrt', 'logan1.tif', 'logan2.tif'])
+        self.assertEqual(self.temp_dir_file_names(),
+                         ['logan.vrt', 'logan1.tif', 'logan2.tif', 'logan_vrt_small.zip'])
+
+    def test_invalid_zip_file(self):
+        # two vrt files - validated in the zip file, so nothing gets extracted
+        zip_file = self.copy_to_temp_dir('hs_file_types/tests/bad_small_vrt.zip')
+        error_info, files_to_add = raster_file_validation(zip_file)
+        self.assertEqual(len(error_info), 1)
+        self.assertEqual(files_to_add, [])
+        self.assertEqual(self.temp_dir_file_names(), ['bad_small_vrt.zip'])
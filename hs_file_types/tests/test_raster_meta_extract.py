@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+import numpy
+
+from hs_file_types import raster_meta_extract
+
+
+class TestRasterMetaExtract(TestCase):
+
+    raster_file = 'hs_file_types/tests/small_logan.tif'
+
+    def test_get_band_info(self):
+        band_info = raster_meta_extract.get_band_info(self.raster_file)
+        self.assertEqual(band_info.keys(), [1])
+        self.assertEqual(str(band_info[1]['noDataValue']), '-3.40282346639e+38')
+        self.assertEqual(str(band_info[1]['maximumValue']), '2880.00708008')
+        self.assertEqual(str(band_info[1]['minimumValue']), '2274.95898438')
+
+    def test_get_sampled_band_info(self):
+        exact_band_info = raster_meta_extract.get_band_info(self.raster_file)[1]
+
+        # a sample size larger than the raster gives the exact values
+        self.assertFalse(raster_meta_extract.is_sampled_band_statistics(self.raster_file,
+                                                                        10 ** 9))
+        band_info = raster_meta_extract.get_band_info(self.raster_file, sample_size=10 ** 9)[1]
+        self.assertEqual(band_info, exact_band_info)
+
+        # the min/max values of a sample are within the exact min/max values
+        self.assertTrue(raster_meta_extract.is_sampled_band_statistics(self.raster_file, 100))
+        band_info = raster_meta_extract.get_band_info(self.raster_file, sample_size=100)[1]
+        self.assertEqual(band_info['noDataValue'], exact_band_info['noDataValue'])
+        self.assertGreaterEqual(band_info['minimumValue'], exact_band_info['minimumValue'])
+        self.assertLessEqual(band_info['maximumValue'], exact_band_info['maximumValue'])
+
+    def test_band_statistics_no_data(self):
+        # cells about equal to the no data value are left out of the min/max values only when
+        # the no data value is about equal to the min (or max) value - as GDAL does it
+        band = _ArrayBand([-9999.0002, -9999.0001, 5.0, 10.0], no_data=-9999.0)
+        self.assertEqual(raster_meta_extract._get_band_statistics(band),
+                         (-9999.0002, -9999.0001, 10.0))
+
+        band = _ArrayBand([-9999.0, 5.0, 10.0, 10.0000001], no_data=10.0)
+        self.assertEqual(raster_meta_extract._get_band_statistics(band),
+                         (10.0000001, -9999.0, 5.0))
+
+        # the no data value is not about equal to the min/max values
+        band = _ArrayBand([-9999.0, 1.0, 3.0, 5.0], no_data=3.0)
+        self.assertEqual(raster_meta_extract._get_band_statistics(band), (3.0, -9999.0, 5.0))
+
+        band = _ArrayBand([7.0, 7.0], no_data=7.0)
+        self.assertEqual(raster_meta_extract._get_band_statistics(band), (7.0, None, None))
+
+
+class _ArrayBand(object):
+    """Stands in for a GDAL raster band of one row of cells"""
+
+    def __init__(self, values, no_data):
+        self.values = numpy.array([values], dtype=numpy.float64)
+        self.no_data = no_data
+        self.YSize, self.XSize = self.values.shape
+
+    def GetNoDataValue(self):
+        return self.no_data
+
+    def GetBlockSize(self):
+        return [self.XSize, 1]
+
+    def ReadAsArray(self, x_offset, y_offset, x_size, y_size, *buf_size):
+        return self.values[y_offset:y_offset + y_size, x_offset:x_offset + x_size]
@@ -1,4 +1,5 @@
 import os
+import json
 import tempfile
 import shutil
 
@@ -12,7 +13,8 @@ from hs_core import hydroshare
 from hs_core.hydroshare.utils import resource_post_create_actions
 from utils import assert_ref_time_series_file_type_metadata
 
-from hs_file_types.models import RefTimeseriesLogicalFile, GenericLogicalFile
+from hs_file_types.models import RefTimeseriesLogicalFile, RefTimeseriesFileMetaData, \
+    GenericLogicalFile
 
 
 class RefTimeseriesFileTypeMetaDataTest(MockIRODSTestCaseMixin, TransactionTestCase):
@@ -77,6 +79,24 @@ class RefTimeseriesFileTypeMetaDataTest(MockIRODSTestCaseMixin, TransactionTestC
 
         self.composite_resource.delete()
 
+    def test_json_file_content_parsed_once(self):
+        with open(self.refts_file, 'r') as refts_file:
+            json_file_content = refts_file.read()
+        metadata = RefTimeseriesFileMetaData(json_file_content=json_file_content)
+
+        # the data derived from the json file content is built once
+        self.assertIs(metadata.series_list, metadata.series_list)
+        self.assertIs(metadata.time_series_list, metadata.time_series_list)
+        self.assertIs(metadata.sites, metadata.sites)
+        series_count = len(metadata.series_list)
+
+        # new json file content is parsed again
+        json_data_dict = json.loads(json_file_content)
+        json_data_dict['timeSeriesReferenceFile']['referencedTimeSeries'].pop()
+        metadata.json_file_content = json.dumps(json_data_dict)
+        self.assertEqual(len(metadata.series_list), series_count - 1)
+        self.assertEqual(len(metadata.time_series_list), series_count - 1)
+
     def test_set_file_type_to_refts_res_metadata(self):
         # here we are using a valid time series json file for setting it
         # to RefTimeSeries file type which includes metadata extraction.
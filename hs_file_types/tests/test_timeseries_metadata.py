@@ -1,12 +1,15 @@
 import os
+import sqlite3
 import tempfile
 import shutil
 
-from django.test import TransactionTestCase
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase
 from django.contrib.auth.models import Group
 from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError
 
+from mock import patch
 from rest_framework.exceptions import ValidationError as DRF_ValidationError
 
 from hs_core.testing import MockIRODSTestCaseMixin
@@ -18,7 +21,7 @@ from hs_app_timeseries.models import Site, Variable, Method, ProcessingLevel, Ti
 from hs_file_types.models import TimeSeriesLogicalFile, GenericLogicalFile, TimeSeriesFileMetaData
 from hs_file_types.models.timeseries import CVVariableType, CVVariableName, CVSpeciation, \
     CVSiteType, CVElevationDatum, CVMethodType, CVMedium, CVUnitsType, CVStatus, \
-    CVAggregationStatistic
+    CVAggregationStatistic, validate_odm2_db_file, _get_odm2_schema_cache_key
 from utils import assert_time_series_file_type_metadata
 
 
@@ -95,6 +98,34 @@ class TimeSeriesFileTypeMetaDataTest(MockIRODSTestCaseMixin, TransactionTestCase
         # self.assertEqual(logical_file.metadata.keywords[0], 'Snow water equivalent')
         self.composite_resource.delete()
 
+    def test_sqlite_extracted_timeseries_results(self):
+        # the time series result elements (most of them created in bulk) match the ones
+        # created one at a time from the same sqlite file before the bulk insert was introduced
+        self.sqlite_file_obj = open(self.sqlite_file, 'r')
+        self._create_composite_resource(title='Untitled Resource')
+        res_file = self.composite_resource.files.first()
+        TimeSeriesLogicalFile.set_file_type(self.composite_resource, res_file.id, self.user)
+
+        logical_file = self.composite_resource.files.first().logical_file
+        extracted = sorted(
+            (ts_result.series_ids, ts_result.status, ts_result.sample_medium,
+             ts_result.value_count, ts_result.units_type, ts_result.units_name,
+             ts_result.units_abbreviation, ts_result.aggregation_statistics,
+             ts_result.is_dirty)
+            for ts_result in logical_file.metadata.time_series_results)
+        value_counts = [('182d8fa3-1ebc-11e6-ad49-f45c8999816f', 1441),
+                        ('2837b7d9-1ebc-11e6-a16e-f45c8999816f', 1334),
+                        ('33d63705-1ebc-11e6-b8cd-f45c8999816f', 1441),
+                        ('3b9037f8-1ebc-11e6-a304-f45c8999816f', 1441),
+                        ('42fbff7a-1ebc-11e6-ae3e-f45c8999816f', 1441),
+                        ('4a6f095c-1ebc-11e6-8a10-f45c8999816f', 1441),
+                        ('51e31687-1ebc-11e6-aa6c-f45c8999816f', 1441)]
+        expected = [([series_id], 'Unknown', 'Surface Water', value_count, 'Temperature',
+                     'degree celsius', 'degC', 'Average', False)
+                    for series_id, value_count in value_counts]
+        self.assertEqual(extracted, expected)
+        self.composite_resource.delete()
+
     def test_CSV_set_file_type_to_timeseries(self):
         # here we are using a valid CSV file for setting it
         # to TimeSeries file type which includes metadata extraction
@@ -735,3 +766,63 @@ class TimeSeriesFileTypeMetaDataTest(MockIRODSTestCaseMixin, TransactionTestCase
         target_temp_csv_file = os.path.join(self.temp_dir, invalid_csv_file_name)
         shutil.copy(invalid_csv_file, target_temp_csv_file)
         return open(target_temp_csv_file, 'r')
+
+
+class ODM2FileValidationTest(SimpleTestCase):
+    def setUp(self):
+        super(ODM2FileValidationTest, self).setUp()
+        cache.clear()
+        self.temp_dir = tempfile.mkdtemp()
+        self.sqlite_file = os.path.join(self.temp_dir, 'ODM2.sqlite')
+        shutil.copy('hs_file_types/tests/data/ODM2_Multi_Site_One_Variable.sqlite',
+                    self.sqlite_file)
+
+    def tearDown(self):
+        super(ODM2FileValidationTest, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+        cache.clear()
+
+    def _execute(self, *sql_statements):
+        con = sqlite3.connect(self.sqlite_file)
+        with con:
+            for sql in sql_statements:
+                con.execute(sql)
+        con.close()
+
+    def test_valid_file(self):
+        self.assertIsNone(validate_odm2_db_file(self.sqlite_file))
+
+    def test_missing_extracted_table(self):
+        self._execute("DROP TABLE TimeSeriesResults")
+        self.assertEqual(validate_odm2_db_file(self.sqlite_file),
+                         "Uploaded file is not a valid ODM2 SQLite file. "
+                         "Table 'TimeSeriesResults' is missing.")
+
+    def test_missing_columns(self):
+        self._execute("ALTER TABLE Sites RENAME TO Sites_old",
+                      "CREATE TABLE Sites (SamplingFeatureID INTEGER, SiteTypeCV VARCHAR(255), "
+                      "Latitude FLOAT)")
+        self.assertEqual(validate_odm2_db_file(self.sqlite_file),
+                         "Uploaded file is not a valid ODM2 SQLite file. "
+                         "Table 'Sites' is missing column(s): Longitude, SpatialReferenceID.")
+
+    def test_schema_cache(self):
+        self.assertIsNone(validate_odm2_db_file(self.sqlite_file))
+        # the table definitions of the valid file are remembered
+        con = sqlite3.connect(self.sqlite_file)
+        table_sqls = dict(con.execute("SELECT name, sql FROM sqlite_master WHERE type='table'"))
+        con.close()
+        self.assertTrue(cache.get(_get_odm2_schema_cache_key(table_sqls)))
+
+        # a change of the checked columns doesn't pick up the remembered table definitions
+        with patch.dict('hs_file_types.models.timeseries.ODM2_CORE_TABLE_COLUMNS',
+                        {'Units': ('UnitsID', 'NoSuchColumn')}):
+            self.assertEqual(validate_odm2_db_file(self.sqlite_file),
+                             "Uploaded file is not a valid ODM2 SQLite file. "
+                             "Table 'Units' is missing column(s): NoSuchColumn.")
+
+        # the records are checked for a file with remembered table definitions
+        self._execute("DELETE FROM Units")
+        self.assertEqual(validate_odm2_db_file(self.sqlite_file),
+                         "Uploaded file is not a valid ODM2 SQLite file. "
+                         "Table 'Units' has no records.")
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import TestCase
+
+from django.core.exceptions import ValidationError
+from mock import patch, MagicMock
+
+from hs_file_types.models import geofeature
+
+
+class ZippedShapeFilesTest(TestCase):
+    """The zip files are copied to a temp folder, as they would be copied from iRODS"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def copy_to_temp_dir(self, file_path):
+        temp_file = os.path.join(self.temp_dir, os.path.basename(file_path))
+        shutil.copy(file_path, temp_file)
+        return temp_file
+
+    def temp_dir_file_names(self):
+        return sorted(os.listdir(self.temp_dir))
+
+    def get_zipped_shp_files(self, zip_file):
+        with patch.object(geofeature.utils, 'get_file_from_irods', return_value=zip_file):
+            return geofeature.get_zipped_shp_files(MagicMock())
+
+    def test_valid_zip_file(self):
+        zip_file = self.copy_to_temp_dir('hs_file_types/tests/data/states_required_files.zip')
+        temp_file, shape_files = self.get_zipped_shp_files(zip_file)
+        self.assertEqual(temp_file, zip_file)
+        self.assertTrue(all(f.startswith('/vsizip/') for f in shape_files))
+        # the shape files are validated and read without extracting them
+        self.assertTrue(geofeature._check_if_shape_files(shape_files))
+        shp_file = [f for f in shape_files if f.endswith('.shp')][0]
+        meta_dict = geofeature.extract_metadata(shp_file_full_path=shp_file)
+        self.assertEqual(meta_dict['geometryinformation'],
+                         {'featureCount': 51, 'geometryType': 'MULTIPOLYGON'})
+        self.assertEqual(self.temp_dir_file_names(), ['states_required_files.zip'])
+
+        extracted_files = geofeature._extract_zipped_shp_files(zip_file, shape_files)
+        self.assertEqual(sorted(extracted_files),
+                         [os.path.join(self.temp_dir, name)
+                          for name in ('states.dbf', 'states.shp', 'states.shx')])
+        self.assertEqual(self.temp_dir_file_names(),
+                         ['states.dbf', 'states.shp', 'states.shx', 'states_required_files.zip'])
+
+    def test_invalid_zip_file(self):
+        # the .shx file is missing
+        zip_file = self.copy_to_temp_dir('hs_file_types/tests/data/states_invalid.zip')
+        _, shape_files = self.get_zipped_shp_files(zip_file)
+        self.assertFalse(geofeature._check_if_shape_files(shape_files))
+
+    def test_zip_file_name_clash(self):
+        # a file in the zip file with the name of the zip file must not overwrite the zip file
+        zip_file = os.path.join(self.temp_dir, 'states.zip')
+        with zipfile.ZipFile(zip_file, 'w') as zf:
+            zf.writestr('states.shp', 'shp')
+            zf.writestr('data/states.zip', 'zip')
+        with open(zip_file, 'rb') as f:
+            zip_content = f.read()
+        _, shape_files = self.get_zipped_shp_files(zip_file)
+
+        with self.assertRaises(ValidationError):
+            geofeature._extract_zipped_shp_files(zip_file, shape_files)
+        with open(zip_file, 'rb') as f:
+            self.assertEqual(f.read(), zip_content)
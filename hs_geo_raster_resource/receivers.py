@@ -115,8 +115,7 @@ def _process_uploaded_file(resource, validate_files_dict):
         if not error_info:
             log.info("Geo raster file validation successful.")
             # extract metadata
-            temp_dir = os.path.dirname(temp_file)
-            temp_vrt_file_path = [os.path.join(temp_dir, f) for f in os.listdir(temp_dir) if
+            temp_vrt_file_path = [f for f in files_to_add_to_resource if
                                   '.vrt' == os.path.splitext(f)[1]].pop()
             metadata = raster.extract_metadata(temp_vrt_file_path)
             # delete the original resource file
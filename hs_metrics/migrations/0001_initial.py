@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteMetricsSnapshot',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('n_registered_users', models.IntegerField(default=0)),
+                ('n_resources', models.IntegerField(default=0)),
+                ('n_ratings', models.IntegerField(default=0)),
+                ('n_comments', models.IntegerField(default=0)),
+                ('n_host_institutions', models.IntegerField(default=0)),
+                ('n_agencies', models.IntegerField(default=0)),
+                ('breakdowns', models.TextField(default=b'{}')),
+            ],
+            options={
+                'ordering': ['-created'],
+                'get_latest_by': 'created',
+            },
+        ),
+    ]
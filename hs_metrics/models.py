@@ -0,0 +1,117 @@
+import json
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Count
+from mezzanine.generic.models import Rating, ThreadedComment
+
+from hs_core.models import BaseResource
+from theme.models import UserProfile  # fixme switch to party model
+
+# user types of the users whose organization is counted as an agency rather than a host
+# institution
+AGENCY_USER_TYPES = ('Commercial/Professional', 'Government Official')
+
+
+class SiteMetricsSnapshot(models.Model):
+    """Site metrics as of the time the snapshot was taken.
+
+    Snapshots are taken periodically (see hs_metrics.tasks) and kept, so the counts of the
+    past snapshots can be charted. All counts are computed with aggregate queries.
+    """
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    n_registered_users = models.IntegerField(default=0)
+    n_resources = models.IntegerField(default=0)
+    n_ratings = models.IntegerField(default=0)
+    n_comments = models.IntegerField(default=0)
+    n_host_institutions = models.IntegerField(default=0)
+    n_agencies = models.IntegerField(default=0)
+    # json encoded dict of (name, count) lists of each breakdown in BREAKDOWNS
+    breakdowns = models.TextField(default='{}')
+
+    BREAKDOWNS = ('resource_type_counts', 'user_types', 'user_titles', 'user_subject_areas')
+    COUNT_FIELDS = ('n_registered_users', 'n_resources', 'n_ratings', 'n_comments',
+                    'n_host_institutions', 'n_agencies')
+
+    class Meta:
+        get_latest_by = 'created'
+        ordering = ['-created']
+
+    @classmethod
+    def take(cls):
+        """Computes the current site metrics and saves them as a new snapshot"""
+        # had to import it here to avoid import loop
+        from hs_core.hydroshare.utils import get_resource_type_class
+
+        snapshot = cls(n_registered_users=User.objects.count(),
+                       n_ratings=Rating.objects.count(),
+                       n_comments=ThreadedComment.objects.count())
+        breakdowns = {}
+
+        resource_type_counts = Counter()
+        for resource_type, count in BaseResource.objects.values_list(
+                'resource_type').annotate(Count('id')).order_by():
+            resource_class = get_resource_type_class(resource_type)
+            resource_type_name = unicode(resource_class._meta.verbose_name) \
+                if resource_class is not None else resource_type
+            resource_type_counts[resource_type_name] += count
+        breakdowns['resource_type_counts'] = sorted(resource_type_counts.items())
+        snapshot.n_resources = sum(resource_type_counts.values())
+
+        # FIXME revisit this with the hs_party application
+        profiles = UserProfile.objects.all()
+        breakdowns['user_types'] = cls._count_by(profiles, 'user_type')
+        breakdowns['user_titles'] = cls._count_by(profiles, 'title')
+        subject_areas = Counter()
+        for areas, count in cls._count_by(profiles.exclude(subject_areas__isnull=True)
+                                          .exclude(subject_areas=''), 'subject_areas'):
+            for area in set(a.strip() for a in areas.split(',')):
+                subject_areas[area] += count
+        breakdowns['user_subject_areas'] = sorted(subject_areas.items())
+
+        organizations = profiles.exclude(organization__isnull=True).exclude(organization='')
+        snapshot.n_agencies = organizations.filter(
+            user_type__in=AGENCY_USER_TYPES).values('organization').distinct().count()
+        snapshot.n_host_institutions = organizations.exclude(
+            user_type__in=AGENCY_USER_TYPES).values('organization').distinct().count()
+
+        snapshot.breakdowns = json.dumps(breakdowns)
+        snapshot.save()
+        return snapshot
+
+    @staticmethod
+    def _count_by(queryset, field_name):
+        """returns sorted (value, count) pairs of *field_name* over *queryset*"""
+        return sorted(queryset.values_list(field_name).annotate(Count('id')).order_by())
+
+    def get_breakdowns(self):
+        """returns the dict of (name, count) lists of each breakdown in BREAKDOWNS"""
+        if getattr(self, '_breakdowns', None) is None:
+            breakdowns = json.loads(self.breakdowns)
+            self._breakdowns = {name: [tuple(item) for item in breakdowns.get(name, [])]
+                                for name in self.BREAKDOWNS}
+        return self._breakdowns
+
+    @property
+    def resource_type_counts(self):
+        return self.get_breakdowns()['resource_type_counts']
+
+    @property
+    def user_types(self):
+        return self.get_breakdowns()['user_types']
+
+    @property
+    def user_titles(self):
+        return self.get_breakdowns()['user_titles']
+
+    @property
+    def user_subject_areas(self):
+        return self.get_breakdowns()['user_subject_areas']
+
+    def to_dict(self):
+        """returns the snapshot as a json serializable dict"""
+        data = {name: getattr(self, name) for name in self.COUNT_FIELDS}
+        data['created'] = self.created.isoformat()
+        data.update(self.get_breakdowns())
+        return data
@@ -0,0 +1,14 @@
+"""Define celery tasks for hs_metrics app."""
+
+from __future__ import absolute_import
+
+from celery.task import periodic_task
+from celery.schedules import crontab
+
+from hs_metrics.models import SiteMetricsSnapshot
+
+
+@periodic_task(ignore_result=True, run_every=crontab(minute=0, hour=1))
+def take_site_metrics_snapshot():
+    """Take the daily snapshot of the site metrics shown by the metrics page."""
+    SiteMetricsSnapshot.take()
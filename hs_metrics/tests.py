@@ -0,0 +1,53 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+
+from hs_metrics.models import SiteMetricsSnapshot
+
+
+class SiteMetricsSnapshotTests(TestCase):
+
+    def setUp(self):
+        profiles = [('Utah State University', 'University Faculty', 'Hydrology, Water'),
+                    ('Utah State University', 'University Graduate Student', 'Hydrology'),
+                    ('USGS', 'Government Official', None)]
+        for index, (organization, user_type, subject_areas) in enumerate(profiles):
+            user = User.objects.create(username='user{}'.format(index),
+                                       email='user{}@example.com'.format(index))
+            profile = user.userprofile
+            profile.organization = organization
+            profile.user_type = user_type
+            profile.subject_areas = subject_areas
+            profile.save()
+
+    def test_take(self):
+        snapshot = SiteMetricsSnapshot.take()
+        self.assertEqual(snapshot.n_registered_users, User.objects.count())
+        self.assertEqual(snapshot.n_host_institutions, 1)
+        self.assertEqual(snapshot.n_agencies, 1)
+        self.assertEqual(snapshot.user_subject_areas, [('Hydrology', 2), ('Water', 1)])
+        self.assertIn(('Government Official', 1), snapshot.user_types)
+
+        # the breakdowns are read back from the saved snapshot
+        snapshot = SiteMetricsSnapshot.objects.latest()
+        self.assertEqual(snapshot.to_dict()['user_subject_areas'],
+                         [('Hydrology', 2), ('Water', 1)])
+
+    def test_history(self):
+        SiteMetricsSnapshot.take()
+        user = User.objects.get(username='user0')
+        user.set_password('password')
+        user.save()
+        client = Client()
+        client.login(username='user0', password='password')
+
+        response = client.get('/hs_metrics/metrics/history/', {'days': '10'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['snapshots']), 1)
+        # a huge number of days is limited to the max history length
+        response = client.get('/hs_metrics/metrics/history/', {'days': str(10 ** 12)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['snapshots']), 1)
+        response = client.get('/hs_metrics/metrics/history/', {'days': 'many'})
+        self.assertEqual(response.status_code, 400)
@@ -6,6 +6,8 @@ urlpatterns = patterns('',
     # users API
 
     url(r'^metrics/$', views.HydroshareSiteMetrics.as_view()),
+    url(r'^metrics/json/$', views.site_metrics_json),
+    url(r'^metrics/history/$', views.site_metrics_history),
 
 )
 
@@ -0,0 +1,84 @@
+from django.contrib.auth.models import Group
+from django.test import Client, TestCase
+from mock import patch
+
+from hs_core import hydroshare
+from hs_core.testing import MockIRODSTestCaseMixin
+from hs_sitemap.views import ResourceSitemap
+
+
+class SitemapTests(MockIRODSTestCaseMixin, TestCase):
+
+    def setUp(self):
+        super(SitemapTests, self).setUp()
+        Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = hydroshare.create_account(
+            'creator@example.com',
+            username='creator',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+        self.resources = [hydroshare.create_resource('GenericResource', self.user,
+                                                     'Resource {}'.format(index))
+                          for index in range(3)]
+        # the first two resources are listed in the sitemap
+        self.set_public(self.resources[0])
+        self.set_public(self.resources[1])
+        self.client = Client()
+
+    def set_public(self, resource):
+        resource.raccess.public = True
+        resource.raccess.save()
+
+    def test_index(self):
+        response = self.client.get('/sitemap/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/sitemap/resources/', response.content)
+        self.assertNotIn('?p=2', response.content)
+
+    def test_sitemap(self):
+        response = self.client.get('/sitemap/resources/')
+        self.assertEqual(response.status_code, 200)
+        for resource in self.resources[:2]:
+            self.assertIn('/resource/{}/'.format(resource.short_id), response.content)
+        self.assertNotIn(self.resources[2].short_id, response.content)
+
+    @patch.object(ResourceSitemap, 'limit', 1)
+    def test_pages(self):
+        response = self.client.get('/sitemap/')
+        self.assertIn('/sitemap/resources/?p=2', response.content)
+
+        response = self.client.get('/sitemap/resources/', {'p': '2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.resources[0].short_id, response.content)
+        self.assertIn('/resource/{}/'.format(self.resources[1].short_id), response.content)
+
+        self.assertEqual(self.client.get('/sitemap/resources/', {'p': '3'}).status_code, 404)
+        self.assertEqual(self.client.get('/sitemap/resources/', {'p': 'x'}).status_code, 404)
+
+    def test_not_modified(self):
+        response = self.client.get('/sitemap/resources/')
+        etag = response['ETag']
+        response = self.client.get('/sitemap/resources/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # another page of the sitemap has another ETag
+        response = self.client.get('/sitemap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # a resource added to the sitemap changes it
+        self.set_public(self.resources[2])
+        response = self.client.get('/sitemap/resources/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.resources[2].short_id, response.content)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # so does a resource removed from the sitemap, though no resource is updated
+        etag = response['ETag']
+        self.resources[0].raccess.public = False
+        self.resources[0].raccess.save()
+        response = self.client.get('/sitemap/resources/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.resources[0].short_id, response.content)
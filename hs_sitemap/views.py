@@ -1,16 +1,99 @@
-from django.shortcuts import render
-from django.db.models import Q
-
-from hs_core.hydroshare.utils import get_resource_types
-
-
-def sitemap(request):
-    resource_types = (
-        (rt.__name__, {
-            "resources": rt.objects.filter(Q(raccess__public=True) | Q(raccess__discoverable=True)),
-        })
-        for rt in get_resource_types()
-    )
-    return render(request, "sitemap.html", {
-        "resource_types": resource_types,
-    })
+"""Sitemap index and paginated resource sitemaps for crawlers.
+
+The resource sitemap lists every public or discoverable resource with the time it was last
+updated, at most RESOURCE_SITEMAP_LIMIT resources per page; the index lists the pages. Rendered
+sitemaps are cached under the number of these resources and the time the latest of them was
+updated. The cache key is also sent as the ETag, so crawlers can fetch the sitemaps
+conditionally. There is no Last-Modified: a resource removed from the sitemap changes the
+count, not the latest update time.
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap, views as sitemaps_views
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.http import Http404
+from django.views.decorators.http import condition
+
+from hs_core.models import BaseResource
+
+SITEMAP_CACHE_TIMEOUT = getattr(settings, 'SITEMAP_CACHE_TIMEOUT', 60 * 60 * 24)
+
+# maximum number of urls of a sitemap page allowed by the sitemap protocol
+RESOURCE_SITEMAP_LIMIT = 50000
+
+
+def get_sitemap_resources():
+    """Return the queryset of the resources listed in the sitemap."""
+    return BaseResource.objects.filter(Q(raccess__public=True) | Q(raccess__discoverable=True))
+
+
+class ResourceSitemap(Sitemap):
+    limit = RESOURCE_SITEMAP_LIMIT
+
+    def items(self):
+        # only the short id and update time are needed - no resource objects are created
+        return get_sitemap_resources().order_by('id').values_list('short_id', 'updated')
+
+    def location(self, item):
+        return '/resource/{}/'.format(item[0])
+
+    def lastmod(self, item):
+        return item[1]
+
+
+SITEMAPS = {'resources': ResourceSitemap}
+
+
+def get_sitemap_state(request):
+    """Return (number of sitemap resources, time the latest of them was updated), computed with
+    one query per request."""
+    if not hasattr(request, 'sitemap_state'):
+        state = get_sitemap_resources().aggregate(Count('id'), Max('updated'))
+        request.sitemap_state = (state['id__count'], state['updated__max'])
+    return request.sitemap_state
+
+
+def get_sitemap_key(request, section=None):
+    """Return the key of the rendered sitemap (or index) page of the request, which is the
+    cache key and the ETag of the page, or None if the page number is not valid."""
+    page = request.GET.get('p', '1')
+    if not page.isdigit():
+        return None
+    count, last_modified = get_sitemap_state(request)
+    return 'hs_sitemap:{scheme}:{section}:{page}:{count}:{updated}'.format(
+        scheme=request.scheme, section=section or 'index', page=page, count=count,
+        updated=last_modified.isoformat() if last_modified is not None else '')
+
+
+def cache_sitemap(view):
+    """Cache the rendered sitemaps until a sitemap resource is updated, added or removed."""
+    @wraps(view)
+    def inner(request, section=None):
+        key = get_sitemap_key(request, section)
+        if key is None:
+            raise Http404("No page '%s'" % request.GET['p'])
+        response = cache.get(key)
+        if response is None:
+            if section is None:
+                response = view(request)
+            else:
+                response = view(request, section)
+            response.render()
+            cache.set(key, response, SITEMAP_CACHE_TIMEOUT)
+        return response
+    return inner
+
+
+@condition(etag_func=get_sitemap_key)
+@cache_sitemap
+def index(request):
+    return sitemaps_views.index(request, SITEMAPS, sitemap_url_name='sitemap-section')
+
+
+@condition(etag_func=get_sitemap_key)
+@cache_sitemap
+def sitemap(request, section):
+    return sitemaps_views.sitemap(request, SITEMAPS, section=section)
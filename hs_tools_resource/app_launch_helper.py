@@ -1,47 +1,53 @@
-from hs_core.models import get_user
+from django.core.cache import cache
+from django.db.models import Q
+
+from hs_access_control.models import PrivilegeCodes
+from hs_core.models import get_user, BaseResource
 from hs_core.views.utils import authorize, ACTION_TO_AUTHORIZE
-from hs_tools_resource.models import SupportedResTypeChoices, ToolResource
+from hs_labels.models import UserResourceFlags, FlagCodes
+from hs_tools_resource.models import ToolResource
 from hs_tools_resource.utils import parse_app_url_template
 
+# cache key of the index that maps a resource type to the web apps supporting it
+WEBAPP_INDEX_CACHE_KEY = 'hs_tools_resource:webapp_index'
+
 
 def resource_level_tool_urls(resource_obj, request_obj):
 
-    res_type_str = resource_obj.resource_type
+    candidate_apps = [app for app in get_webapp_index().get(resource_obj.resource_type.lower(), [])
+                      if _app_supports_sharing_status(app, resource_obj.raccess.sharing_status)]
+    if not candidate_apps or not _check_user_can_view_resource(request_obj, resource_obj):
+        return None
+
+    user = get_user(request_obj)
+    viewable_app_ids = _get_viewable_app_ids(user, [app['id'] for app in candidate_apps])
+    user_open_with_app_ids = _get_user_open_with_app_ids(user, viewable_app_ids)
+
+    hs_term_dict_user = {}
+    hs_term_dict_user["HS_USR_NAME"] = user.username if user.is_authenticated() \
+        else "anonymous"
+    hs_term_dict_res = resource_obj.get_hs_term_dict()
 
     tool_list = []
     open_with_app_counter = 0
-
-    for choice_obj in SupportedResTypeChoices.objects.filter(description__iexact=res_type_str):
-        for supported_res_types_obj in choice_obj.associated_with.all():
-            tool_res_obj = ToolResource.objects.get(object_id=supported_res_types_obj.object_id)
-
-            if _check_user_can_view_resource(request_obj, resource_obj) and \
-               _check_user_can_view_app(request_obj, tool_res_obj) and \
-               _check_app_supports_resource_sharing_status(resource_obj, tool_res_obj):
-
-                tool_url = tool_res_obj.metadata.url_base.value \
-                           if tool_res_obj.metadata.url_base else None
-                tool_icon_url = tool_res_obj.metadata.app_icon.data_url \
-                    if tool_res_obj.metadata.app_icon else "raise-img-error"
-                hs_term_dict_user = {}
-                hs_term_dict_user["HS_USR_NAME"] = request_obj.user.username if \
-                    request_obj.user.is_authenticated() \
-                    else "anonymous"
-                tool_url_new = parse_app_url_template(
-                        tool_url, [resource_obj.get_hs_term_dict(), hs_term_dict_user])
-                is_open_with_app = _check_open_with_app(tool_res_obj, request_obj)
-                is_approved_app = _check_webapp_is_approved(tool_res_obj)
-                if tool_url_new is not None:
-                        tl = {'title': str(tool_res_obj.metadata.title.value),
-                              'res_id': tool_res_obj.short_id,
-                              'icon_url': tool_icon_url,
-                              'url': tool_url_new,
-                              'openwithlist': is_open_with_app,
-                              'approved': is_approved_app
-                              }
-                        tool_list.append(tl)
-                        if is_open_with_app:
-                            open_with_app_counter += 1
+    for app in candidate_apps:
+        if app['id'] not in viewable_app_ids or app['url_template'] is None:
+            continue
+
+        tool_url_new = parse_app_url_template(app['url_template'],
+                                              [hs_term_dict_res, hs_term_dict_user])
+        is_open_with_app = app['id'] in user_open_with_app_ids or app['approved']
+        if tool_url_new is not None:
+            tl = {'title': app['title'],
+                  'res_id': app['short_id'],
+                  'icon_url': app['icon_url'],
+                  'url': tool_url_new,
+                  'openwithlist': is_open_with_app,
+                  'approved': app['approved']
+                  }
+            tool_list.append(tl)
+            if is_open_with_app:
+                open_with_app_counter += 1
 
     if len(tool_list) > 0:
         return {"tool_list": tool_list,
@@ -50,28 +56,90 @@ def resource_level_tool_urls(resource_obj, request_obj):
         return None
 
 
-def _check_user_can_view_app(request_obj, tool_res_obj):
-
-    _, user_can_view_app, _ = authorize(
-                request_obj, tool_res_obj.short_id,
-                needed_permission=ACTION_TO_AUTHORIZE.VIEW_RESOURCE,
-                raises_exception=False)
-    return user_can_view_app
-
-
-def _check_open_with_app(tool_res_obj, request_obj):
-
-    return _check_webapp_in_user_open_with_list(tool_res_obj, request_obj) or \
-            _check_webapp_is_approved(tool_res_obj)
-
-
-def _check_webapp_in_user_open_with_list(tool_res_obj, request_obj):
-
-    if request_obj.user.is_authenticated():
-        user_obj = get_user(request_obj)
-        return tool_res_obj.rlabels.is_open_with_app(user_obj)
-    else:
-        return False
+def get_webapp_index():
+    """
+    Return a dict that maps a (lower case) resource type name to the list of web apps that
+    support that resource type. Each web app is a dict with its id, short_id, title, icon_url,
+    url_template, approval flag and supported sharing status (lower case string, or None
+    if the web app supports any sharing status).
+
+    The index is kept in the cache and rebuilt after any web app metadata change (see
+    invalidate_webapp_index())
+    """
+    index = cache.get(WEBAPP_INDEX_CACHE_KEY)
+    if index is None:
+        index = _build_webapp_index()
+        cache.set(WEBAPP_INDEX_CACHE_KEY, index, None)
+    return index
+
+
+def invalidate_webapp_index():
+    cache.delete(WEBAPP_INDEX_CACHE_KEY)
+
+
+def _build_webapp_index():
+    index = {}
+    for tool_res_obj in ToolResource.objects.all():
+        metadata = tool_res_obj.metadata
+        supported_res_types_obj = metadata.supported_resource_types
+        if supported_res_types_obj is None:
+            continue
+        res_types = [choice.description.lower() for choice in
+                     supported_res_types_obj.supported_res_types.all()]
+        if not res_types:
+            continue
+
+        supported_sharing_status_obj = metadata.supported_sharing_status
+        if supported_sharing_status_obj is not None:
+            sharing_status = supported_sharing_status_obj.get_sharing_status_str().lower()
+        else:
+            # backward compatible: webapp without supported_sharing_status metadata
+            # is considered to support all sharing status
+            sharing_status = None
+
+        app = {'id': tool_res_obj.id,
+               'short_id': tool_res_obj.short_id,
+               'title': str(metadata.title.value),
+               'icon_url': metadata.app_icon.data_url if metadata.app_icon
+               else "raise-img-error",
+               'url_template': metadata.url_base.value if metadata.url_base else None,
+               'approved': _check_webapp_is_approved(tool_res_obj),
+               'sharing_status': sharing_status
+               }
+        for res_type in res_types:
+            index.setdefault(res_type, []).append(app)
+    return index
+
+
+def _app_supports_sharing_status(app, res_sharing_status):
+    if app['sharing_status'] is None:
+        return True
+    return len(app['sharing_status']) > 0 and \
+        app['sharing_status'].find(res_sharing_status.lower()) != -1
+
+
+def _get_viewable_app_ids(user, app_ids):
+    """
+    Return the subset of web app resource ids (pk) in *app_ids* the user can view.
+    This applies the same rules as authorize() with VIEW_RESOURCE permission using one query.
+    """
+    app_qs = BaseResource.objects.filter(id__in=app_ids)
+    if not user.is_authenticated() or not user.is_active:
+        app_qs = app_qs.filter(raccess__public=True)
+    elif not user.is_superuser:
+        app_qs = app_qs.filter(Q(raccess__public=True) |
+                               Q(r2urp__user=user, r2urp__privilege__lte=PrivilegeCodes.VIEW) |
+                               Q(r2grp__group__g2ugp__user=user,
+                                 r2grp__privilege__lte=PrivilegeCodes.VIEW))
+    return set(app_qs.values_list('id', flat=True).distinct())
+
+
+def _get_user_open_with_app_ids(user, app_ids):
+    if not app_ids or not user.is_authenticated():
+        return set()
+    return set(UserResourceFlags.objects.filter(user=user, kind=FlagCodes.OPEN_WITH_APP,
+                                                resource_id__in=app_ids)
+               .values_list('resource_id', flat=True))
 
 
 def _check_webapp_is_approved(tool_res_obj):
@@ -89,23 +157,3 @@ def _check_user_can_view_resource(request_obj, resource_obj):
                 needed_permission=ACTION_TO_AUTHORIZE.VIEW_RESOURCE,
                 raises_exception=False)
     return user_can_view_res
-
-
-def _check_app_supports_resource_sharing_status(resource_obj, tool_res_obj):
-    sharing_status_supported = False
-    supported_sharing_status_obj = tool_res_obj.metadata.\
-        supported_sharing_status
-    if supported_sharing_status_obj is not None:
-        supported_sharing_status_str = supported_sharing_status_obj.\
-                                      get_sharing_status_str()
-        if len(supported_sharing_status_str) > 0:
-                res_sharing_status = resource_obj.raccess.sharing_status
-                if supported_sharing_status_str.lower().\
-                        find(res_sharing_status.lower()) != -1:
-                    sharing_status_supported = True
-    else:
-        # backward compatible: webapp without supported_sharing_status metadata
-        # is considered to support all sharing status
-        sharing_status_supported = True
-
-    return sharing_status_supported
@@ -6,4 +6,5 @@ class ToolsResourceAppConfig(AppConfig):
     verbose_name = "Applications"
 
     def ready(self):
-        import receivers  # noqa
+        import receivers
+        receivers.connect_webapp_index_receivers()
@@ -1,9 +1,13 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
+from hs_core.models import Title
 from hs_core.signals import pre_metadata_element_create, pre_metadata_element_update, \
                             pre_create_resource
 
-from hs_tools_resource.models import ToolResource
+from hs_tools_resource.models import ToolResource, ToolMetaData, SupportedResTypes, \
+                                     SupportedSharingStatus, RequestUrlBase, ToolIcon
+from hs_tools_resource.app_launch_helper import invalidate_webapp_index
 from hs_tools_resource.forms import SupportedResTypesValidationForm,  VersionForm, \
                                     UrlValidationForm, \
                                     SupportedSharingStatusValidationForm, RoadmapForm, \
@@ -74,3 +78,34 @@ def validate_form(request, element_name):
         return {'is_valid': True, 'element_data_dict': element_form.cleaned_data}
     else:
         return {'is_valid': False, 'element_data_dict': None, "errors": element_form.errors}
+
+
+# models whose changes are reflected in the web app index (see
+# hs_tools_resource.app_launch_helper._build_webapp_index); the title of any resource, not only
+# of a web app, is a Title element, so any title change drops the index
+WEBAPP_INDEX_MODELS = (ToolResource, ToolMetaData, Title, RequestUrlBase, ToolIcon,
+                       SupportedResTypes, SupportedSharingStatus)
+
+
+def webapp_index_invalidation_handler(sender, **kwargs):
+    """Drop the cached web app index when a web app or any of its metadata changes"""
+    invalidate_webapp_index()
+
+
+def connect_webapp_index_receivers():
+    """Connect webapp_index_invalidation_handler to the models in WEBAPP_INDEX_MODELS.
+
+    The handler is connected with explicit senders so that saving any other model doesn't run
+    it. Called from ToolsResourceAppConfig.ready().
+    """
+    for model in WEBAPP_INDEX_MODELS:
+        uid = 'webapp_index_{}'.format(model._meta.model_name)
+        post_save.connect(webapp_index_invalidation_handler, sender=model, dispatch_uid=uid)
+        post_delete.connect(webapp_index_invalidation_handler, sender=model, dispatch_uid=uid)
+
+
+@receiver(m2m_changed, sender=SupportedResTypes.supported_res_types.through)
+@receiver(m2m_changed, sender=SupportedSharingStatus.sharing_status.through)
+def webapp_index_m2m_invalidation_handler(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_webapp_index()
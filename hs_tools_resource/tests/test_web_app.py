@@ -4,6 +4,7 @@ from urlparse import urlparse, parse_qs
 from django.test import TransactionTestCase
 from django.contrib.auth.models import Group
 from django.http import HttpRequest
+from mock import patch
 
 from hs_core.hydroshare import resource
 from hs_core import hydroshare
@@ -13,6 +14,8 @@ from hs_tools_resource.models import RequestUrlBase, ToolVersion, SupportedResTy
 from hs_tools_resource.receivers import metadata_element_pre_create_handler, \
                                         metadata_element_pre_update_handler
 from hs_tools_resource.utils import parse_app_url_template
+from hs_tools_resource.app_launch_helper import resource_level_tool_urls, get_webapp_index, \
+                                                invalidate_webapp_index
 
 
 class TestWebAppFeature(TransactionTestCase):
@@ -334,3 +337,51 @@ class TestWebAppFeature(TransactionTestCase):
                                                 [self.resGeneric.get_hs_term_dict(),
                                                  term_dict_user])
         self.assertEqual(new_url_string, None)
+
+    def test_resource_level_tool_urls(self):
+        invalidate_webapp_index()
+        request = HttpRequest()
+        request.user = self.user
+
+        # web app without supported resource types is not relevant for any resource
+        self.assertEqual(resource_level_tool_urls(self.resGeneric, request), None)
+
+        resource.create_metadata_element(self.resWebApp.short_id,
+                                         'RequestUrlBase',
+                                         value='https://www.google.com?resid=${HS_RES_ID}')
+        resource.create_metadata_element(self.resWebApp.short_id, 'SupportedResTypes',
+                                         supported_res_types=['GenericResource'])
+
+        # index got rebuilt after the metadata changes
+        self.assertIn('genericresource', get_webapp_index())
+        tools = resource_level_tool_urls(self.resGeneric, request)
+        self.assertEqual(len(tools['tool_list']), 1)
+        tool = tools['tool_list'][0]
+        self.assertEqual(tool['res_id'], self.resWebApp.short_id)
+        self.assertEqual(tool['url'], 'https://www.google.com?resid=' + self.resGeneric.short_id)
+        self.assertFalse(tool['approved'])
+        self.assertFalse(tool['openwithlist'])
+
+        # web app only supporting published resources is not relevant for a private resource
+        resource.create_metadata_element(self.resWebApp.short_id, 'SupportedSharingStatus',
+                                         sharing_status=['Published'])
+        self.assertEqual(resource_level_tool_urls(self.resGeneric, request), None)
+        self.resWebApp.delete()
+
+    def test_webapp_index_invalidation(self):
+        resource.create_metadata_element(self.resWebApp.short_id, 'SupportedResTypes',
+                                         supported_res_types=['GenericResource'])
+        index = get_webapp_index()
+        self.assertEqual(index['genericresource'][0]['title'], self.resWebApp.metadata.title.value)
+
+        # the metadata of other resource types that isn't in the index doesn't drop it
+        with patch('hs_tools_resource.receivers.invalidate_webapp_index') as invalidate:
+            resource.create_metadata_element(self.resGeneric.short_id, 'subject', value='water')
+        self.assertFalse(invalidate.called)
+
+        # a new title of the web app does
+        title = self.resWebApp.metadata.title
+        resource.update_metadata_element(self.resWebApp.short_id, 'title', title.id,
+                                         value='New web app title')
+        self.assertEqual(get_webapp_index()['genericresource'][0]['title'], 'New web app title')
+        self.resWebApp.delete()
@@ -0,0 +1,52 @@
+"""Fill in the last seen time of the tracking sessions created before sessions had one.
+
+The last seen time of a session is the time of its latest variable, or the time the session
+began if it has no variables. Sessions are updated in chunks of consecutive ids, one UPDATE
+statement per chunk, so the command can be run (and re-run) on a live system.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from hs_tracking.models import Session, Variable
+
+
+class Command(BaseCommand):
+    help = "Set the last seen time of the tracking sessions that don't have one."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=10000,
+            help='number of session ids updated in one statement',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        id_range = Session.objects.filter(last_seen__isnull=True).aggregate(
+            min_id=Min('id'), max_id=Max('id'))
+        if id_range['min_id'] is None:
+            print("All tracking sessions have a last seen time.")
+            return
+
+        qn = connection.ops.quote_name
+        sql = "UPDATE {session} SET {last_seen} = COALESCE(" \
+              "(SELECT MAX(v.{timestamp}) FROM {variable} v " \
+              "WHERE v.{session_id} = {session}.{id}), {session}.{begin}) " \
+              "WHERE {session}.{id} >= %s AND {session}.{id} < %s " \
+              "AND {session}.{last_seen} IS NULL"
+        sql = sql.format(session=qn(Session._meta.db_table), variable=qn(Variable._meta.db_table),
+                         last_seen=qn('last_seen'), timestamp=qn('timestamp'),
+                         session_id=qn('session_id'), id=qn('id'), begin=qn('begin'))
+
+        updated = 0
+        for start_id in range(id_range['min_id'], id_range['max_id'] + 1, chunk_size):
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, [start_id, start_id + chunk_size])
+                    updated += cursor.rowcount
+            print("Updated sessions with id up to {}: {} in total".format(
+                min(start_id + chunk_size - 1, id_range['max_id']), updated))
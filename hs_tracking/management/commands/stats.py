@@ -7,7 +7,7 @@ from optparse import make_option
 
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils import timezone
 from hs_core.models import BaseResource
 from theme.models import UserProfile
@@ -77,6 +77,12 @@ class Command(BaseCommand):
             action="store_true",
             help="dump tracking variables collected today",
         ),
+        make_option(
+            "--daily-activity",
+            dest="daily_activity",
+            action="store_true",
+            help="visits, downloads and app launches per day, resource, user type and domain",
+        ),
     )
 
     def print_var(self, var_name, value, period=None):
@@ -102,15 +108,15 @@ class Command(BaseCommand):
 
     def monthly_users_by_type(self, start_date, end_date):
         user_types = UserProfile.objects.values('user_type').distinct()
+        # count the sessions of all user types with one query
+        session_counts = dict(hs_tracking.Session.objects.filter(
+            Q(begin__gte=start_date) &
+            Q(begin__lte=end_date) &
+            Q(visitor__user__isnull=False)
+        ).values_list('visitor__user__userprofile__user_type').annotate(Count('id')))
         for ut in [_['user_type'] for _ in user_types]:
-            ut_users = User.objects.filter(userprofile__user_type=ut)
-            sessions = hs_tracking.Session.objects.filter(
-                Q(begin__gte=start_date) &
-                Q(begin__lte=end_date) &
-                Q(visitor__user__in=ut_users)
-            )
             self.print_var("active_{}".format(ut),
-                           sessions.count(), (end_date, start_date))
+                           session_counts.get(ut, 0), (end_date, start_date))
 
     def users_details(self):
         w = csv.writer(sys.stdout)
@@ -189,9 +195,9 @@ class Command(BaseCommand):
         variables = hs_tracking.Variable.objects.filter(
             timestamp__gte=yesterday_start,
             timestamp__lt=today_start
-        )
-        for v in variables:
-            uid = v.session.visitor.user.id if v.session.visitor.user else None
+        ).select_related('session__visitor')
+        for v in variables.iterator():
+            uid = v.session.visitor.user_id
 
             # make sure values are | separated (i.e. replace legacy format)
             vals = self.dict_spc_to_pipe(v.value)
@@ -204,6 +210,22 @@ class Command(BaseCommand):
                       vals]
             print('|'.join(values))
 
+    def daily_activity(self, lookback=1):
+        """prints the daily rollups of the tracking variables of the last *lookback* days,
+        building the rollups that don't exist yet"""
+        today = timezone.now().date()
+        w = csv.writer(sys.stdout)
+        w.writerow(['date', 'name', 'resource id', 'user type', 'user email domain', 'count'])
+        for days in range(lookback, 0, -1):
+            date = today - datetime.timedelta(days=days)
+            if not hs_tracking.DailyActivity.objects.filter(date=date).exists():
+                hs_tracking.DailyActivity.build(date)
+            for activity in hs_tracking.DailyActivity.objects.filter(date=date).order_by(
+                    'name', 'resource_id', 'user_type', 'user_email_domain'):
+                values = [activity.date, activity.name, activity.resource_id,
+                          activity.user_type, activity.user_email_domain, activity.count]
+                w.writerow([unicode(v).encode("utf-8") for v in values])
+
     def dict_spc_to_pipe(self, s):
 
         # exit early if pipes already exist
@@ -254,3 +276,9 @@ class Command(BaseCommand):
             else:
                 # run default mode
                 self.yesterdays_variables()
+        if options["daily_activity"]:
+            if len(args) > 0:
+                # run look-back mode
+                self.daily_activity(lookback=int(args[0]))
+            else:
+                self.daily_activity()
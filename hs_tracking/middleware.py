@@ -1,3 +1,5 @@
+from hs_core.robots import is_human
+
 from .models import Session
 import utils
 
@@ -12,10 +14,8 @@ class Tracking(object):
         if request.path.startswith('/heartbeat/'):
             return response
 
-        is_human = getattr(request, 'is_human', False)
-
-        # filter out web crawlers
-        if not is_human:
+        # filter out web crawlers (classified once per request, normally by RobotFilter)
+        if not is_human(request):
             return response
 
         # filter out everything that is not an OK response
@@ -37,7 +37,7 @@ class Tracking(object):
                          'user_email_domain=%s' % emaildomain,
                          'request_url=%s' % request.path]])
 
-        # save the activity in the database
-        session.record('visit', msg)
+        # save the activity in the database (along with other buffered activities)
+        session.record('visit', msg, buffered=True)
 
         return response
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_tracking', '0006_variable_timestamp_default'),
+    ]
+
+    # the column is added without a default so that the existing sessions are left with null,
+    # to be filled in by the backfill_session_last_seen command
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='last_seen',
+            field=models.DateTimeField(null=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='session',
+            name='last_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True,
+                                       db_index=True),
+        ),
+    ]
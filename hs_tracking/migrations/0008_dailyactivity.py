@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_tracking', '0007_session_last_seen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('date', models.DateField(db_index=True)),
+                ('name', models.CharField(max_length=32)),
+                ('resource_id', models.CharField(default='', max_length=32, blank=True)),
+                ('user_type', models.CharField(default='', max_length=255, blank=True)),
+                ('user_email_domain', models.CharField(default='', max_length=255, blank=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyactivity',
+            unique_together=set([('date', 'name', 'resource_id', 'user_type', 'user_email_domain')]),
+        ),
+        migrations.AlterField(
+            model_name='variable',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, db_index=True),
+        ),
+    ]
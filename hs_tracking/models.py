@@ -1,6 +1,11 @@
+import atexit
+import logging
+import re
+import threading
 from datetime import datetime, timedelta
 
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.utils import timezone
 from django.core import signing
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -9,9 +14,16 @@ from theme.models import UserProfile
 from utils import get_std_log_fields
 
 SESSION_TIMEOUT = settings.TRACKING_SESSION_TIMEOUT
+# seconds after which the last seen time of a tracking session cached in the django session
+# is refreshed
+SESSION_CACHE_REFRESH = 60
 PROFILE_FIELDS = settings.TRACKING_PROFILE_FIELDS
 USER_FIELDS = settings.TRACKING_USER_FIELDS
 VISITOR_FIELDS = ["id"] + USER_FIELDS + PROFILE_FIELDS
+# path of a resource landing page
+RESOURCE_URL_PATTERN = re.compile(r'^/resource/([0-9a-f]{32})/')
+logger = logging.getLogger(__name__)
+
 if set(PROFILE_FIELDS) & set(USER_FIELDS):
     raise ImproperlyConfigured("hs_tracking PROFILE_FIELDS and USER_FIELDS must not contain"
                                " overlapping field names")
@@ -28,21 +40,35 @@ class SessionManager(models.Manager):
             cut_off = datetime.now() - timedelta(seconds=SESSION_TIMEOUT)
             session = None
 
-            try:
-                session = Session.objects.filter(
-                    variable__timestamp__gte=cut_off).filter(id=tracking_id['id']).first()
-            except Session.DoesNotExist:
-                pass
+            if 'last_seen' in tracking_id:
+                # the tracking session is cached in the django session
+                if tracking_id['last_seen'] >= _format_last_seen(cut_off):
+                    session = self._from_tracking_id(tracking_id, user)
+            else:
+                session = Session.objects.filter(id=tracking_id['id'],
+                                                 last_seen__gte=cut_off).first()
 
             if session is not None and user is not None:
+                # the last seen time is refreshed (in the django session and the database) at
+                # most every SESSION_CACHE_REFRESH seconds
+                refresh = tracking_id.get('last_seen', '') < _format_last_seen(
+                    datetime.now() - timedelta(seconds=SESSION_CACHE_REFRESH))
                 if session.visitor.user is None and user.is_authenticated():
                     try:
                         session.visitor = Visitor.objects.get(user=user)
-                        session.save()
+                        Session.objects.filter(id=session.id).update(visitor=session.visitor)
                     except Visitor.DoesNotExist:
                         session.visitor.user = user
-                        session.visitor.save()
-                return session
+                        Visitor.objects.filter(id=session.visitor.id).update(user=user)
+                    refresh = True
+                if refresh:
+                    if Session.objects.filter(id=session.id).update(last_seen=timezone.now()):
+                        _cache_session(request, session)
+                    else:
+                        # the cached session no longer exists (e.g., deleted with its user)
+                        session = None
+                if session is not None:
+                    return session
 
         # No session found, create one
         if user.is_authenticated():
@@ -57,9 +83,33 @@ class SessionManager(models.Manager):
         msg = Variable.format_kwargs(**fields)
 
         session.record('begin_session', msg)
-        request.session['hs_tracking_id'] = signing.dumps({'id': session.id})
+        _cache_session(request, session)
         return session
 
+    def _from_tracking_id(self, tracking_id, user):
+        """Returns the session cached in the django session without querying the database.
+        Only the ids of the session and its visitor are known, plus the visitor's user if that
+        is the requesting user."""
+        visitor = Visitor(id=tracking_id['visitor_id'], user_id=tracking_id['user_id'])
+        if user is not None and user.is_authenticated() and user.id == tracking_id['user_id']:
+            visitor.user = user
+        return Session(id=tracking_id['id'], visitor=visitor)
+
+
+def _format_last_seen(timestamp):
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def _cache_session(request, session):
+    """Keeps the ids of the tracking session, its visitor and the visitor's user in the
+    django session, along with the time the tracking session was last seen"""
+    request.session['hs_tracking_id'] = signing.dumps({
+        'id': session.id,
+        'visitor_id': session.visitor.id,
+        'user_id': session.visitor.user_id,
+        'last_seen': _format_last_seen(datetime.now()),
+    })
+
 
 class Visitor(models.Model):
     first_seen = models.DateTimeField(auto_now_add=True)
@@ -88,6 +138,10 @@ class Visitor(models.Model):
 class Session(models.Model):
     begin = models.DateTimeField(auto_now_add=True)
     visitor = models.ForeignKey(Visitor)
+    # last time (within SESSION_CACHE_REFRESH seconds) the session was in use - null for the
+    # sessions older than this field that haven't been backfilled (see the
+    # backfill_session_last_seen command)
+    last_seen = models.DateTimeField(null=True, default=timezone.now, db_index=True)
 
     objects = SessionManager()
 
@@ -117,7 +171,8 @@ class Variable(models.Model):
     ]
 
     session = models.ForeignKey(Session)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # not auto_now_add, which would set the time a buffered variable gets saved
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     name = models.CharField(max_length=32)
     type = models.IntegerField(choices=TYPE_CHOICES)
     # change value to TextField to be less restrictive as max_length of CharField has been
@@ -146,7 +201,10 @@ class Variable(models.Model):
         return '|'.join(msg_items)
 
     @classmethod
-    def record(cls, session, name, value=None):
+    def record(cls, session, name, value=None, buffered=False, timestamp=None):
+        """Records the variable for the session. A buffered variable is saved later along with
+        other buffered variables (see VariableBuffer). The variable is timestamped with the
+        current time unless *timestamp* (e.g., the time of an action recorded later) is given."""
         for i, (label, coercer) in enumerate(cls.TYPES, 0):
             try:
                 if value == coercer(value):
@@ -157,8 +215,14 @@ class Variable(models.Model):
         else:
             raise TypeError("Unable to record variable of unrecognized type %s",
                             type(value).__name__)
-        return Variable.objects.create(session=session, name=name, type=type_code,
-                                       value=cls.encode(value))
+        variable = Variable(session=session, name=name, type=type_code, value=cls.encode(value))
+        if timestamp is not None:
+            variable.timestamp = timestamp
+        if buffered:
+            variable_buffer.add(variable)
+        else:
+            variable.save()
+        return variable
 
     @classmethod
     def encode(cls, value):
@@ -171,3 +235,122 @@ class Variable(models.Model):
         else:
             raise ValueError("Unknown type (%s) for tracking variable: %r",
                              type(value).__name__, value)
+
+
+class DailyActivity(models.Model):
+    """Daily rollup of the tracking variables: the number of variables of one kind (name)
+    recorded on one day (UTC) for one resource, user type and user email domain"""
+    VARIABLE_NAMES = ('visit', 'download', 'app_launch')
+
+    date = models.DateField(db_index=True)
+    name = models.CharField(max_length=32)
+    resource_id = models.CharField(max_length=32, blank=True, default='')
+    user_type = models.CharField(max_length=255, blank=True, default='')
+    user_email_domain = models.CharField(max_length=255, blank=True, default='')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'name', 'resource_id', 'user_type', 'user_email_domain')
+
+    @classmethod
+    def build(cls, date):
+        """(Re)builds the rollup of the given day from the variables recorded on that day"""
+        day_start = timezone.datetime(date.year, date.month, date.day, tzinfo=timezone.utc)
+        variables = Variable.objects.filter(timestamp__gte=day_start,
+                                            timestamp__lt=day_start + timedelta(days=1),
+                                            name__in=cls.VARIABLE_NAMES)
+        counts = {}
+        for name, value in variables.values_list('name', 'value').iterator():
+            key = (name,) + cls._get_rollup_fields(value)
+            counts[key] = counts.get(key, 0) + 1
+
+        with transaction.atomic():
+            cls.objects.filter(date=date).delete()
+            cls.objects.bulk_create(
+                cls(date=date, name=name, resource_id=resource_id, user_type=user_type,
+                    user_email_domain=user_email_domain, count=count)
+                for (name, resource_id, user_type, user_email_domain), count in counts.items())
+
+    @staticmethod
+    def _get_rollup_fields(value):
+        """returns (resource id, user type, user email domain) from the value of a variable
+        (key=value pairs separated by |)"""
+        fields = dict(item.split('=', 1) for item in value.split('|') if '=' in item)
+        resource_id = fields.get('resource_guid') or fields.get('res_id')
+        if not resource_id:
+            match = RESOURCE_URL_PATTERN.match(fields.get('request_url', ''))
+            resource_id = match.group(1) if match else ''
+
+        def rollup_value(field_name, max_length=255):
+            field_value = fields.get(field_name, '')
+            return '' if field_value == 'None' else field_value[:max_length]
+
+        return (resource_id[:32], rollup_value('user_type'), rollup_value('user_email_domain'))
+
+
+class VariableBuffer(object):
+    """Collects the variables recorded in this process and saves them with one bulk insert once
+    TRACKING_BUFFER_SIZE variables are collected, or by a timer TRACKING_BUFFER_MAX_AGE seconds
+    after the first variable is collected. Whatever is left is saved when the process exits;
+    only the variables of the last TRACKING_BUFFER_MAX_AGE seconds are lost if the process is
+    killed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._variables = []
+        self._timer = None
+
+    def add(self, variable):
+        max_size = getattr(settings, 'TRACKING_BUFFER_SIZE', 1)
+        with self._lock:
+            self._variables.append(variable)
+            flush = len(self._variables) >= max_size
+            if not flush and self._timer is None:
+                self._timer = threading.Timer(getattr(settings, 'TRACKING_BUFFER_MAX_AGE', 0),
+                                              self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush:
+            # the variable is recorded while handling a request, which must not fail because
+            # the variables can't be saved
+            self.flush_safely()
+
+    def flush(self):
+        with self._lock:
+            variables, self._variables = self._variables, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not variables:
+            return
+        try:
+            with transaction.atomic():
+                Variable.objects.bulk_create(variables)
+        except IntegrityError:
+            # e.g., the session of a variable was deleted - save the variables one by one, so
+            # that only the variables of that session are lost
+            for variable in variables:
+                try:
+                    with transaction.atomic():
+                        variable.save()
+                except IntegrityError:
+                    logger.warning("Failed to save the tracking variable {} of session {}"
+                                   .format(variable.name, variable.session_id))
+
+    def flush_safely(self):
+        """Saves the buffered variables, logging (instead of raising) any error"""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to save the buffered tracking variables")
+
+    def _flush_on_timer(self):
+        try:
+            self.flush_safely()
+        finally:
+            # the database connection was opened by (and only for) the timer thread
+            connection.close()
+
+
+variable_buffer = VariableBuffer()
+atexit.register(variable_buffer.flush_safely)
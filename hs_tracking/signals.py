@@ -1,10 +1,13 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.dispatch import receiver
+from django.utils import timezone
 
+from hs_core.robots import is_human
 from hs_core.signals import pre_download_file, post_delete_resource, post_create_resource
 
 from .models import Session
 from .models import Variable
+from .tasks import record_download
 from .utils import get_std_log_fields
 
 
@@ -18,7 +21,7 @@ def capture_login(sender, **kwargs):
     # format the 'download' kwargs
     msg = Variable.format_kwargs(**fields)
 
-    session.record('login', value=msg)
+    session.record('login', value=msg, buffered=True)
 
 
 @receiver(user_logged_out, dispatch_uid='id_capture_logout')
@@ -31,7 +34,7 @@ def capture_logout(sender, **kwargs):
     # format the 'download' kwargs
     msg = Variable.format_kwargs(**fields)
 
-    session.record('logout', value=msg)
+    session.record('logout', value=msg, buffered=True)
 
 
 @receiver(pre_download_file)
@@ -42,8 +45,7 @@ def capture_download(**kwargs):
         return
 
     # exit early if not human (necessary b/c this action does not require log in)
-    is_human = getattr(kwargs['request'], 'is_human', False)
-    if not is_human:
+    if not is_human(kwargs['request']):
         return
 
     # get standard fields
@@ -55,15 +57,13 @@ def capture_download(**kwargs):
 
     # add specific fields
     fields['filename'] = kwargs['download_file_name']
-    fields['resource_size_bytes'] = kwargs['resource'].size
     fields['resource_type'] = kwargs['resource'].resource_type
     fields['resource_guid'] = kwargs['resource'].short_id
 
-    # format the 'download' kwargs
-    msg = Variable.format_kwargs(**fields)
-
-    # record the download action
-    session.record('download', value=msg)
+    # the file and resource sizes are looked up in iRODS and the download action is recorded
+    # in the background (timestamped with the time of the download), so that the download
+    # doesn't wait for them
+    record_download.apply_async((session.id, fields, timezone.now().isoformat()))
 
 
 @receiver(post_create_resource)
@@ -0,0 +1,82 @@
+"""Define celery tasks for hs_tracking app."""
+
+from __future__ import absolute_import
+
+import os
+import datetime
+import logging
+
+from celery import shared_task
+from celery.task import periodic_task
+from celery.schedules import crontab
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from django_irods.icommands import SessionException
+from hs_core.models import BaseResource, ResourceFile
+from hs_tracking.models import DailyActivity, Session, Variable
+
+
+# Pass 'django' into getLogger instead of __name__
+# for celery tasks (as this seems to be the
+# only way to successfully log in code executed
+# by celery, despite our catch-all handler).
+logger = logging.getLogger('django')
+
+
+@periodic_task(ignore_result=True, run_every=crontab(minute=30, hour=0))
+def build_daily_activity():
+    """Build the daily rollup of the tracking variables recorded yesterday (UTC).
+
+    The variables are buffered by the processes that record them, which save them within
+    TRACKING_BUFFER_MAX_AGE seconds (see hs_tracking.models.VariableBuffer), so all the
+    variables of yesterday are saved well before this task runs at 00:30.
+    """
+    yesterday = timezone.now().date() - datetime.timedelta(days=1)
+    DailyActivity.build(yesterday)
+
+
+@shared_task(ignore_result=True)
+def record_download(session_id, fields, timestamp=None):
+    """Record the download of a resource file by a tracking session.
+
+    The size of the downloaded file and the (cached) total size of the resource are added to the
+    fields collected by hs_tracking.signals.capture_download before the download is recorded.
+    The cached size is kept in the cache shared with the web processes, so it is invalidated
+    when the files of the resource change.
+    :param session_id: id of the tracking Session
+    :param fields: dict of the fields of the download variable
+    :param timestamp: time of the download (ISO 8601 string), if not now
+    """
+    try:
+        session = Session.objects.get(id=session_id)
+    except Session.DoesNotExist:
+        logger.error("Tracking session {} no longer exists.".format(session_id))
+        return
+
+    resource = BaseResource.objects.filter(short_id=fields['resource_guid']).first()
+    if resource is not None:
+        try:
+            fields['file_size_bytes'] = _get_file_size(resource, fields['filename'])
+            fields['resource_size_bytes'] = resource.cached_size
+        except SessionException as ex:
+            logger.error("Failed to get the file sizes of resource {}. Error:{}".format(
+                resource.short_id, ex.stderr))
+
+    session.record('download', value=Variable.format_kwargs(**fields),
+                   timestamp=parse_datetime(timestamp) if timestamp else None)
+
+
+def _get_file_size(resource, file_name):
+    """Return the size of the resource file named *file_name*, or None if the resource has no
+    such file (e.g., the bag of the resource was downloaded) or has more than one file of that
+    name (in different folders), since the downloaded one is not known"""
+    file_path = os.path.join('/', file_name)
+    res_files = ResourceFile.objects.filter(
+        Q(resource_file__endswith=file_path) | Q(fed_resource_file__endswith=file_path),
+        object_id=resource.id)[:2]
+    if len(res_files) != 1:
+        return None
+    return res_files[0].size
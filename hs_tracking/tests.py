@@ -2,13 +2,23 @@ from datetime import datetime, timedelta
 import csv
 from cStringIO import StringIO
 
-from django.test import TestCase
-from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import Group, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
 from django.test import Client
 from django.http import HttpRequest, QueryDict, response
+from django.utils import timezone
 from mock import patch, Mock
 
-from .models import Variable, Session, Visitor, SESSION_TIMEOUT, VISITOR_FIELDS
+from hs_core import hydroshare
+from hs_core.models import ResourceFile
+from hs_core.testing import MockIRODSTestCaseMixin
+
+from .models import Variable, Session, Visitor, SESSION_TIMEOUT, SESSION_CACHE_REFRESH, \
+    VISITOR_FIELDS, variable_buffer, DailyActivity
+from .tasks import record_download
 from .views import AppLaunch
 import utils
 import urllib
@@ -143,6 +153,58 @@ class TrackingTests(TestCase):
         self.assertEqual("false", self.session.variable_set.get(name='false').value)
         self.assertEqual('Hello, World', self.session.variable_set.get(name='text').value)
 
+    @override_settings(TRACKING_BUFFER_SIZE=3, TRACKING_BUFFER_MAX_AGE=3600)
+    def test_record_buffered_variable(self):
+        self.session.record('visit', 'a', buffered=True)
+        self.session.record('visit', 'b', buffered=True)
+        self.assertEqual(Variable.objects.filter(name='visit').count(), 0)
+
+        # the buffered variables are saved once the buffer is full
+        self.session.record('visit', 'c', buffered=True)
+        self.assertEqual(list(Variable.objects.filter(name='visit').order_by('id')
+                              .values_list('value', flat=True)), ['a', 'b', 'c'])
+
+        self.session.record('visit', 'd', buffered=True)
+        variable_buffer.flush()
+        self.assertEqual(Variable.objects.filter(name='visit').count(), 4)
+
+    @override_settings(TRACKING_BUFFER_SIZE=3, TRACKING_BUFFER_MAX_AGE=0.01)
+    def test_flush_buffered_variables_on_timer(self):
+        with patch.object(variable_buffer, 'flush_safely') as flush_safely, \
+                patch('hs_tracking.models.connection') as connection:
+            self.session.record('visit', 'a', buffered=True)
+            variable_buffer._timer.join(5)
+        flush_safely.assert_called_once_with()
+        connection.close.assert_called_once_with()
+
+        # saving the variables stops the timer
+        variable_buffer.flush()
+        self.assertIsNone(variable_buffer._timer)
+        self.assertEqual(Variable.objects.filter(name='visit').count(), 1)
+
+    @override_settings(TRACKING_BUFFER_SIZE=3, TRACKING_BUFFER_MAX_AGE=3600)
+    def test_record_buffered_variable_deleted_session(self):
+        # check the foreign keys when the variables are saved, not when the test ends
+        connection.cursor().execute('SET CONSTRAINTS ALL IMMEDIATE')
+        deleted_session = Session.objects.create(visitor=self.visitor)
+        self.session.record('visit', 'a', buffered=True)
+        deleted_session.record('visit', 'b', buffered=True)
+        deleted_session.delete()
+        self.session.record('visit', 'c', buffered=True)
+
+        # only the variable of the deleted session is lost
+        self.assertEqual(list(Variable.objects.filter(name='visit').order_by('id')
+                              .values_list('value', flat=True)), ['a', 'c'])
+
+    @override_settings(TRACKING_BUFFER_SIZE=1)
+    def test_record_buffered_variable_save_error(self):
+        with patch.object(Variable.objects, 'bulk_create', side_effect=DatabaseError), \
+                patch('hs_tracking.models.logger') as logger:
+            # the error is logged, not raised
+            self.session.record('visit', 'a', buffered=True)
+        self.assertTrue(logger.exception.called)
+        self.assertEqual(Variable.objects.filter(name='visit').count(), 0)
+
     def test_record_bad_value(self):
         self.assertRaises(TypeError, self.session.record, 'bad', ['oh no i cannot handle arrays'])
 
@@ -168,6 +230,17 @@ class TrackingTests(TestCase):
         session2 = Session.objects.for_request(request)
         self.assertEqual(session1.id, session2.id)
 
+    def test_for_request_cached(self):
+        request = self.createRequest(user=self.user)
+        request.session = {}
+        session1 = Session.objects.for_request(request)
+        # the session is found from the django session without any query
+        with self.assertNumQueries(0):
+            session2 = Session.objects.for_request(request)
+        self.assertEqual(session1.id, session2.id)
+        self.assertEqual(session1.visitor.id, session2.visitor.id)
+        self.assertEqual(session2.visitor.user, self.user)
+
     def test_for_request_expired(self):
         request = self.createRequest(user=self.user)
         request.session = {}
@@ -178,6 +251,18 @@ class TrackingTests(TestCase):
         self.assertNotEqual(session1.id, session2.id)
         self.assertEqual(session1.visitor.id, session2.visitor.id)
 
+    def test_for_request_deleted(self):
+        request = self.createRequest(user=self.user)
+        request.session = {}
+        session1 = Session.objects.for_request(request)
+        session1.delete()
+        # the session cached in the django session is refreshed and found to be deleted
+        with patch('hs_tracking.models.datetime') as dt_mock:
+            dt_mock.now.return_value = datetime.now() + timedelta(seconds=SESSION_CACHE_REFRESH)
+            session2 = Session.objects.for_request(request)
+        self.assertNotEqual(session1.id, session2.id)
+        self.assertTrue(Session.objects.filter(id=session2.id).exists())
+
     def test_for_other_user(self):
         request = self.createRequest(user=self.user)
         request.session = {}
@@ -191,6 +276,57 @@ class TrackingTests(TestCase):
         self.assertNotEqual(session1.id, session2.id)
         self.assertNotEqual(session1.visitor.id, session2.visitor.id)
 
+    def test_backfill_session_last_seen(self):
+        variable = self.session.record('visit', 'a')
+        session2 = Session.objects.create(visitor=self.visitor)
+        Session.objects.filter(id__in=[self.session.id, session2.id]).update(last_seen=None)
+
+        call_command('backfill_session_last_seen', chunk_size=1)
+
+        # the last seen time of a session is the time of its latest variable, or the time the
+        # session began
+        self.assertEqual(Session.objects.get(id=self.session.id).last_seen, variable.timestamp)
+        session2 = Session.objects.get(id=session2.id)
+        self.assertEqual(session2.last_seen, session2.begin)
+
+    def test_build_daily_activity(self):
+        res_id = 'a' * 32
+        self.session.record('visit', 'user_type=Unspecified|user_email_domain=example.com|'
+                                     'request_url=/resource/{}/'.format(res_id))
+        self.session.record('visit', 'user_type=Unspecified|user_email_domain=example.com|'
+                                     'request_url=/resource/{}/'.format(res_id))
+        self.session.record('download', 'user_type=None|user_email_domain=None|'
+                                        'resource_guid={}'.format(res_id))
+        self.session.record('app_launch', 'user_type=Unspecified|user_email_domain=example.com|'
+                                          'res_id={}'.format(res_id))
+        self.session.record('login', 'user_type=Unspecified|user_email_domain=example.com')
+
+        today = Variable.objects.get(name='login').timestamp.date()
+        DailyActivity.build(today)
+        # building the rollup of a day again replaces it
+        DailyActivity.build(today)
+
+        activity = DailyActivity.objects.filter(date=today)
+        self.assertEqual(activity.count(), 3)
+        visit = activity.get(name='visit')
+        self.assertEqual((visit.resource_id, visit.user_type, visit.user_email_domain,
+                          visit.count), (res_id, 'Unspecified', 'example.com', 2))
+        download = activity.get(name='download')
+        self.assertEqual((download.resource_id, download.user_type, download.count),
+                         (res_id, '', 1))
+        self.assertEqual(activity.get(name='app_launch').resource_id, res_id)
+
+    def test_record_download(self):
+        fields = {'user_type': 'Unspecified', 'filename': 'file.txt',
+                  'resource_guid': 'a' * 32, 'resource_type': 'GenericResource'}
+        record_download(self.session.id, fields)
+
+        # the file and resource sizes are left out for a resource that no longer exists
+        value = self.session.variable_set.get(name='download').value
+        self.assertEqual(sorted(value.split('|')),
+                         ['filename=file.txt', 'resource_guid=' + 'a' * 32,
+                          'resource_type=GenericResource', 'user_type=Unspecified'])
+
     def test_export_visitor_info(self):
         request = self.createRequest(user=self.user)
         request.session = {}
@@ -288,6 +424,66 @@ class TrackingTests(TestCase):
         client.logout()
 
 
+class DownloadTrackingTests(MockIRODSTestCaseMixin, TestCase):
+
+    def setUp(self):
+        super(DownloadTrackingTests, self).setUp()
+        Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = hydroshare.create_account(
+            'creator@example.com',
+            username='creator',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+        self.files = [SimpleUploadedFile('file1.txt', 'file one'),
+                      SimpleUploadedFile('file2.txt', 'the second file')]
+        self.res = hydroshare.create_resource('GenericResource', self.user, 'My Test Resource',
+                                              files=self.files)
+        self.session = Session.objects.create(visitor=Visitor.objects.create())
+
+    def tearDown(self):
+        super(DownloadTrackingTests, self).tearDown()
+        self.res.delete()
+
+    def test_record_download(self):
+        fields = {'user_type': 'Unspecified', 'filename': 'file2.txt',
+                  'resource_guid': self.res.short_id, 'resource_type': 'GenericResource'}
+        download_time = timezone.now() - timedelta(minutes=5)
+        record_download(self.session.id, fields, download_time.isoformat())
+
+        variable = self.session.variable_set.get(name='download')
+        self.assertEqual(variable.timestamp, download_time)
+        self.assertEqual(sorted(variable.value.split('|')),
+                         ['file_size_bytes=15', 'filename=file2.txt',
+                          'resource_guid=' + self.res.short_id,
+                          'resource_size_bytes=23', 'resource_type=GenericResource',
+                          'user_type=Unspecified'])
+
+    def test_record_download_same_file_names(self):
+        # the downloaded one of two files of the same name in different folders is not known
+        ResourceFile.create_folder(self.res, 'foo')
+        hydroshare.add_resource_files(self.res.short_id,
+                                      SimpleUploadedFile('file2.txt', 'another file2'),
+                                      folder='foo')
+        fields = {'filename': 'file2.txt', 'resource_guid': self.res.short_id}
+        record_download(self.session.id, fields)
+
+        value = self.session.variable_set.get(name='download').value
+        self.assertIn('file_size_bytes=None', value.split('|'))
+        self.assertIn('resource_size_bytes=36', value.split('|'))
+
+    def test_record_bag_download(self):
+        # the bag of the resource is not a resource file
+        fields = {'filename': self.res.short_id + '.zip', 'resource_guid': self.res.short_id}
+        record_download(self.session.id, fields)
+
+        value = self.session.variable_set.get(name='download').value
+        self.assertIn('file_size_bytes=None', value.split('|'))
+        self.assertIn('resource_size_bytes=23', value.split('|'))
+
+
 class UtilsTests(TestCase):
 
     def setUp(self):
@@ -1,6 +1,7 @@
-import robot_detection
 from ipware.ip import get_ip
 
+from hs_core.robots import robot_detector
+
 
 def get_client_ip(request):
     return get_ip(request)
@@ -26,9 +27,7 @@ def get_user_email_domain(session):
 
 
 def is_human(user_agent):
-    if robot_detection.is_robot(user_agent):
-        return False
-    return True
+    return not robot_detector.is_robot(user_agent)
 
 
 def get_std_log_fields(request, session=None):
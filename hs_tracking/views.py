@@ -47,7 +47,7 @@ class AppLaunch(TemplateView):
 
             # format and save the log message
             msg = Variable.format_kwargs(**fields)
-            session.record('app_launch', value=msg)
+            session.record('app_launch', value=msg, buffered=True)
 
         return HttpResponseRedirect(url)
 
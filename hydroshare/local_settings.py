@@ -46,6 +46,16 @@ PERMISSIONS_DB= redis.Redis(
     port=REDIS_PORT,
     db=6)
 
+# cache for derived data such as resource landing page fragments, shared by the web and the
+# celery containers
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://{REDIS_HOST}:{REDIS_PORT}/7'.format(REDIS_HOST=REDIS_HOST,
+                                                                 REDIS_PORT=REDIS_PORT),
+    }
+}
+
 
 IPYTHON_SETTINGS=[]
 IPYTHON_BASE='/hydroshare/static/media/ipython-notebook'
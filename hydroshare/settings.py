@@ -220,6 +220,19 @@ PROJECT_DIRNAME = PROJECT_ROOT.split(os.sep)[-1]
 # project specific.
 CACHE_MIDDLEWARE_KEY_PREFIX = PROJECT_DIRNAME
 
+# The cache for derived data such as resource landing page fragments (CACHES) is configured in
+# local_settings.py. It has to be shared by the web and the celery containers so that an
+# invalidation done by one process is seen by all the others, and it has to increment counters
+# atomically, so the deployed redis server is used. Tests get a private in-memory cache (see
+# hs_core.tests.runner).
+
+# Time (in seconds) a cached landing page fragment is kept
+LANDING_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Time (in seconds) a rendered sitemap is kept (a sitemap is re-rendered as soon as a resource in
+# it is updated)
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
 # URL prefix for static files.
 # Example: "http://media.lawrence.com/static/"
 STATIC_URL = "/static/"
@@ -517,6 +530,11 @@ RESOURCE_LOCK_TIMEOUT_SECONDS = 300 # in seconds
 # customized temporary file path for large files retrieved from iRODS user zone for metadata extraction
 TEMP_FILE_DIR = '/hs_tmp'
 
+# the band min/max values of a raster with more cells than this are computed from a sample of
+# about this many cells when setting the raster file type; the exact values are computed by a
+# background task afterwards. Set to None to compute the exact values up front.
+RASTER_BAND_STATS_SAMPLE_SIZE = 4000000
+
 ####################
 # OAUTH TOKEN SETTINGS #
 ####################
@@ -593,6 +611,11 @@ LOGGING = {
 TRACKING_SESSION_TIMEOUT = 60 * 15
 TRACKING_PROFILE_FIELDS = ["title", "user_type", "subject_areas", "public", "state", "country"]
 TRACKING_USER_FIELDS = ["username", "email", "first_name", "last_name"]
+# tracking variables of page visits, downloads, logins and app launches are saved in batches
+# of this size, or once the oldest one is this many seconds old (tests save them right away,
+# see hs_core.tests.runner)
+TRACKING_BUFFER_SIZE = 100
+TRACKING_BUFFER_MAX_AGE = 10
 
 # info django that a reverse proxy sever (nginx) is handling ssl/https for it
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
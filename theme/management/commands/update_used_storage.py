@@ -2,16 +2,26 @@ import csv
 from collections import namedtuple
 
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
 
+from hs_core.hydroshare.utils import convert_file_size_to_unit
 from theme.models import UserQuota, QuotaMessage
-from theme.utils import get_quota_message
+from theme.tasks import send_quota_warning_emails
 
 
 INPUT_FIELDS = namedtuple('FIELDS', 'user_name used_value storage_zone')
 input_fields = INPUT_FIELDS(0, 1, 2)
 
+# number of users whose quota warning emails are sent by one celery task
+EMAIL_BATCH_SIZE = 100
+
+
+# the used values of this zone are kept up to date as resource files change (see
+# hs_core.hydroshare.utils.update_quota_usage and reconcile_quota_usage), not read from the input
+# file
+ACCOUNTED_ZONE = 'hydroshare_internal'
+
 
 class Command(BaseCommand):
     help = "Update used storage space in UserQuota table for all users in HydroShare by reading " \
@@ -19,17 +29,80 @@ class Command(BaseCommand):
            "information in the format of 'User name' 'Used value' 'Storage zone' " \
            "separated by comma. A header may also be included for informational purposes." \
            "This input file is created by a quota calculation script that runs nightly on a " \
-           "HydroShare server."
+           "HydroShare server. The used values of the hydroshare_internal zone are not read " \
+           "from the input file, but the grace periods and quota warnings of all users are " \
+           "updated."
 
     def add_arguments(self, parser):
         parser.add_argument('input_file_name_with_path', help='input file name with path')
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=1000,
+            help='number of UserQuota rows updated in one statement',
+        )
 
     def handle(self, *args, **options):
-        with open(options['input_file_name_with_path'], 'r') as csvfile:
+        used_values = self.read_used_values(options['input_file_name_with_path'])
+
+        qmsg = QuotaMessage.get_instance()
+
+        # load all quotas with one query and compute the new values in memory
+        updates = []
+        warning_user_ids = []
+        for uq_id, user_id, uname, zone, unit, allocated_value, used_value, grace_period in \
+                UserQuota.objects.values_list('id', 'user_id', 'user__username', 'zone', 'unit',
+                                              'allocated_value', 'used_value',
+                                              'remaining_grace_period').iterator():
+            if zone == ACCOUNTED_ZONE:
+                new_used_value = used_value
+            elif (uname, zone) in used_values:
+                new_used_value = convert_file_size_to_unit(used_values[(uname, zone)], unit)
+            else:
+                continue
+            used_percent = new_used_value * 100.0 / allocated_value
+            new_grace_period = grace_period
+            if used_percent >= qmsg.soft_limit_percent:
+                if used_percent >= 100 and used_percent < qmsg.hard_limit_percent:
+                    if grace_period < 0:
+                        # triggers grace period counting
+                        new_grace_period = qmsg.grace_period
+                    elif grace_period > 0:
+                        # reduce remaining_grace_period by one day
+                        new_grace_period = grace_period - 1
+                elif used_percent >= qmsg.hard_limit_percent:
+                    # set grace period to 0 when user quota exceeds hard limit
+                    new_grace_period = 0
+                # send email for people monitoring and follow-up as needed
+                warning_user_ids.append(user_id)
+            elif grace_period >= 0:
+                # turn grace period off now that the user is below quota soft limit
+                new_grace_period = -1
+
+            if zone == ACCOUNTED_ZONE:
+                # the used value may change while the command runs, so only the grace period
+                # is updated
+                if new_grace_period != grace_period:
+                    updates.append((uq_id, None, new_grace_period))
+            elif new_used_value != used_value or new_grace_period != grace_period:
+                updates.append((uq_id, new_used_value, new_grace_period))
+
+        chunk_size = options['chunk_size']
+        for start in range(0, len(updates), chunk_size):
+            self.update_quotas(updates[start:start + chunk_size])
+        print "Updated {} user quotas".format(len(updates))
+
+        # the emails are sent asynchronously, in batches, once all quotas are updated
+        for start in range(0, len(warning_user_ids), EMAIL_BATCH_SIZE):
+            send_quota_warning_emails.apply_async(
+                (warning_user_ids[start:start + EMAIL_BATCH_SIZE],))
+
+    def read_used_values(self, input_file_name):
+        """returns a dict of the used values (in bytes) by (user name, zone) in the input file"""
+        used_values = {}
+        with open(input_file_name, 'r') as csvfile:
             freader = csv.reader(csvfile)
-            if not QuotaMessage.objects.exists():
-                QuotaMessage.objects.create()
-            qmsg = QuotaMessage.objects.first()
             for row in freader:
                 try:
                     if len(row) < 3:
@@ -63,41 +136,24 @@ class Command(BaseCommand):
                         # zone is empty after stripping, ignore this row
                         continue
 
-                    uq = UserQuota.objects.filter(user__username=uname, zone=zone).first()
-                    if uq is None:
-                        # the quota row does not exist in Django
-                        continue
-                    uq.update_used_value(used_val)
-
-                    used_percent = uq.used_percent
-                    if used_percent >= qmsg.soft_limit_percent:
-                        if used_percent >= 100 and used_percent < qmsg.hard_limit_percent:
-                            if uq.remaining_grace_period < 0:
-                                # triggers grace period counting
-                                uq.remaining_grace_period = qmsg.grace_period
-                            elif uq.remaining_grace_period > 0:
-                                # reduce remaining_grace_period by one day
-                                uq.remaining_grace_period -= 1
-                        elif used_percent >= qmsg.hard_limit_percent:
-                            # set grace period to 0 when user quota exceeds hard limit
-                            uq.remaining_grace_period = 0
-                        uq.save()
-                        user = uq.user
-                        uemail = user.email
-                        msg_str = 'Dear ' + uname + ':\n\n'
-                        msg_str += get_quota_message(user)
-
-                        msg_str += '\n\nHydroShare Support'
-                        subject = 'Quota warning'
-                        # send email for people monitoring and follow-up as needed
-                        send_mail(subject, msg_str, settings.DEFAULT_FROM_EMAIL,
-                                  [uemail])
-                    else:
-                        if uq.remaining_grace_period >= 0:
-                            # turn grace period off now that the user is below quota soft limit
-                            uq.remaining_grace_period = -1
-                            uq.save()
+                    used_values[(uname, zone)] = used_val
 
                 except ValueError as ex:   # header row, continue
                     print "Skip the header row:" + ex.message
                     continue
+        return used_values
+
+    def update_quotas(self, updates):
+        """updates the used values and grace periods of the UserQuota rows in one statement
+        :param updates: list of (UserQuota id, used value, remaining grace period), where the
+        used value is None if it is not to be updated
+        """
+        used_value_cases = [When(id=uq_id, then=Value(used_value))
+                            for uq_id, used_value, _ in updates if used_value is not None]
+        grace_period_cases = [When(id=uq_id, then=Value(grace_period))
+                              for uq_id, _, grace_period in updates]
+        with transaction.atomic():
+            UserQuota.objects.filter(id__in=[uq_id for uq_id, _, _ in updates]).update(
+                used_value=Case(*used_value_cases, default=F('used_value'),
+                                output_field=FloatField()),
+                remaining_grace_period=Case(*grace_period_cases, output_field=IntegerField()))
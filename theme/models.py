@@ -1,9 +1,12 @@
 import datetime
+import time
 from django.utils import timezone
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
-from django.db.models.signals import pre_save
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.template import RequestContext, Template, TemplateSyntaxError
 from django.utils.translation import ugettext_lazy as _
 from django.utils.html import strip_tags
@@ -18,6 +21,11 @@ from mezzanine.utils.models import upload_to
 
 DEFAULT_COPYRIGHT = '&copy {% now "Y" %} {{ settings.SITE_TITLE }}'
 
+# key of the version of the QuotaMessage singleton in the Django cache, which is shared by all
+# processes - a process reloads its cached QuotaMessage when the version changes
+QUOTA_MESSAGE_VERSION_KEY = 'theme:quota_message:version'
+_quota_message_cache = {}
+
 
 class SiteConfiguration(SiteRelated):
     '''
@@ -187,6 +195,25 @@ class QuotaMessage(models.Model):
     # grace period, default is 7 days
     grace_period = models.IntegerField(default=7)
 
+    @classmethod
+    def get_instance(cls):
+        """
+        return the QuotaMessage singleton, which is created if it doesn't exist yet. The
+        instance is kept in a process level cache until the quota message is saved (e.g., in
+        the admin) in any process
+        """
+        version = cache.get(QUOTA_MESSAGE_VERSION_KEY)
+        if version is not None and _quota_message_cache.get('version') == version:
+            return _quota_message_cache['instance']
+        if version is None:
+            cache.add(QUOTA_MESSAGE_VERSION_KEY, int(time.time() * 1000), None)
+            version = cache.get(QUOTA_MESSAGE_VERSION_KEY)
+        instance = cls.objects.first()
+        if instance is None:
+            instance = cls.objects.create()
+        _quota_message_cache.update(version=version, instance=instance)
+        return instance
+
 
 class UserQuota(models.Model):
     # ForeignKey relationship makes it possible to associate multiple UserQuota models to
@@ -214,6 +241,33 @@ class UserQuota(models.Model):
         verbose_name_plural = _("User quotas")
         unique_together = ('user', 'zone')
 
+    @classmethod
+    def get_internal_quota(cls, user):
+        """
+        return the hydroshare_internal UserQuota of the user or None if the user doesn't have
+        one. The UserQuota is cached for the duration of the current request, so adding files to
+        resources in several steps of a request queries it once
+        :param user: the User instance
+        """
+        request = current_request()
+        if request is None:
+            return user.quotas.filter(zone='hydroshare_internal').first()
+        if not hasattr(request, 'user_quotas'):
+            request.user_quotas = {}
+        if user.id not in request.user_quotas:
+            request.user_quotas[user.id] = user.quotas.filter(zone='hydroshare_internal').first()
+        return request.user_quotas[user.id]
+
+    @staticmethod
+    def forget_internal_quota(user_id):
+        """
+        drop the UserQuota of the user cached for the current request (see get_internal_quota)
+        :param user_id: id of the User
+        """
+        request = current_request()
+        if request is not None and hasattr(request, 'user_quotas'):
+            request.user_quotas.pop(user_id, None)
+
     @property
     def used_percent(self):
         return self.used_value*100.0/self.allocated_value
@@ -228,6 +282,18 @@ class UserQuota(models.Model):
         self.used_value = convert_file_size_to_unit(size, self.unit)
         self.save()
 
+    def add_used_size(self, size):
+        """
+        add pass in size in bytes to the stored used_value with a single UPDATE, so that
+        concurrent changes are not lost
+        :param size: pass in size in bytes unit, negative when storage is freed
+        :return:
+        """
+        from hs_core.hydroshare.utils import convert_file_size_to_unit
+        UserQuota.objects.filter(id=self.id).update(
+            used_value=F('used_value') + convert_file_size_to_unit(size, self.unit))
+        UserQuota.forget_internal_quota(self.user_id)
+
     def add_to_used_value(self, size):
         """
         return summation of used_value and pass in size in bytes. The returned value
@@ -306,3 +372,22 @@ def force_unique_emails(sender, instance, **kwargs):
             raise ValidationError("Email already in use.")
 
 pre_save.connect(force_unique_emails, sender=User)
+
+
+def quota_message_changed(sender, instance, **kwargs):
+    # make all processes reload the QuotaMessage (see QuotaMessage.get_instance)
+    try:
+        cache.incr(QUOTA_MESSAGE_VERSION_KEY)
+    except ValueError:
+        # no version stored yet (or evicted)
+        cache.set(QUOTA_MESSAGE_VERSION_KEY, int(time.time() * 1000), None)
+
+post_save.connect(quota_message_changed, sender=QuotaMessage)
+post_delete.connect(quota_message_changed, sender=QuotaMessage)
+
+
+def user_quota_changed(sender, instance, **kwargs):
+    UserQuota.forget_internal_quota(instance.user_id)
+
+post_save.connect(user_quota_changed, sender=UserQuota)
+post_delete.connect(user_quota_changed, sender=UserQuota)
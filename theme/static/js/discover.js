@@ -657,11 +657,7 @@ var updateMapFaceting = function (){
         },
         dataType: 'json',
         success: function (data) {
-            raw_results = [];
-            for (var j = 0; j < data.length; j++) {
-                var item = $.parseJSON(data[j]);
-                raw_results.push(item);
-            }
+            raw_results = data;
 
             updateMapView();
         },
@@ -906,12 +902,8 @@ $(document).ready(function () {
                 },
                 dataType: 'json',
                 success: function (data) {
-                    var json_results = [];
-                    for (var j = 0; j < data.length; j++) {
-                        var item = $.parseJSON(data[j]);
-                        json_results.push(item);
-                        raw_results.push(item);
-                    }
+                    var json_results = data;
+                    raw_results = raw_results.concat(data);
                     initMap(json_results);
                     setMapItemsList([], null);
                     $("#resource-search").show();
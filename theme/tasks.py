@@ -0,0 +1,29 @@
+"""Define celery tasks for theme app."""
+
+from __future__ import absolute_import
+
+from celery import shared_task
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mass_mail
+
+from theme.utils import get_quota_message
+
+
+@shared_task(ignore_result=True)
+def send_quota_warning_emails(user_ids):
+    """Send the quota warning email to each of the users with the given ids.
+
+    The emails of a batch are sent over a single connection to the mail server.
+    :param user_ids: ids of the users whose usage is above the quota soft limit
+    """
+    messages = []
+    for user in User.objects.filter(id__in=user_ids):
+        msg_str = 'Dear ' + user.username + ':\n\n'
+        msg_str += get_quota_message(user)
+
+        msg_str += '\n\nHydroShare Support'
+        subject = 'Quota warning'
+        messages.append((subject, msg_str, settings.DEFAULT_FROM_EMAIL, [user.email]))
+    send_mass_mail(messages)
@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from mock import patch
+
+from theme.management.commands import update_used_storage
+from theme.management.commands.update_used_storage import Command
+from theme.models import UserQuota
+
+OTHER_ZONE = 'other_zone'
+
+
+class UpdateUsedStorageTest(TestCase):
+
+    def setUp(self):
+        # (used value, remaining grace period) of the hydroshare_internal quotas (20GB each)
+        internal_quotas = [(10, 3),   # below the soft limit
+                           (21, -1),  # over the quota
+                           (21, 3),   # over the quota within the grace period
+                           (30, 5),   # over the hard limit
+                           (17, -1)]  # over the soft limit
+        self.users = []
+        for index, (used_value, grace_period) in enumerate(internal_quotas):
+            user = User.objects.create(username='user{}'.format(index),
+                                       email='user{}@example.com'.format(index))
+            UserQuota.objects.create(user=user, used_value=used_value,
+                                     remaining_grace_period=grace_period)
+            self.users.append(user)
+        UserQuota.objects.create(user=self.users[0], zone=OTHER_ZONE)
+
+        input_file, self.input_file_name = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(input_file, 'w') as f:
+            f.write('User name,Used value,Storage zone\n')
+            f.write('user0,{},{}\n'.format(4 * 1024 ** 3, OTHER_ZONE))
+            # the hydroshare_internal used values are not read from the input file
+            f.write('user1,1,hydroshare_internal\n')
+            # a user without a quota in the zone
+            f.write('user1,1,{}\n'.format(OTHER_ZONE))
+            f.write(',1,{}\n'.format(OTHER_ZONE))
+
+    def tearDown(self):
+        os.remove(self.input_file_name)
+
+    def get_quota(self, user_index, zone='hydroshare_internal'):
+        quota = UserQuota.objects.get(user=self.users[user_index], zone=zone)
+        return quota.used_value, quota.remaining_grace_period
+
+    @patch.object(update_used_storage, 'EMAIL_BATCH_SIZE', 2)
+    @patch.object(update_used_storage, 'send_quota_warning_emails')
+    def test_update_used_storage(self, send_quota_warning_emails):
+        command_update_quotas = Command.update_quotas
+
+        def update_quotas_after_file_added(command, updates):
+            # a file of user1 is added while the command runs
+            UserQuota.objects.get(user=self.users[1], zone='hydroshare_internal') \
+                .add_used_size(1024 ** 3)
+            command_update_quotas(command, updates)
+
+        with patch.object(Command, 'update_quotas', autospec=True,
+                          side_effect=update_quotas_after_file_added) as update_quotas:
+            call_command('update_used_storage', self.input_file_name, chunk_size=2)
+
+        self.assertEqual(self.get_quota(0, OTHER_ZONE), (4, -1))
+        self.assertEqual(self.get_quota(0), (10, -1))
+        # only the grace periods of the hydroshare_internal quotas are updated
+        self.assertEqual(self.get_quota(1), (24, 7))
+        self.assertEqual(self.get_quota(2), (21, 2))
+        self.assertEqual(self.get_quota(3), (30, 0))
+        self.assertEqual(self.get_quota(4), (17, -1))
+
+        # the 5 changed quotas are updated in chunks of 2
+        self.assertEqual([len(call[0][1]) for call in update_quotas.call_args_list], [2, 2, 1])
+
+        # the users over the soft limit are emailed in batches of 2
+        batches = [call[0][0][0] for call in
+                   send_quota_warning_emails.apply_async.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [2, 2])
+        self.assertEqual(sorted(batches[0] + batches[1]),
+                         sorted(user.id for user in self.users[1:]))
@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from mock import patch
+
+from theme.models import QuotaMessage, UserQuota
+
+
+class QuotaMessageTest(TestCase):
+
+    def test_quota_message_cached(self):
+        qmsg = QuotaMessage.get_instance()
+        # the singleton is kept in the process until it is saved
+        self.assertIs(QuotaMessage.get_instance(), qmsg)
+        qmsg.grace_period = qmsg.grace_period + 1
+        qmsg.save()
+        reloaded = QuotaMessage.get_instance()
+        self.assertIsNot(reloaded, qmsg)
+        self.assertEqual(reloaded.grace_period, qmsg.grace_period)
+        self.assertIs(QuotaMessage.get_instance(), reloaded)
+
+
+class UserQuotaTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user', email='user@example.com')
+        UserQuota.objects.create(user=self.user, used_value=10)
+        UserQuota.objects.create(user=self.user, zone='other_zone', used_value=5)
+        self.request = RequestFactory().get('/')
+
+    def test_get_internal_quota_cached(self):
+        with patch('theme.models.current_request', return_value=self.request):
+            # the quota is queried once per request
+            with self.assertNumQueries(1):
+                uq = UserQuota.get_internal_quota(self.user)
+                self.assertIs(UserQuota.get_internal_quota(self.user), uq)
+            self.assertEqual(uq.zone, 'hydroshare_internal')
+            self.assertEqual(uq.used_value, 10)
+
+            # adding to the used value drops the cached quota
+            uq.add_used_size(1024 ** 3)
+            with self.assertNumQueries(1):
+                uq = UserQuota.get_internal_quota(self.user)
+            self.assertEqual(uq.used_value, 11)
+
+            # so does saving the quota
+            uq.used_value = 12
+            uq.save()
+            with self.assertNumQueries(1):
+                uq = UserQuota.get_internal_quota(self.user)
+            self.assertEqual(uq.used_value, 12)
+
+    def test_get_internal_quota_no_request(self):
+        with patch('theme.models.current_request', return_value=None):
+            with self.assertNumQueries(2):
+                uq = UserQuota.get_internal_quota(self.user)
+                self.assertIsNot(UserQuota.get_internal_quota(self.user), uq)
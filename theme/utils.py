@@ -10,9 +10,7 @@ def get_quota_message(user):
     :param user: The User instance
     :return: quota message string
     """
-    if not QuotaMessage.objects.exists():
-        QuotaMessage.objects.create()
-    qmsg = QuotaMessage.objects.first()
+    qmsg = QuotaMessage.get_instance()
     soft_limit = qmsg.soft_limit_percent
     hard_limit = qmsg.hard_limit_percent
     return_msg = ''